@@ -1,7 +1,8 @@
 """
 Accident Report Generator
 Generates HTML reports from emergency response data.
-Reads from response dict or from saved emergency_response_*.json files.
+Reads from response dict, saved emergency_response_*.json files or the
+response log (api_data/emergency_responses.jsonl and its Parquet compactions).
 Does not modify any existing project files.
 """
 
@@ -202,6 +203,17 @@ class AccidentReportGenerator:
         """Convenience: generate report from a saved emergency_response_*.json path."""
         return self.generate_report_html(json_path, output_file=output_file)
 
+    def generate_from_log(self, accident_id: str, output_file: str = None,
+                          log_path: str = None) -> str:
+        """Generate report for an accident from the response log (see response_sink)."""
+        from response_sink import DEFAULT_LOG_PATH, find_response
+
+        log_path = log_path or os.path.join(self.reports_dir, os.path.basename(DEFAULT_LOG_PATH))
+        response = find_response(accident_id, log_path)
+        if response is None:
+            return self._error_report_html("Response not found in log", accident_id)
+        return self.generate_report_html(response, output_file=output_file)
+
 
 # Example usage (standalone)
 if __name__ == "__main__":
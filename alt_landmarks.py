@@ -0,0 +1,250 @@
+"""
+ALT Routing (A*, Landmarks, Triangle inequality)
+Middle ground between plain bidirectional Dijkstra and contraction hierarchies:
+- Selects ~16 well-spread landmarks on the road network (farthest-point selection)
+- Precomputes distances from and to every landmark into a NumPy file
+- Answers queries with A* using the landmark lower bounds as an admissible,
+  consistent heuristic, so routes stay exactly shortest while far fewer
+  nodes are settled
+
+Preprocess the stored road graph once:
+    python alt_landmarks.py --graph chennai_t_nagar
+
+Then route with EmergencyRouteFinder(routing_engine="alt").
+"""
+
+import argparse
+import time
+from heapq import heappush, heappop
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+ALT_FILENAME = "landmarks.npz"
+DEFAULT_NUM_LANDMARKS = 16
+ACTIVE_LANDMARKS = 4  # Landmarks used per query (best lower bounds for the source/target pair)
+
+
+class ALTLandmarks:
+    """
+    Landmark distance tables plus A* query over a CSRGraph
+
+    dist_from[i, v] = shortest distance landmark_i -> v
+    dist_to[i, v]   = shortest distance v -> landmark_i
+    """
+
+    def __init__(self, csr: CSRGraph, landmarks: np.ndarray,
+                 dist_from: np.ndarray, dist_to: np.ndarray):
+        self.csr = csr
+        self.landmarks = np.asarray(landmarks, dtype=np.int32)
+        self.dist_from = np.asarray(dist_from, dtype=np.float32)
+        self.dist_to = np.asarray(dist_to, dtype=np.float32)
+        self.settled_nodes = 0  # Nodes settled by the last query
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def build(cls, csr: CSRGraph, num_landmarks: int = DEFAULT_NUM_LANDMARKS,
+              seed: int = 0, show_progress: bool = True) -> "ALTLandmarks":
+        """
+        Select landmarks by farthest-point selection and precompute their distances
+
+        Args:
+            csr: Compiled road network
+            num_landmarks: Number of landmarks (~16 is a good trade-off)
+            seed: Random seed for the initial node
+            show_progress: Print progress messages
+        """
+        from scipy.sparse.csgraph import dijkstra
+
+        t0 = time.time()
+        forward = csr.to_scipy()
+        backward = csr.to_scipy(reverse=True)
+        num_landmarks = max(1, min(num_landmarks, csr.num_nodes))
+
+        # Start from the node farthest from a random node, then keep adding the
+        # node farthest from all landmarks chosen so far
+        start = int(np.random.default_rng(seed).integers(csr.num_nodes))
+        d = dijkstra(forward, indices=start)
+        d[~np.isfinite(d)] = -1.0
+        landmarks = [int(np.argmax(d))]
+        dist_from, dist_to = [], []
+        closest = np.full(csr.num_nodes, np.inf)
+
+        while True:
+            lm = landmarks[-1]
+            d_from = dijkstra(forward, indices=lm)
+            d_to = dijkstra(backward, indices=lm)
+            dist_from.append(d_from.astype(np.float32))
+            dist_to.append(d_to.astype(np.float32))
+            if len(landmarks) == num_landmarks:
+                break
+            span = d_from + d_to
+            closest = np.minimum(closest, np.where(np.isfinite(span), span, np.inf))
+            candidates = np.where(np.isfinite(closest), closest, -1.0)
+            candidates[landmarks] = -1.0
+            nxt = int(np.argmax(candidates))
+            if candidates[nxt] <= 0:
+                break
+            landmarks.append(nxt)
+
+        alt = cls(csr, np.array(landmarks), np.vstack(dist_from), np.vstack(dist_to))
+        if show_progress:
+            print(f"   ✓ {len(landmarks)} landmarks precomputed ({time.time() - t0:.1f}s)")
+        return alt
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, path: str):
+        """Persist landmarks and distance tables to .npz"""
+        np.savez(path, node_ids=self.csr.node_ids, landmarks=self.landmarks,
+                 dist_from=self.dist_from, dist_to=self.dist_to)
+
+    @classmethod
+    def load(cls, csr: CSRGraph, path: str) -> Optional["ALTLandmarks"]:
+        """Load tables written by save(); None if they belong to another graph"""
+        data = np.load(path)
+        if not np.array_equal(data["node_ids"], csr.node_ids):
+            return None
+        return cls(csr, data["landmarks"], data["dist_from"], data["dist_to"])
+
+    @classmethod
+    def load_or_build(cls, csr: CSRGraph, path: Optional[str] = None,
+                      num_landmarks: int = DEFAULT_NUM_LANDMARKS,
+                      show_progress: bool = True) -> "ALTLandmarks":
+        """Load persisted landmark tables matching csr, or build (and persist) them"""
+        if path and Path(path).exists():
+            alt = cls.load(csr, path)
+            if alt is not None:
+                return alt
+        if show_progress:
+            print("   ⏳ Precomputing landmark distances (one-time)...")
+        alt = cls.build(csr, num_landmarks, show_progress=show_progress)
+        if path:
+            alt.save(path)
+        return alt
+
+    # ------------------------------------------------------------------ query
+
+    def heuristic(self, t: int, s: Optional[int] = None,
+                  active: int = ACTIVE_LANDMARKS) -> np.ndarray:
+        """
+        Lower bound on dist(v, t) for every node v (triangle inequality)
+
+        If s is given, only the `active` landmarks with the best bound for
+        (s, t) are used, which keeps per-query work small
+        """
+        d_from_t = self.dist_from[:, t:t + 1]
+        d_to_t = self.dist_to[:, t:t + 1]
+        rows = np.arange(len(self.landmarks))
+        if s is not None and active < len(rows):
+            bound_s = np.maximum(
+                np.nan_to_num(self.dist_from[:, t] - self.dist_from[:, s], nan=0.0, posinf=0.0, neginf=0.0),
+                np.nan_to_num(self.dist_to[:, s] - self.dist_to[:, t], nan=0.0, posinf=0.0, neginf=0.0),
+            )
+            rows = np.argsort(bound_s)[::-1][:active]
+        with np.errstate(invalid="ignore"):
+            # dist(L, t) - dist(L, v) and dist(v, L) - dist(t, L); unusable when infinite
+            a = d_from_t[rows] - self.dist_from[rows]
+            b = self.dist_to[rows] - d_to_t[rows]
+        a[~np.isfinite(a)] = 0.0
+        b[~np.isfinite(b)] = 0.0
+        h = np.maximum(np.maximum(a, b).max(axis=0), 0.0)
+        return h
+
+    def find_shortest_path(self, source: int, target: int) -> Tuple[Optional[List[int]], float]:
+        """
+        Find shortest path with landmark A*
+
+        Args:
+            source: Source OSM node ID
+            target: Target OSM node ID
+
+        Returns:
+            Tuple of (path list of OSM node IDs, total distance in meters)
+            Returns (None, float('inf')) if no path exists
+        """
+        s = self.csr.index_of(source)
+        t = self.csr.index_of(target)
+        if s is None or t is None:
+            return (None, float('inf'))
+        path, distance = self.search(s, t)
+        if path is None:
+            return (None, float('inf'))
+        return (self.csr.to_osm_ids(path), distance)
+
+    def search(self, s: int, t: int) -> Tuple[Optional[List[int]], float]:
+        """A* on dense node indices"""
+        self.settled_nodes = 0
+        if s == t:
+            return ([s], 0.0)
+
+        h = self.heuristic(t, s)
+        indptr, indices, weights = self.csr._fwd
+        dist = {s: 0.0}
+        prev = {s: -1}
+        heap = [(float(h[s]), 0.0, s)]
+        settled = 0
+
+        while heap:
+            _, d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            settled += 1
+            if u == t:
+                break
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                nd = d + weights[k]
+                if nd < dist.get(v, float('inf')):
+                    dist[v] = nd
+                    prev[v] = u
+                    heappush(heap, (nd + float(h[v]), nd, v))
+
+        self.settled_nodes = settled
+        if t not in dist:
+            return (None, float('inf'))
+
+        path = []
+        node = t
+        while node != -1:
+            path.append(node)
+            node = prev[node]
+        path.reverse()
+        return (path, dist[t])
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser(description="Precompute ALT landmark distances for a stored road graph")
+    parser.add_argument("--graph", default=None, help="stored graph name (default: all stored graphs)")
+    parser.add_argument("--landmarks", type=int, default=DEFAULT_NUM_LANDMARKS, help="number of landmarks")
+    parser.add_argument("--store-dir", default=None, help="offline road graph store directory")
+    parser.add_argument("--force", action="store_true", help="recompute even if tables exist")
+    return parser.parse_args()
+
+
+def main(opt):
+    from road_graph_store import RoadGraphStore
+
+    store = RoadGraphStore(opt.store_dir)
+    names = [opt.graph] if opt.graph else [meta["name"] for meta in store.list_graphs()]
+    if not names:
+        print("No stored road networks. Build one with: python road_graph_store.py --build")
+    for name in names:
+        stored = store.load(name)
+        if stored is None:
+            print(f"❌ Stored road network '{name}' not found")
+            continue
+        path = stored.path / ALT_FILENAME
+        if opt.force and path.exists():
+            path.unlink()
+        print(f"{name}: {stored.num_nodes} nodes, {stored.num_edges} edges")
+        ALTLandmarks.load_or_build(CSRGraph.from_store(stored), str(path), opt.landmarks)
+        print(f"✓ Saved to {path}")
+
+
+if __name__ == "__main__":
+    main(parse_opt())
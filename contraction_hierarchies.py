@@ -0,0 +1,359 @@
+"""
+Contraction Hierarchies (CH) for Emergency Routing
+Preprocesses a fixed road network once (node ordering + shortcut edges),
+persists the hierarchy to disk, and answers shortest-path queries with a
+bidirectional upward search plus shortcut unpacking.
+
+Preprocess the stored road graph once:
+    python contraction_hierarchies.py --graph chennai_t_nagar
+
+Then route with EmergencyRouteFinder(routing_engine="ch").
+"""
+
+import argparse
+import time
+from heapq import heappush, heappop
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+CH_FILENAME = "ch.npz"
+
+
+class ContractionHierarchy:
+    """
+    Contraction Hierarchy over a CSRGraph
+
+    up_out[v] holds edges v -> w with rank[w] > rank[v]; up_in[v] holds edges
+    u -> v with rank[u] > rank[v]. Edges created during contraction carry the
+    contracted middle node so routes can be unpacked into original road edges.
+    """
+
+    def __init__(self, node_ids: np.ndarray, rank: np.ndarray,
+                 up_out: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+                 up_in: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]):
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.rank = np.asarray(rank, dtype=np.int32)
+        self.num_nodes = len(self.node_ids)
+        self.node_index: Dict[int, int] = {nid: i for i, nid in enumerate(self.node_ids.tolist())}
+        self.up_out = up_out
+        self.up_in = up_in
+        self.num_shortcuts = int((up_out[3] >= 0).sum() + (up_in[3] >= 0).sum())
+        self.settled_nodes = 0  # Nodes settled by the last query (both directions)
+
+        self._out = tuple(a.tolist() for a in up_out)
+        self._in = tuple(a.tolist() for a in up_in)
+        # (u, w) -> (weight, middle node) for every hierarchy edge, used to unpack shortcuts
+        self._edges: Dict[Tuple[int, int], Tuple[float, int]] = {}
+        indptr, indices, weights, mids = self._out
+        for v in range(self.num_nodes):
+            for k in range(indptr[v], indptr[v + 1]):
+                self._edges[(v, indices[k])] = (weights[k], mids[k])
+        indptr, indices, weights, mids = self._in
+        for v in range(self.num_nodes):
+            for k in range(indptr[v], indptr[v + 1]):
+                self._edges[(indices[k], v)] = (weights[k], mids[k])
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def build(cls, csr: CSRGraph, witness_settle_limit: int = 200,
+              show_progress: bool = True) -> "ContractionHierarchy":
+        """
+        Contract every node of the graph (edge-difference ordering, lazy updates)
+
+        Args:
+            csr: Compiled road network
+            witness_settle_limit: Max nodes settled per witness search; lower is
+                faster to build but may add redundant (still correct) shortcuts
+            show_progress: Print progress messages
+        """
+        n = csr.num_nodes
+        out_edges: List[Dict[int, Tuple[float, int]]] = [dict() for _ in range(n)]
+        in_edges: List[Dict[int, Tuple[float, int]]] = [dict() for _ in range(n)]
+        indptr, indices, weights = csr._fwd
+        for u in range(n):
+            for k in range(indptr[u], indptr[u + 1]):
+                v, w = indices[k], weights[k]
+                if u == v:
+                    continue
+                if v not in out_edges[u] or w < out_edges[u][v][0]:
+                    out_edges[u][v] = (w, -1)
+                    in_edges[v][u] = (w, -1)
+
+        contracted = [False] * n
+        deleted_neighbors = [0] * n
+
+        def witness_distances(source: int, skip: int, max_dist: float) -> Dict[int, float]:
+            dist = {source: 0.0}
+            heap = [(0.0, source)]
+            settled = 0
+            while heap and settled < witness_settle_limit:
+                d, u = heappop(heap)
+                if d > dist[u]:
+                    continue
+                if d > max_dist:
+                    break
+                settled += 1
+                for v, (w, _) in out_edges[u].items():
+                    if v == skip:
+                        continue
+                    nd = d + w
+                    if nd < dist.get(v, float('inf')):
+                        dist[v] = nd
+                        heappush(heap, (nd, v))
+            return dist
+
+        def shortcuts_for(v: int) -> List[Tuple[int, int, float]]:
+            shortcuts = []
+            outs = out_edges[v]
+            for u, (w_in, _) in in_edges[v].items():
+                targets = [(w, w_in + w_out) for w, (w_out, _) in outs.items() if w != u]
+                if not targets:
+                    continue
+                dist = witness_distances(u, v, max(d for _, d in targets))
+                for w, via in targets:
+                    if dist.get(w, float('inf')) > via:
+                        shortcuts.append((u, w, via))
+            return shortcuts
+
+        def priority(v: int) -> int:
+            edge_difference = len(shortcuts_for(v)) - len(in_edges[v]) - len(out_edges[v])
+            return edge_difference + deleted_neighbors[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heap.sort()
+
+        rank = np.zeros(n, dtype=np.int32)
+        up_out: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+        up_in: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+        order = 0
+        t0 = time.time()
+
+        while heap:
+            _, v = heappop(heap)
+            if contracted[v]:
+                continue
+            # Lazy update: re-evaluate, contract only if still the cheapest
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                heappush(heap, (current, v))
+                continue
+
+            for u, w, via in shortcuts_for(v):
+                if w not in out_edges[u] or via < out_edges[u][w][0]:
+                    out_edges[u][w] = (via, v)
+                    in_edges[w][u] = (via, v)
+
+            # Remaining edges of v all lead to higher-ranked nodes
+            for w, (weight, mid) in out_edges[v].items():
+                up_out[v].append((w, weight, mid))
+                del in_edges[w][v]
+                deleted_neighbors[w] += 1
+            for u, (weight, mid) in in_edges[v].items():
+                up_in[v].append((u, weight, mid))
+                del out_edges[u][v]
+                deleted_neighbors[u] += 1
+            out_edges[v] = {}
+            in_edges[v] = {}
+
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            if show_progress and order % 5000 == 0:
+                print(f"   ⏳ Contracted {order}/{n} nodes ({time.time() - t0:.0f}s)")
+
+        hierarchy = cls(csr.node_ids, rank, cls._pack(up_out), cls._pack(up_in))
+        if show_progress:
+            print(f"   ✓ Contraction hierarchy built: {n} nodes, "
+                  f"{hierarchy.num_shortcuts} shortcuts ({time.time() - t0:.1f}s)")
+        return hierarchy
+
+    @staticmethod
+    def _pack(adjacency: List[List[Tuple[int, float, int]]]) -> Tuple[np.ndarray, ...]:
+        counts = np.array([len(edges) for edges in adjacency], dtype=np.int64)
+        indptr = np.zeros(len(adjacency) + 1, dtype=np.int32)
+        np.cumsum(counts, out=indptr[1:])
+        flat = [edge for edges in adjacency for edge in edges]
+        indices = np.array([e[0] for e in flat], dtype=np.int32)
+        weights = np.array([e[1] for e in flat], dtype=np.float32)
+        mids = np.array([e[2] for e in flat], dtype=np.int32)
+        return indptr, indices, weights, mids
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, path: str):
+        """Persist node ordering and hierarchy edges (incl. shortcuts) to .npz"""
+        np.savez(
+            path,
+            node_ids=self.node_ids, rank=self.rank,
+            out_indptr=self.up_out[0], out_indices=self.up_out[1],
+            out_weights=self.up_out[2], out_mids=self.up_out[3],
+            in_indptr=self.up_in[0], in_indices=self.up_in[1],
+            in_weights=self.up_in[2], in_mids=self.up_in[3],
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ContractionHierarchy":
+        """Load a hierarchy written by save()"""
+        data = np.load(path)
+        return cls(
+            data["node_ids"], data["rank"],
+            (data["out_indptr"], data["out_indices"], data["out_weights"], data["out_mids"]),
+            (data["in_indptr"], data["in_indices"], data["in_weights"], data["in_mids"]),
+        )
+
+    @classmethod
+    def load_or_build(cls, csr: CSRGraph, path: Optional[str] = None,
+                      show_progress: bool = True) -> "ContractionHierarchy":
+        """Load a persisted hierarchy matching csr, or build (and persist) it"""
+        if path and Path(path).exists():
+            hierarchy = cls.load(path)
+            if np.array_equal(hierarchy.node_ids, csr.node_ids):
+                return hierarchy
+        if show_progress:
+            print("   ⏳ Preprocessing contraction hierarchy (one-time)...")
+        hierarchy = cls.build(csr, show_progress=show_progress)
+        if path:
+            hierarchy.save(path)
+        return hierarchy
+
+    # ------------------------------------------------------------------ query
+
+    def find_shortest_path(self, source: int, target: int) -> Tuple[Optional[List[int]], float]:
+        """
+        Find shortest path with a CH bidirectional upward search
+
+        Args:
+            source: Source OSM node ID
+            target: Target OSM node ID
+
+        Returns:
+            Tuple of (path list of OSM node IDs, total distance in meters)
+            Returns (None, float('inf')) if no path exists
+        """
+        s = self.node_index.get(source)
+        t = self.node_index.get(target)
+        if s is None or t is None:
+            return (None, float('inf'))
+        path, distance = self.search(s, t)
+        if path is None:
+            return (None, float('inf'))
+        return (self.node_ids[np.asarray(path, dtype=np.int64)].tolist(), distance)
+
+    def search(self, s: int, t: int) -> Tuple[Optional[List[int]], float]:
+        """CH query on dense node indices; returns the unpacked path"""
+        self.settled_nodes = 0
+        if s == t:
+            return ([s], 0.0)
+
+        forward_dist = {s: 0.0}
+        forward_prev = {s: -1}
+        forward_heap = [(0.0, s)]
+        backward_dist = {t: 0.0}
+        backward_prev = {t: -1}
+        backward_heap = [(0.0, t)]
+        best = float('inf')
+        meeting_point = -1
+        settled = 0
+
+        # Each direction relaxes upward edges and uses the opposite upward
+        # edges for stall-on-demand (skip nodes reached sub-optimally from above)
+        searches = (
+            (forward_heap, forward_dist, forward_prev, backward_dist, self._out, self._in),
+            (backward_heap, backward_dist, backward_prev, forward_dist, self._in, self._out),
+        )
+        while forward_heap or backward_heap:
+            for heap, dist, prev, other_dist, relax, stall in searches:
+                # A direction is finished once its frontier cannot improve the best path
+                if not heap or heap[0][0] >= best:
+                    heap.clear()
+                    continue
+                d, u = heappop(heap)
+                if d > dist[u]:
+                    continue
+                settled += 1
+                if u in other_dist and d + other_dist[u] < best:
+                    best = d + other_dist[u]
+                    meeting_point = u
+                s_indptr, s_indices, s_weights, _ = stall
+                if any(dist.get(s_indices[k], float('inf')) + s_weights[k] < d
+                       for k in range(s_indptr[u], s_indptr[u + 1])):
+                    continue
+                indptr, indices, weights, _ = relax
+                for k in range(indptr[u], indptr[u + 1]):
+                    v = indices[k]
+                    nd = d + weights[k]
+                    if nd < dist.get(v, float('inf')):
+                        dist[v] = nd
+                        prev[v] = u
+                        heappush(heap, (nd, v))
+
+        self.settled_nodes = settled
+        if meeting_point < 0:
+            return (None, float('inf'))
+
+        # Hierarchy path: s ... meeting_point ... t
+        up_path = []
+        node = meeting_point
+        while node != -1:
+            up_path.append(node)
+            node = forward_prev[node]
+        up_path.reverse()
+        node = backward_prev[meeting_point]
+        while node != -1:
+            up_path.append(node)
+            node = backward_prev[node]
+
+        path = [up_path[0]]
+        for u, w in zip(up_path, up_path[1:]):
+            self._unpack(u, w, path)
+        return (path, best)
+
+    def _unpack(self, u: int, w: int, path: List[int]):
+        """Append the original road nodes of hierarchy edge u -> w (excluding u)"""
+        stack = [(u, w)]
+        while stack:
+            a, b = stack.pop()
+            mid = self._edges[(a, b)][1]
+            if mid < 0:
+                path.append(b)
+            else:
+                # Process (a, mid) first, so push it last
+                stack.append((mid, b))
+                stack.append((a, mid))
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser(description="Preprocess a stored road graph into a contraction hierarchy")
+    parser.add_argument("--graph", default=None, help="stored graph name (default: all stored graphs)")
+    parser.add_argument("--store-dir", default=None, help="offline road graph store directory")
+    parser.add_argument("--force", action="store_true", help="rebuild even if a hierarchy exists")
+    return parser.parse_args()
+
+
+def main(opt):
+    from road_graph_store import RoadGraphStore
+
+    store = RoadGraphStore(opt.store_dir)
+    names = [opt.graph] if opt.graph else [meta["name"] for meta in store.list_graphs()]
+    if not names:
+        print("No stored road networks. Build one with: python road_graph_store.py --build")
+    for name in names:
+        stored = store.load(name)
+        if stored is None:
+            print(f"❌ Stored road network '{name}' not found")
+            continue
+        path = stored.path / CH_FILENAME
+        if opt.force and path.exists():
+            path.unlink()
+        print(f"{name}: {stored.num_nodes} nodes, {stored.num_edges} edges")
+        ContractionHierarchy.load_or_build(CSRGraph.from_store(stored), str(path))
+        print(f"✓ Saved to {path}")
+
+
+if __name__ == "__main__":
+    main(parse_opt())
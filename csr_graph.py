@@ -0,0 +1,329 @@
+"""
+Compiled (CSR) Road Graph
+Array-backed graph representation for fast shortest-path queries:
+- Forward and reverse adjacency in CSR form (int32 node indices, float32 weights)
+- Mappings between OSM node IDs and dense node indices
+- KD-tree over projected node coordinates for (batch) snapping of points to nodes
+- Road class per arc (for speed_profiles travel-time weights)
+- Bidirectional Dijkstra on top of the arrays, interchangeable with
+  emergency_route_finder.BidirectionalDijkstra (takes/returns OSM node IDs)
+"""
+
+from heapq import heappush, heappop
+from typing import Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from speed_profiles import road_class_code
+
+EARTH_RADIUS_M = 6371008.8
+
+
+class CSRGraph:
+    """
+    Road network compiled into contiguous NumPy arrays
+
+    fwd_indptr[i]:fwd_indptr[i+1] slices fwd_indices / fwd_weights to give the
+    outgoing edges of node i; rev_* holds the same for incoming edges
+    """
+
+    def __init__(self, node_ids: np.ndarray, node_y: np.ndarray, node_x: np.ndarray,
+                 edge_u: np.ndarray, edge_v: np.ndarray, edge_weight: np.ndarray,
+                 edge_class: Optional[np.ndarray] = None):
+        self.node_ids = np.ascontiguousarray(node_ids, dtype=np.int64)
+        self.node_y = np.ascontiguousarray(node_y, dtype=np.float64)
+        self.node_x = np.ascontiguousarray(node_x, dtype=np.float64)
+        self.num_nodes = len(self.node_ids)
+        self.num_edges = len(edge_u)
+        self.node_index: Dict[int, int] = {nid: i for i, nid in enumerate(self.node_ids.tolist())}
+
+        edge_u = np.asarray(edge_u, dtype=np.int32)
+        edge_v = np.asarray(edge_v, dtype=np.int32)
+        edge_weight = np.asarray(edge_weight, dtype=np.float32)
+
+        self.fwd_indptr, self.fwd_indices, self.fwd_weights = self._build_csr(
+            edge_u, edge_v, edge_weight, self.num_nodes)
+        self.rev_indptr, self.rev_indices, self.rev_weights = self._build_csr(
+            edge_v, edge_u, edge_weight, self.num_nodes)
+
+        # Road class of each forward arc, and the forward arc behind each reverse arc
+        fwd_order = np.argsort(edge_u, kind="stable")
+        rev_order = np.argsort(edge_v, kind="stable")
+        edge_class = (np.zeros(self.num_edges, dtype=np.uint8) if edge_class is None
+                      else np.asarray(edge_class, dtype=np.uint8))
+        self.fwd_class = edge_class[fwd_order]
+        fwd_position = np.empty(self.num_edges, dtype=np.int32)
+        fwd_position[fwd_order] = np.arange(self.num_edges, dtype=np.int32)
+        self.rev_to_fwd = fwd_position[rev_order]
+
+        # Python-list views of the arrays for the search loop
+        # (indexing NumPy arrays element-by-element from Python is slow)
+        self._fwd = (self.fwd_indptr.tolist(), self.fwd_indices.tolist(), self.fwd_weights.tolist())
+        self._rev = (self.rev_indptr.tolist(), self.rev_indices.tolist(), self.rev_weights.tolist())
+        self._snap_tree = None  # Built on first snap()
+
+    @staticmethod
+    def _build_csr(src: np.ndarray, dst: np.ndarray, weight: np.ndarray,
+                   num_nodes: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        order = np.argsort(src, kind="stable")
+        counts = np.bincount(src, minlength=num_nodes)
+        indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+        np.cumsum(counts, out=indptr[1:])
+        indices = np.ascontiguousarray(dst[order], dtype=np.int32)
+        weights = np.ascontiguousarray(weight[order], dtype=np.float32)
+        return indptr, indices, weights
+
+    @classmethod
+    def from_networkx(cls, G: nx.MultiDiGraph, weight: str = "length") -> "CSRGraph":
+        """Compile an OSMnx MultiDiGraph (parallel edges are kept as separate arcs)"""
+        node_ids = np.fromiter(G.nodes, dtype=np.int64, count=len(G))
+        index = {nid: i for i, nid in enumerate(node_ids.tolist())}
+        node_y = np.array([G.nodes[n].get("y", G.nodes[n].get("lat", 0.0)) for n in G.nodes],
+                          dtype=np.float64)
+        node_x = np.array([G.nodes[n].get("x", G.nodes[n].get("lon", 0.0)) for n in G.nodes],
+                          dtype=np.float64)
+        num_edges = G.number_of_edges()
+        edge_u = np.empty(num_edges, dtype=np.int32)
+        edge_v = np.empty(num_edges, dtype=np.int32)
+        edge_w = np.empty(num_edges, dtype=np.float32)
+        edge_c = np.empty(num_edges, dtype=np.uint8)
+        for i, (u, v, data) in enumerate(G.edges(data=True)):
+            edge_u[i] = index[u]
+            edge_v[i] = index[v]
+            edge_w[i] = data.get(weight, 1.0)
+            edge_c[i] = road_class_code(data.get("highway"))
+        return cls(node_ids, node_y, node_x, edge_u, edge_v, edge_w, edge_c)
+
+    @classmethod
+    def from_store(cls, stored) -> "CSRGraph":
+        """Compile directly from a road_graph_store.StoredRoadGraph (no networkx)"""
+        return cls(stored.node_ids, stored.node_y, stored.node_x,
+                   stored.edge_u, stored.edge_v, stored.edge_length,
+                   getattr(stored, "edge_class", None))
+
+    def to_scipy(self, reverse: bool = False):
+        """
+        scipy.sparse CSR matrix of the graph (cheapest of any parallel edges),
+        for whole-graph shortest path trees via scipy.sparse.csgraph
+        """
+        from scipy.sparse import csr_matrix
+
+        indptr, indices, weights = ((self.rev_indptr, self.rev_indices, self.rev_weights) if reverse
+                                    else (self.fwd_indptr, self.fwd_indices, self.fwd_weights))
+        rows = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(indptr))
+        # scipy sums duplicate entries, so keep only the cheapest arc per (row, col)
+        order = np.lexsort((weights, indices, rows))
+        rows, cols, data = rows[order], indices[order], weights[order].astype(np.float64)
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        return csr_matrix((data[keep], (rows[keep], cols[keep])),
+                          shape=(self.num_nodes, self.num_nodes))
+
+    def paths_to_target(self, target: int, sources: List[int],
+                        weights: Optional[List[float]] = None) -> Dict[int, Tuple[List[int], float]]:
+        """
+        One-to-many routing: a single reverse Dijkstra from target that stops
+        as soon as every source is settled
+
+        Args:
+            target: Dense index of the common destination (e.g. accident node)
+            sources: Dense indices of the origins (e.g. hospital nodes)
+            weights: Optional arc costs aligned with the reverse arcs
+                     (e.g. TravelTimeWeights.rev(hour)); default: edge lengths
+
+        Returns:
+            {source: (path source -> target as dense indices, cost)} for
+            every reachable source
+        """
+        indptr, indices, lengths = self._rev
+        weights = lengths if weights is None else weights
+        remaining = set(sources)
+        dist = {target: 0.0}
+        next_hop = {target: -1}
+        heap = [(0.0, target)]
+        settled = set()
+
+        while heap and remaining:
+            d, u = heappop(heap)
+            if u in settled:
+                continue
+            settled.add(u)
+            remaining.discard(u)
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                nd = d + weights[k]
+                if nd < dist.get(v, float('inf')):
+                    dist[v] = nd
+                    next_hop[v] = u
+                    heappush(heap, (nd, v))
+
+        routes = {}
+        for source in set(sources):
+            if source not in settled:
+                continue
+            path = []
+            node = source
+            while node != -1:
+                path.append(node)
+                node = next_hop[node]
+            routes[source] = (path, dist[source])
+        return routes
+
+    def _project(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        # Equirectangular projection about the graph's mean latitude (meters);
+        # distortion is negligible over a city-sized graph
+        cos_lat0 = np.cos(np.radians(self._lat0))
+        return np.column_stack((np.radians(lons) * cos_lat0 * EARTH_RADIUS_M,
+                                np.radians(lats) * EARTH_RADIUS_M))
+
+    def snap(self, lats, lons) -> np.ndarray:
+        """
+        Nearest node for each point, in one vectorized KD-tree query
+
+        Args:
+            lats, lons: Point coordinates (scalars or equal-length arrays)
+
+        Returns:
+            Array of dense node indices, one per point
+        """
+        if self._snap_tree is None:
+            from scipy.spatial import cKDTree
+            self._lat0 = float(self.node_y.mean()) if self.num_nodes else 0.0
+            self._snap_tree = cKDTree(self._project(self.node_y, self.node_x))
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        _, idx = self._snap_tree.query(self._project(lats, lons))
+        return np.asarray(idx, dtype=np.int64)
+
+    def nearest_nodes(self, lats, lons) -> List[int]:
+        """Nearest OSM node ID for each point (batch replacement for ox.distance.nearest_nodes)"""
+        return self.node_ids[self.snap(lats, lons)].tolist()
+
+    def path_length(self, path: List[int]) -> float:
+        """Length of a path of dense node indices (shortest of any parallel arcs)"""
+        indptr, indices, weights = self._fwd
+        return sum(
+            min((weights[k] for k in range(indptr[u], indptr[u + 1]) if indices[k] == v),
+                default=float('inf'))
+            for u, v in zip(path[:-1], path[1:])
+        )
+
+    def index_of(self, osm_id: int) -> Optional[int]:
+        """Dense node index for an OSM node ID"""
+        return self.node_index.get(osm_id)
+
+    def osm_id(self, index: int) -> int:
+        """OSM node ID for a dense node index"""
+        return int(self.node_ids[index])
+
+    def to_osm_ids(self, indices: List[int]) -> List[int]:
+        """Convert a path of dense indices back to OSM node IDs"""
+        return self.node_ids[np.asarray(indices, dtype=np.int64)].tolist()
+
+
+class CSRBidirectionalDijkstra:
+    """
+    Bidirectional Dijkstra over a CSRGraph
+    Drop-in replacement for BidirectionalDijkstra: same constructor argument
+    (a networkx graph is compiled on the fly) and same find_shortest_path contract
+    """
+
+    def __init__(self, graph):
+        self.csr = graph if isinstance(graph, CSRGraph) else CSRGraph.from_networkx(graph)
+        self.weight = "length"
+        self.settled_nodes = 0  # Nodes settled by the last query (both directions)
+
+    def find_shortest_path(self, source: int, target: int) -> Tuple[Optional[List[int]], float]:
+        """
+        Find shortest path using bidirectional Dijkstra on the CSR arrays
+
+        Args:
+            source: Source OSM node ID
+            target: Target OSM node ID
+
+        Returns:
+            Tuple of (path list of OSM node IDs, total distance in meters)
+            Returns (None, float('inf')) if no path exists
+        """
+        s = self.csr.index_of(source)
+        t = self.csr.index_of(target)
+        if s is None or t is None:
+            return (None, float('inf'))
+        path, distance = self.search(s, t)
+        if path is None:
+            return (None, float('inf'))
+        return (self.csr.to_osm_ids(path), distance)
+
+    def search(self, s: int, t: int) -> Tuple[Optional[List[int]], float]:
+        """Bidirectional search on dense node indices"""
+        self.settled_nodes = 0
+        if s == t:
+            return ([s], 0.0)
+
+        f_indptr, f_indices, f_weights = self.csr._fwd
+        r_indptr, r_indices, r_weights = self.csr._rev
+
+        forward_dist = {s: 0.0}
+        forward_prev = {s: -1}
+        forward_heap = [(0.0, s)]
+        backward_dist = {t: 0.0}
+        backward_prev = {t: -1}
+        backward_heap = [(0.0, t)]
+
+        best = float('inf')
+        meeting_point = -1
+        settled = 0
+
+        while forward_heap and backward_heap:
+            # Stop once no unexplored path can beat the best one found
+            if forward_heap[0][0] + backward_heap[0][0] >= best:
+                break
+
+            # Expand the side with the smaller frontier
+            if forward_heap[0][0] <= backward_heap[0][0]:
+                d, u = heappop(forward_heap)
+                if d > forward_dist[u]:
+                    continue
+                settled += 1
+                for k in range(f_indptr[u], f_indptr[u + 1]):
+                    v = f_indices[k]
+                    nd = d + f_weights[k]
+                    if nd < forward_dist.get(v, float('inf')):
+                        forward_dist[v] = nd
+                        forward_prev[v] = u
+                        heappush(forward_heap, (nd, v))
+                        if v in backward_dist and nd + backward_dist[v] < best:
+                            best = nd + backward_dist[v]
+                            meeting_point = v
+            else:
+                d, u = heappop(backward_heap)
+                if d > backward_dist[u]:
+                    continue
+                settled += 1
+                for k in range(r_indptr[u], r_indptr[u + 1]):
+                    v = r_indices[k]
+                    nd = d + r_weights[k]
+                    if nd < backward_dist.get(v, float('inf')):
+                        backward_dist[v] = nd
+                        backward_prev[v] = u
+                        heappush(backward_heap, (nd, v))
+                        if v in forward_dist and forward_dist[v] + nd < best:
+                            best = forward_dist[v] + nd
+                            meeting_point = v
+
+        self.settled_nodes = settled
+        if meeting_point < 0:
+            return (None, float('inf'))
+
+        path = []
+        node = meeting_point
+        while node != -1:
+            path.append(node)
+            node = forward_prev[node]
+        path.reverse()
+        node = backward_prev[meeting_point]
+        while node != -1:
+            path.append(node)
+            node = backward_prev[node]
+        return (path, best)
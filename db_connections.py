@@ -0,0 +1,249 @@
+"""
+SQLite Connection Manager
+One persistent connection per thread and database file instead of a
+connect/close per call:
+- WAL journal mode, so readers (detection/dispatch threads) never block on a
+  writer recording outcomes, and a writer never waits for readers
+- synchronous=NORMAL (durable in WAL mode up to the last checkpointed commit
+  on power loss, no fsync per commit), larger page cache, busy timeout instead
+  of immediate "database is locked" errors
+- Each connection keeps a statement cache, so repeated queries are prepared once
+- BackgroundWriter: write-behind queue whose thread commits queued writes in
+  coalesced transactions, with flush() as the durability barrier
+
+Usage:
+    from db_connections import get_connection_manager
+    db = get_connection_manager("hospital_ratings.db")
+    rows = db.connection().execute("SELECT ...").fetchall()
+    with db.transaction() as conn:
+        conn.execute("INSERT ...")
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BUSY_TIMEOUT_S = 5.0
+CACHE_SIZE_KB = 8192
+STATEMENT_CACHE_SIZE = 256
+# Write-behind defaults: longest a write waits to share a commit, writes per transaction
+DEFAULT_FLUSH_INTERVAL_S = 0.5
+MAX_BATCH_WRITES = 1000
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class ConnectionManager:
+    """
+    Thread-local SQLite connections for one database file
+    Connections are opened on first use in each thread and reused afterwards
+    """
+
+    def __init__(self, db_path: str):
+        # Absolute, so threads connecting later open the same file whatever the cwd is by then
+        self.db_path = os.path.abspath(db_path)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened and configured on first use)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_S,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Commit on success, roll back on error"""
+        conn = self.connection()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def close_all(self):
+        """Close every connection (only when no thread uses the database anymore)"""
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    pass  # Connections can only be closed by their own thread on old SQLite builds
+            self._connections.clear()
+        self._local = threading.local()
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str) -> ConnectionManager:
+    """Shared connection manager for a database file (one per process)"""
+    key = os.path.abspath(db_path)
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = ConnectionManager(db_path)
+        return _managers[key]
+
+
+_FLUSH = "flush"
+_STOP = "stop"
+
+
+class BackgroundWriter:
+    """
+    Write-behind queue with one writer thread for a database
+    Callers submit (kind, payload) writes and return immediately; the thread
+    drains the queue and commits the writes in coalesced transactions (one per
+    flush interval or batch). A failed batch is retried write by write, so one
+    bad write does not drop the rest. Pending writes are committed at exit.
+
+    Subclasses implement _apply() and optionally _committed()
+    """
+
+    def __init__(self, db: ConnectionManager, flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+                 max_batch: int = MAX_BATCH_WRITES, name: str = "db-writer"):
+        """
+        Args:
+            db: Connection manager of the database written to
+            flush_interval_s: Longest a write waits for more writes to share its commit
+            max_batch: Maximum writes per transaction
+            name: Writer thread name
+        """
+        self.db = db
+        self.flush_interval_s = flush_interval_s
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[str, object]]" = queue.Queue()
+        self.closed = False
+        self.committed_writes = 0
+        self.failed_writes = 0
+        self.transactions = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        with _background_writers_lock:
+            _background_writers.append(self)
+
+    def submit(self, kind: str, payload: object):
+        """Enqueue a write (never blocks on the database)"""
+        if self.closed:
+            raise RuntimeError("Background writer is closed")
+        self._queue.put((kind, payload))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every write enqueued so far is committed
+
+        Returns:
+            True if the writes were committed within the timeout
+        """
+        if not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Commit pending writes and stop the writer thread"""
+        if self.closed:
+            return
+        self.closed = True
+        done = threading.Event()
+        self._queue.put((_STOP, done))
+        done.wait(timeout)
+
+    def pending(self) -> int:
+        """Writes (and barriers) not yet processed"""
+        return self._queue.qsize()
+
+    def stats(self) -> Dict:
+        """Counters of the writer thread"""
+        return {
+            "pending": self.pending(),
+            "committed_writes": self.committed_writes,
+            "failed_writes": self.failed_writes,
+            "transactions": self.transactions,
+        }
+
+    def _apply(self, cursor: sqlite3.Cursor, writes: List[Tuple[str, object]]) -> object:
+        """Apply writes in order inside the writer's transaction"""
+        raise NotImplementedError
+
+    def _committed(self, result: object):
+        """Called with _apply()'s result after its transaction committed"""
+
+    # ---------------------------------------------------------------- writer
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval_s
+            # Coalesce until the interval ends, a barrier arrives or the batch is full
+            while batch[-1][0] not in (_FLUSH, _STOP) and len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            writes = [op for op in batch if op[0] not in (_FLUSH, _STOP)]
+            if writes:
+                self._commit(writes)
+            for kind, done in batch:
+                if kind in (_FLUSH, _STOP):
+                    done.set()
+            if batch[-1][0] == _STOP:
+                return
+
+    def _commit(self, writes: List[Tuple[str, object]]):
+        """Apply writes in one transaction; on failure, one transaction per write"""
+        try:
+            self._committed(self._transaction(writes))
+        except Exception as e:
+            print(f"⚠️ {self._thread.name}: batch of {len(writes)} writes failed, retrying individually: {e}")
+            for write in writes:
+                try:
+                    self._committed(self._transaction([write]))
+                except Exception as e:
+                    self.failed_writes += 1
+                    print(f"❌ {self._thread.name}: write dropped ({write[0]}): {e}")
+
+    def _transaction(self, writes: List[Tuple[str, object]]) -> object:
+        with self.db.transaction() as conn:
+            result = self._apply(conn.cursor(), writes)
+        self.transactions += 1
+        self.committed_writes += len(writes)
+        return result
+
+
+_background_writers: List[BackgroundWriter] = []
+_background_writers_lock = threading.Lock()
+
+
+@atexit.register
+def close_background_writers():
+    """Commit pending writes of every background writer (runs at interpreter exit)"""
+    with _background_writers_lock:
+        writers = list(_background_writers)
+    for writer in writers:
+        writer.close()
@@ -2,13 +2,20 @@
 Dynamic route update when traffic conditions change.
 Recomputes shortest path and regenerates Leaflet + Google map with updated route.
 Call periodically or when traffic factor changes (e.g. from a future traffic API).
+
+For edge-level updates (a blocked or congested road segment) use
+DynamicRouteSession: routes are repaired incrementally (incremental_routing)
+and the map is regenerated only when the chosen path actually changes.
 """
 
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
+from incremental_routing import IncrementalRouter
+from speed_profiles import hour_of_day
+
 ROOT = Path(__file__).resolve().parent
 
 
@@ -45,9 +52,13 @@ def update_route_dynamically(
     route = response.get("route", {})
     if route and traffic_factor != 1.0:
         response["route"]["traffic_factor"] = traffic_factor
-        response["route"]["eta_minutes_estimated"] = (
-            (route.get("distance_km", 0) / 40.0) * 60 * traffic_factor
-        )  # 40 km/h base speed
+        if "eta_minutes" in route:
+            # Hour-of-day speed profile ETA from the route finder
+            response["route"]["eta_minutes_estimated"] = route["eta_minutes"] * traffic_factor
+        else:
+            response["route"]["eta_minutes_estimated"] = (
+                (route.get("distance_km", 0) / 40.0) * 60 * traffic_factor
+            )  # 40 km/h base speed
 
     return response
 
@@ -62,3 +73,130 @@ def refresh_maps_for_alert(
     return update_route_dynamically(
         accident_lat, accident_lon, accident_id, traffic_factor
     )
+
+
+class DynamicRouteSession:
+    """
+    Active routes for one accident, kept current under edge-level traffic updates
+
+    Routes minimize travel time at the dispatch hour. The selected hospital stays
+    assigned; the other tracked hospitals are repaired alongside it so their ETAs
+    remain available for re-assignment.
+
+    Usage:
+        response = system.handle_accident(lat, lon, accident_id="acc_1")
+        session = DynamicRouteSession(system, response)
+        update = session.update_traffic([{"u": 123, "v": 456, "blocked": True}])
+        if update["route_changed"]:
+            print(update["map_file"])
+    """
+
+    def __init__(self, emergency_system, response: dict,
+                 hospitals: Optional[List[Dict]] = None,
+                 radius_m: int = 5000):
+        """
+        Args:
+            emergency_system: EmergencyResponseSystem that handled the accident
+            response: handle_accident response (selected hospital, dispatch time)
+            hospitals: Extra hospitals to track ({"name", "latitude", "longitude"})
+            radius_m: Minimum road network radius around the accident in meters
+        """
+        self.system = emergency_system
+        self.response = response
+        self.accident_id = response["accident_id"]
+        self.accident_lat = response["accident_location"]["latitude"]
+        self.accident_lon = response["accident_location"]["longitude"]
+        dispatch = response.get("route", {}).get("dispatch_time")
+        self.dispatch_time = datetime.fromisoformat(dispatch) if dispatch else datetime.now()
+        self.map_file = response.get("map_file")
+
+        self.hospitals = [response["selected_hospital"]] + [
+            h for h in (hospitals or []) if h["name"] != response["selected_hospital"]["name"]
+        ]
+
+        finder = emergency_system.route_finder
+        lats = [h["latitude"] for h in self.hospitals]
+        lons = [h["longitude"] for h in self.hospitals]
+        farthest_m = max(finder.haversine_distance(self.accident_lat, self.accident_lon, lat, lon)
+                         for lat, lon in zip(lats, lons)) * 1000
+        self.G = finder.get_road_network(self.accident_lat, self.accident_lon,
+                                         max(radius_m, int(farthest_m) + 1000), show_progress=False)
+        if self.G is None:
+            raise RuntimeError("Road network unavailable for dynamic routing")
+        self.csr = finder.get_compiled_graph(self.G)
+
+        snapped = self.csr.snap([self.accident_lat] + lats, [self.accident_lon] + lons)
+        self.sources = snapped[1:].tolist()
+        weights = finder.get_travel_times(self.G).fwd(hour_of_day(self.dispatch_time))
+        self.router = IncrementalRouter(self.csr, int(snapped[0]), self.sources, weights)
+
+    def route(self, index: int = 0) -> dict:
+        """Current route of a tracked hospital (0 = selected hospital)"""
+        path_idx, seconds = self.router.route(self.sources[index])
+        if path_idx is None:
+            return {"success": False,
+                    "error": "No route found between hospital and accident location"}
+        distance_m = self.csr.path_length(path_idx)
+        path = self.csr.to_osm_ids(path_idx)
+        return {
+            "success": True,
+            "path_nodes": path,
+            "path_coordinates": self.system.route_finder._path_coordinates(self.G, path),
+            "distance_km": distance_m / 1000.0,
+            "distance_m": distance_m,
+            "eta_minutes": seconds / 60.0,
+        }
+
+    def update_traffic(self, edge_updates: List[Dict], generate_map: bool = True) -> dict:
+        """
+        Apply edge-level traffic updates and repair the affected routes
+
+        Args:
+            edge_updates: List of {"u", "v"} OSM node IDs of a road segment (u -> v) with
+                          one of "blocked": True, "factor" (multiple of the normal
+                          travel time; 1.0 clears the update) or "travel_time_s"
+            generate_map: Regenerate the map if the selected route changed
+
+        Returns:
+            Dictionary with the selected route, route_changed, changed hospitals and map path
+        """
+        updates = []
+        for update in edge_updates:
+            u, v = self.csr.index_of(update["u"]), self.csr.index_of(update["v"])
+            if u is None or v is None:
+                continue  # Segment outside this road network cannot affect the routes
+            updates.append((u, v, update.get("travel_time_s"), update.get("factor"),
+                            bool(update.get("blocked", False))))
+        changed = self.router.update_edges(updates) if updates else set()
+
+        route = self.route()
+        route_changed = self.sources[0] in changed
+        if route_changed and generate_map and route["success"]:
+            self.map_file = self.map_file or os.path.join(
+                "emergency_maps", f"emergency_route_map_{self.accident_id}.html")
+            os.makedirs(os.path.dirname(self.map_file) or ".", exist_ok=True)
+            hospital = self.hospitals[0]
+            self.system.map_generator.generate_map_html(
+                accident_lat=self.accident_lat,
+                accident_lon=self.accident_lon,
+                hospital_name=hospital["name"],
+                hospital_lat=hospital["latitude"],
+                hospital_lon=hospital["longitude"],
+                output_file=self.map_file,
+                route_info=route,
+            )
+
+        return {
+            "success": route["success"],
+            "accident_id": self.accident_id,
+            "route_changed": route_changed,
+            "changed_hospitals": [h["name"] for h, source in zip(self.hospitals, self.sources)
+                                  if source in changed],
+            "route": {
+                "distance_km": route.get("distance_km"),
+                "eta_minutes": route.get("eta_minutes"),
+                "route_coordinates": route.get("path_coordinates", []),
+            },
+            "map_file": self.map_file,
+            "updated_at": datetime.now().isoformat(),
+        }
@@ -20,13 +20,15 @@ class EmergencyMapGenerator:
     
     def __init__(self, places_dataset_path: str = "places_dataset.csv"):
         self.route_finder = EmergencyRouteFinder(places_dataset_path)
-        self.rating_system = HospitalRatingSystem()
+        # Map generation runs on the dispatch path: registrations go to the background writer
+        self.rating_system = HospitalRatingSystem(write_behind=True)
     
     def generate_map_html(self, accident_lat: float, accident_lon: float,
                          hospital_name: str = None,
                          hospital_lat: float = None,
                          hospital_lon: float = None,
-                         output_file: str = None) -> str:
+                         output_file: str = None,
+                         route_info: Optional[Dict] = None) -> str:
         """
         Generate interactive HTML map with route visualization
         
@@ -35,6 +37,8 @@ class EmergencyMapGenerator:
             hospital_name: Name of hospital (will look up if coordinates not provided)
             hospital_lat, hospital_lon: Hospital coordinates (optional if name provided)
             output_file: Optional output file path
+            route_info: Precomputed route (find_optimal_hospital_route format);
+                        skips routing, e.g. for a route repaired after a traffic update
             
         Returns:
             HTML content as string
@@ -69,19 +73,19 @@ class EmergencyMapGenerator:
         if hospital_name:
             rating_info = self.rating_system.get_hospital_rating(hospital_name)
             if not rating_info:
-                # Register hospital if not in system
+                # Register hospital if not in system (queued; the map shows the default rating)
                 self.rating_system.register_hospital(
                     hospital_name, 
                     latitude=hospital_lat,
                     longitude=hospital_lon
                 )
-                rating_info = self.rating_system.get_hospital_rating(hospital_name)
         
         # Find optimal route
-        route_info = self.route_finder.find_optimal_hospital_route(
-            accident_lat, accident_lon,
-            hospital_lat, hospital_lon
-        )
+        if route_info is None:
+            route_info = self.route_finder.find_optimal_hospital_route(
+                accident_lat, accident_lon,
+                hospital_lat, hospital_lon
+            )
         
         if not route_info.get("success"):
             route_coordinates = []
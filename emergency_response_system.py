@@ -5,11 +5,29 @@ Works with existing alert system
 """
 
 import os
-import json
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
 from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from scipy.optimize import linear_sum_assignment
 from emergency_route_finder import EmergencyRouteFinder
 from hospital_rating_system import HospitalRatingSystem
 from emergency_map_generator import EmergencyMapGenerator
+from facility_index import get_facility_index
+from incident_store import get_incident_store
+from response_sink import JsonFileSink, MultiSink, ResponseSink, get_jsonl_sink
+
+# Reference speed for turning an ETA into a distance-equivalent route score
+# (keeps the proximity/rating balance of the scoring formula)
+SCORE_REFERENCE_KMH = 40.0
+# Free ICU/bed slots assumed for hospitals without a reported capacity (batch dispatch)
+DEFAULT_HOSPITAL_CAPACITY = 2
+# Assignment cost of a hospital that has no route to the accident
+UNREACHABLE_COST = 1e9
+# Worker threads for handle_accident_async (routing, ratings, contacts, maps, reports)
+ASYNC_WORKERS = 4
 
 class EmergencyResponseSystem:
     """
@@ -17,7 +35,9 @@ class EmergencyResponseSystem:
     Handles accident detection response with route finding and hospital selection
     """
     
-    def __init__(self, places_dataset_path: str = "places_dataset.csv", use_t_nagar_24x7: bool = False):
+    def __init__(self, places_dataset_path: str = "places_dataset.csv", use_t_nagar_24x7: bool = False,
+                 routing_engine: str = "csr", response_sink: Optional[ResponseSink] = None,
+                 save_json_reports: bool = False):
         self.use_t_nagar_24x7 = use_t_nagar_24x7
         if use_t_nagar_24x7:
             import os
@@ -25,14 +45,28 @@ class EmergencyResponseSystem:
             self.dataset_path = t_nagar_path if os.path.exists(t_nagar_path) else places_dataset_path
         else:
             self.dataset_path = places_dataset_path
-        self.route_finder = EmergencyRouteFinder(self.dataset_path)
-        self.rating_system = HospitalRatingSystem()
+        # 'csr' keeps the precomputed hospital distance tables in play (array lookups per alert);
+        # ETAs still use the hour-of-day speed profiles. 'td' routes by travel time instead
+        self.route_finder = EmergencyRouteFinder(self.dataset_path, routing_engine=routing_engine)
+        # Registrations/outcomes are committed by a background writer, never on the alert path
+        self.rating_system = HospitalRatingSystem(write_behind=True)
         self.map_generator = EmergencyMapGenerator(self.dataset_path)
+        # Dispatches are logged to accident_logs.db (queued, committed by a writer thread)
+        self.incident_store = get_incident_store()
+        # Responses are appended to the JSONL log (api_data/emergency_responses.jsonl);
+        # the pretty-printed per-alert JSON files are optional
+        self.response_sink = response_sink or get_jsonl_sink()
+        if save_json_reports:
+            self.response_sink = MultiSink([self.response_sink, JsonFileSink()])
+        # Async pipeline: worker threads and maps/reports still being written
+        self._executor = None
+        self._background = set()
     
     def handle_accident(self, accident_lat: float, accident_lon: float,
                        accident_id: str = None,
                        generate_map: bool = True,
-                       fast_mode: bool = False) -> dict:
+                       fast_mode: bool = False,
+                       dispatch_time: datetime = None) -> dict:
         """
         Handle accident detection - find best hospital and generate route
         
@@ -40,23 +74,26 @@ class EmergencyResponseSystem:
             accident_lat, accident_lon: Accident location
             accident_id: Unique identifier for this accident
             generate_map: Whether to generate HTML map
+            dispatch_time: Dispatch timestamp for ETAs (default: now)
             
         Returns:
             Dictionary with response information
         """
         if not accident_id:
             accident_id = f"accident_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        dispatch_time = dispatch_time or datetime.now()
         
         # Find nearest hospitals with routes (24x7 only when using T. Nagar dataset)
         print("Finding nearest hospitals...")
         hospitals = self.route_finder.find_nearest_hospitals_with_routes(
             accident_lat, accident_lon, num_hospitals=5, fast_mode=fast_mode,
-            emergency_24x7_only=self.use_t_nagar_24x7
+            emergency_24x7_only=self.use_t_nagar_24x7,
+            depart_time=dispatch_time
         )
         
-        # Sort by route distance and filter successful routes
+        # Sort by ETA at dispatch time and filter successful routes
         hospitals_with_routes = [h for h in hospitals if h.get("route_success")]
-        hospitals_with_routes.sort(key=lambda x: x.get("route_distance_km", float('inf')))
+        hospitals_with_routes.sort(key=lambda x: x.get("eta_minutes", float('inf')))
         
         if not hospitals_with_routes:
             return {
@@ -65,42 +102,187 @@ class EmergencyResponseSystem:
                 "accident_id": accident_id
             }
         
-        # Select best hospital based on route distance and rating
+        # Ratings of all candidates in one bulk read (cached in-process)
+        rating_infos = self._get_or_register_ratings(hospitals_with_routes[:5])
+        best_hospital = self._select_best_hospital(hospitals_with_routes, rating_infos)
+        
+        # Generate map if requested
+        map_path = None
+        if generate_map:
+            map_path = self._generate_map(accident_lat, accident_lon, accident_id, best_hospital)
+        
+        response = self._build_response(accident_id, accident_lat, accident_lon, best_hospital,
+                                        hospitals_with_routes, dispatch_time, map_path, rating_infos)
+        report_path = self.response_sink.write(response, accident_id)
+        self.incident_store.record_dispatch(response, report_path=report_path)
+        return response
+    
+    async def handle_accident_async(self, accident_lat: float, accident_lon: float,
+                                    accident_id: str = None,
+                                    generate_map: bool = True,
+                                    generate_google_map: bool = False,
+                                    fast_mode: bool = False,
+                                    dispatch_time: datetime = None) -> dict:
+        """
+        Async variant of handle_accident that returns as soon as the dispatch
+        decision is made
+        
+        Routing, rating fetches for the candidate hospitals and the emergency
+        call contacts run concurrently in worker threads. Maps and the response
+        log entry are finished in the background (see wait_for_background); the
+        returned map_file paths exist once that work completes.
+        
+        Args:
+            accident_lat, accident_lon: Accident location
+            accident_id: Unique identifier for this accident
+            generate_map: Whether to generate the Leaflet HTML map
+            generate_google_map: Whether to also generate the Google map
+            dispatch_time: Dispatch timestamp for ETAs (default: now)
+            
+        Returns:
+            Dictionary with response information (as handle_accident) plus
+            "emergency_contacts" for the automated call
+        """
+        if not accident_id:
+            accident_id = f"accident_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        dispatch_time = dispatch_time or datetime.now()
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        
+        routing = loop.run_in_executor(executor, functools.partial(
+            self.route_finder.find_nearest_hospitals_with_routes,
+            accident_lat, accident_lon, num_hospitals=5, fast_mode=fast_mode,
+            show_progress=False, emergency_24x7_only=self.use_t_nagar_24x7,
+            depart_time=dispatch_time
+        ))
+        ratings = loop.run_in_executor(executor, self._prefetch_ratings, accident_lat, accident_lon)
+        contacts = loop.run_in_executor(executor, self.get_emergency_call_contacts,
+                                        accident_lat, accident_lon)
+        hospitals, rating_infos = await asyncio.gather(routing, ratings)
+        
+        hospitals_with_routes = [h for h in hospitals if h.get("route_success")]
+        hospitals_with_routes.sort(key=lambda x: x.get("eta_minutes", float('inf')))
+        if not hospitals_with_routes:
+            return {
+                "success": False,
+                "error": "No hospitals with valid routes found",
+                "accident_id": accident_id,
+                "emergency_contacts": await contacts
+            }
+        
+        best_hospital = self._select_best_hospital(hospitals_with_routes, rating_infos)
+        map_path = (os.path.join("emergency_maps", f"emergency_route_map_{accident_id}.html")
+                    if generate_map else None)
+        response = self._build_response(accident_id, accident_lat, accident_lon, best_hospital,
+                                        hospitals_with_routes, dispatch_time, map_path, rating_infos)
+        if generate_google_map:
+            response["google_map_file"] = os.path.join("emergency_maps", f"google_route_{accident_id}.html")
+        
+        # The log gets the same shape as handle_accident (contacts are only returned)
+        future = executor.submit(self._finish_in_background, dict(response), generate_map, generate_google_map)
+        self._background.add(future)
+        future.add_done_callback(self._background.discard)
+        
+        response["emergency_contacts"] = await contacts
+        return response
+    
+    def wait_for_background(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until maps and reports of async dispatches are written
+        
+        Returns:
+            True if all background work finished within the timeout
+        """
+        _, pending = futures_wait(list(self._background), timeout=timeout)
+        return not pending
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Worker threads for the async pipeline (created on first use)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS,
+                                                thread_name_prefix="emergency")
+        return self._executor
+    
+    def _prefetch_ratings(self, accident_lat: float, accident_lon: float) -> Dict[str, dict]:
+        """Ratings of the hospitals routing will consider (same nearest-5 candidates)"""
+        candidates = get_facility_index(self.dataset_path).nearest(
+            accident_lat, accident_lon, k=5, category="Hospital",
+            emergency_24x7_only=self.use_t_nagar_24x7, max_radius_km=20.0)
+        return self._get_or_register_ratings([
+            {
+                "hospital_name": row.get("Name", "Unknown"),
+                "hospital_address": row.get("Address", ""),
+                "hospital_phone": row.get("Phone", ""),
+                "hospital_lat": row["Latitude"],
+                "hospital_lon": row["Longitude"],
+            }
+            for _, row in candidates.iterrows()
+        ])
+    
+    def _finish_in_background(self, response: dict, generate_map: bool, generate_google_map: bool):
+        """Maps, response log entry and incident record of an async dispatch (runs in a worker thread)"""
+        location, hospital = response["accident_location"], response["selected_hospital"]
+        route = response["route"]
+        try:
+            if generate_map:
+                os.makedirs("emergency_maps", exist_ok=True)
+                # Draw the dispatched route instead of routing again
+                self.map_generator.generate_map_html(
+                    accident_lat=location["latitude"],
+                    accident_lon=location["longitude"],
+                    hospital_name=hospital["name"],
+                    hospital_lat=hospital["latitude"],
+                    hospital_lon=hospital["longitude"],
+                    output_file=response["map_file"],
+                    route_info={"success": True,
+                                "path_coordinates": route["route_coordinates"],
+                                "distance_km": route["distance_km"]}
+                )
+            if generate_google_map:
+                from google_emergency_map_generator import GoogleEmergencyMapGenerator
+                os.makedirs("emergency_maps", exist_ok=True)
+                GoogleEmergencyMapGenerator().generate_map_html(
+                    accident_lat=location["latitude"],
+                    accident_lon=location["longitude"],
+                    hospital_name=hospital["name"],
+                    hospital_lat=hospital["latitude"],
+                    hospital_lon=hospital["longitude"],
+                    route_coordinates=route["route_coordinates"],
+                    route_distance_km=route["distance_km"],
+                    star_rating=hospital["star_rating"],
+                    output_file=response["google_map_file"],
+                )
+        except Exception as e:
+            print(f"Background map error ({response['accident_id']}): {e}")
+        report_path = self.response_sink.write(response, response["accident_id"])
+        self.incident_store.record_dispatch(response, report_path=report_path)
+    
+    def _select_best_hospital(self, hospitals_with_routes: List[dict],
+                              rating_infos: Optional[Dict[str, dict]] = None) -> dict:
+        """
+        Select best hospital based on route ETA and rating
+        
+        Args:
+            hospitals_with_routes: Routed candidates sorted by ETA
+            rating_infos: Prefetched ratings by hospital name (fetched here if missing)
+        """
+        # A name present with None is a new hospital whose registration is queued
+        missing = [h for h in hospitals_with_routes[:5]
+                   if h["hospital_name"] not in (rating_infos or {})]
+        if missing:
+            rating_infos = {**(rating_infos or {}), **self._get_or_register_ratings(missing)}
         best_hospital = None
         best_score = -1
         
         for hospital in hospitals_with_routes[:5]:  # Consider top 5 for best assignment
-            hospital_name = hospital["hospital_name"]
-            rating_info = self.rating_system.get_hospital_rating(hospital_name)
-            
-            # Register hospital if not in system
-            if not rating_info:
-                self.rating_system.register_hospital(
-                    hospital_name,
-                    address=hospital.get("hospital_address", ""),
-                    latitude=hospital["hospital_lat"],
-                    longitude=hospital["hospital_lon"],
-                    phone=hospital.get("hospital_phone", "")
-                )
-                rating_info = self.rating_system.get_hospital_rating(hospital_name)
+            rating_info = rating_infos.get(hospital["hospital_name"])
             
-            # Score: proximity (route distance), rating, ICU/emergency readiness when available
-            route_score = 1.0 / (hospital["route_distance_km"] + 0.1)
-            rating_score = rating_info["current_rating"] / 5.0 if rating_info else 0.5
-            # Optional: boost for ICU / response readiness from dataset (if present)
-            extra = 0.0
-            if self.use_t_nagar_24x7:
-                try:
-                    import pandas as pd
-                    tdf = pd.read_csv(self.dataset_path)
-                    row = tdf[tdf["Name"].astype(str).str.contains(hospital_name, case=False, na=False)]
-                    if not row.empty:
-                        if str(row.iloc[0].get("ICU_availability", "")).upper() == "Y":
-                            extra += 0.1
-                        if str(row.iloc[0].get("Response_readiness", "")).lower() == "high":
-                            extra += 0.05
-                except Exception:
-                    pass
+            # Score: proximity (ETA as distance at the reference speed), rating,
+            # ICU/emergency readiness when available
+            eta_km = hospital["eta_minutes"] / 60.0 * SCORE_REFERENCE_KMH
+            route_score = 1.0 / (eta_km + 0.1)
+            rating_score = self._dispatch_rating(rating_info) / 5.0 if rating_info else 0.5
+            extra = self._facility_bonus(hospital["hospital_name"])
             combined_score = route_score * 0.55 + rating_score * 0.35 + extra
             
             if combined_score > best_score:
@@ -110,25 +292,43 @@ class EmergencyResponseSystem:
         
         if not best_hospital:
             best_hospital = hospitals_with_routes[0]
+        return best_hospital
+    
+    def _generate_map(self, accident_lat: float, accident_lon: float,
+                      accident_id: str, best_hospital: dict) -> str:
+        """Leaflet map of the selected hospital's route; returns the map path"""
+        map_filename = f"emergency_route_map_{accident_id}.html"
+        map_path = os.path.join("emergency_maps", map_filename)
+        os.makedirs("emergency_maps", exist_ok=True)
         
-        # Generate map if requested
-        map_path = None
-        if generate_map:
-            map_filename = f"emergency_route_map_{accident_id}.html"
-            map_path = os.path.join("emergency_maps", map_filename)
-            os.makedirs("emergency_maps", exist_ok=True)
-            
-            self.map_generator.generate_map_html(
-                accident_lat=accident_lat,
-                accident_lon=accident_lon,
-                hospital_name=best_hospital["hospital_name"],
-                hospital_lat=best_hospital["hospital_lat"],
-                hospital_lon=best_hospital["hospital_lon"],
-                output_file=map_path
-            )
+        self.map_generator.generate_map_html(
+            accident_lat=accident_lat,
+            accident_lon=accident_lon,
+            hospital_name=best_hospital["hospital_name"],
+            hospital_lat=best_hospital["hospital_lat"],
+            hospital_lon=best_hospital["hospital_lon"],
+            output_file=map_path,
+            route_info=self._route_info(best_hospital)
+        )
+        return map_path
+    
+    @staticmethod
+    def _route_info(hospital: dict) -> dict:
+        """Dispatched route in the map generator's format (drawn instead of routing again)"""
+        return {"success": True,
+                "path_coordinates": hospital.get("route_coordinates", []),
+                "distance_km": hospital["route_distance_km"]}
+    
+    def _build_response(self, accident_id: str, accident_lat: float, accident_lon: float,
+                        best_hospital: dict, hospitals_with_routes: List[dict],
+                        dispatch_time: datetime, map_path: Optional[str],
+                        rating_infos: Optional[Dict[str, dict]] = None) -> dict:
+        """Response dictionary for a dispatched accident"""
+        def alternative_rating(name):
+            info = (rating_infos or {}).get(name) or self.rating_system.get_hospital_rating(name)
+            return info["current_rating"] if info else 2.5
         
-        # Prepare response
-        response = {
+        return {
             "success": True,
             "accident_id": accident_id,
             "accident_location": {
@@ -147,6 +347,8 @@ class EmergencyResponseSystem:
             "route": {
                 "distance_km": best_hospital["route_distance_km"],
                 "distance_m": best_hospital["route_distance_m"],
+                "eta_minutes": best_hospital["eta_minutes"],
+                "dispatch_time": dispatch_time.isoformat(),
                 "route_coordinates": best_hospital.get("route_coordinates", [])
             },
             "map_file": map_path,
@@ -154,23 +356,206 @@ class EmergencyResponseSystem:
                 {
                     "name": h["hospital_name"],
                     "distance_km": h["route_distance_km"],
-                    "rating": self.rating_system.get_hospital_rating(h["hospital_name"])["current_rating"] 
-                             if self.rating_system.get_hospital_rating(h["hospital_name"]) else 2.5
+                    "eta_minutes": h["eta_minutes"],
+                    "rating": alternative_rating(h["hospital_name"])
                 }
                 for h in hospitals_with_routes[1:3]  # Next 2 alternatives
             ],
             "timestamp": datetime.now().isoformat()
         }
+    
+    def _get_or_register_ratings(self, hospitals: List[dict]) -> Dict[str, dict]:
+        """
+        Rating info of candidate hospitals by name (one bulk read), registering unseen ones
+        Registrations are queued in write-behind mode; unseen hospitals then score
+        with the default rating instead of waiting for the commit
+        """
+        rating_infos = self.rating_system.get_ratings([h["hospital_name"] for h in hospitals])
+        unseen = [h for h in hospitals if rating_infos.get(h["hospital_name"]) is None]
+        for hospital in unseen:
+            self.rating_system.register_hospital(
+                hospital["hospital_name"],
+                address=hospital.get("hospital_address", ""),
+                latitude=hospital["hospital_lat"],
+                longitude=hospital["hospital_lon"],
+                phone=hospital.get("hospital_phone", "")
+            )
+        if unseen and not self.rating_system.writer:
+            rating_infos.update(self.rating_system.get_ratings([h["hospital_name"] for h in unseen]))
+        return rating_infos
+    
+    @staticmethod
+    def _dispatch_rating(rating_info: dict) -> float:
+        """Rating used for scoring: precomputed recent (30-day) rating, all-time as fallback"""
+        return rating_info.get("recent_rating", rating_info["current_rating"])
+    
+    def _facility_bonus(self, hospital_name: str) -> float:
+        """Score boost for ICU / response readiness from the dataset (T. Nagar only)"""
+        extra = 0.0
+        if self.use_t_nagar_24x7:
+            facility = get_facility_index(self.dataset_path).lookup(hospital_name)
+            if facility:
+                if facility["icu_availability"]:
+                    extra += 0.1
+                if facility["response_readiness"] == "high":
+                    extra += 0.05
+        return extra
+    
+    def handle_accidents_batch(self, accidents: List[dict],
+                               capacities: Optional[Dict[str, int]] = None,
+                               default_capacity: int = DEFAULT_HOSPITAL_CAPACITY,
+                               candidates_per_incident: int = 5,
+                               fast_mode: bool = False,
+                               generate_map: bool = False,
+                               dispatch_time: datetime = None) -> dict:
+        """
+        Dispatch several simultaneous accidents in one pass
         
-        # Save response to JSON file
-        report_filename = f"emergency_response_{accident_id}.json"
-        report_path = os.path.join("api_data", report_filename)
-        os.makedirs("api_data", exist_ok=True)
+        Builds an incidents x hospitals score matrix (one one-to-many routing
+        search per incident, ratings fetched once per hospital) and solves the
+        assignment with the Hungarian algorithm. Each hospital contributes
+        as many columns as it has free capacity, so no hospital is sent more
+        patients than it can take while capacity remains elsewhere.
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(response, f, indent=2, ensure_ascii=False)
+        Args:
+            accidents: List of {"latitude", "longitude", optional "accident_id"}
+            capacities: Free ICU/bed slots per hospital name
+            default_capacity: Slots for hospitals missing from capacities
+            candidates_per_incident: Nearest hospitals routed per accident
+            fast_mode: Straight-line ETAs instead of road routing
+            generate_map: Whether to generate an HTML map per accident
+            dispatch_time: Dispatch timestamp for ETAs (default: now)
+            
+        Returns:
+            Dictionary with one handle_accident-style response per accident
+            (same order) and the number of patients assigned per hospital
+        """
+        dispatch_time = dispatch_time or datetime.now()
+        capacities = capacities or {}
+        batch_id = f"batch_{dispatch_time.strftime('%Y%m%d_%H%M%S')}"
+        accident_ids = [a.get("accident_id") or f"{batch_id}_{i}" for i, a in enumerate(accidents)]
         
-        return response
+        # Candidate hospitals and routes per accident; columns are unique hospitals
+        print(f"Routing {len(accidents)} accidents...")
+        candidates = []
+        columns: Dict[str, int] = {}
+        hospitals: List[dict] = []
+        for accident in accidents:
+            found = self.route_finder.find_nearest_hospitals_with_routes(
+                accident["latitude"], accident["longitude"],
+                num_hospitals=candidates_per_incident, fast_mode=fast_mode,
+                show_progress=False, emergency_24x7_only=self.use_t_nagar_24x7,
+                depart_time=dispatch_time
+            )
+            found = [h for h in found if h.get("route_success")]
+            for h in found:
+                if h["hospital_name"] not in columns:
+                    columns[h["hospital_name"]] = len(hospitals)
+                    hospitals.append(h)
+            candidates.append({h["hospital_name"]: h for h in found})
+        
+        # Vectorized scores (same formula as handle_accident); -inf = no route
+        eta = np.full((len(accidents), len(hospitals)), np.inf)
+        for i, found in enumerate(candidates):
+            for name, h in found.items():
+                eta[i, columns[name]] = h["eta_minutes"]
+        ratings_by_name = self._get_or_register_ratings(hospitals)
+        rating_infos = [ratings_by_name.get(h["hospital_name"]) for h in hospitals]
+        rating_score = np.array([self._dispatch_rating(r) / 5.0 if r else 0.5 for r in rating_infos])
+        extra = np.array([self._facility_bonus(h["hospital_name"]) for h in hospitals])
+        route_score = 1.0 / (eta / 60.0 * SCORE_REFERENCE_KMH + 0.1)
+        score = np.where(np.isfinite(eta), route_score * 0.55 + rating_score * 0.35 + extra, -np.inf)
+        
+        # One column per free slot; unreachable pairs get a prohibitive cost
+        slots = np.array([max(0, int(capacities.get(h["hospital_name"], default_capacity)))
+                          for h in hospitals], dtype=int)
+        slot_hospital = np.repeat(np.arange(len(hospitals)), slots)
+        assignment = np.full(len(accidents), -1)
+        over_capacity = np.zeros(len(accidents), dtype=bool)
+        if len(slot_hospital):
+            cost = np.where(np.isfinite(score), -score, UNREACHABLE_COST)[:, slot_hospital]
+            rows, cols = linear_sum_assignment(cost)
+            feasible = cost[rows, cols] < UNREACHABLE_COST
+            assignment[rows[feasible]] = slot_hospital[cols[feasible]]
+        # Accidents left without a slot still go to their best reachable hospital
+        for i in np.flatnonzero(assignment < 0):
+            if len(hospitals) and np.isfinite(score[i]).any():
+                assignment[i] = int(np.argmax(score[i]))
+                over_capacity[i] = True
+        
+        responses = []
+        for i, accident in enumerate(accidents):
+            lat, lon = accident["latitude"], accident["longitude"]
+            if assignment[i] < 0:
+                responses.append({
+                    "success": False,
+                    "error": "No hospitals with valid routes found",
+                    "accident_id": accident_ids[i]
+                })
+                continue
+            col = int(assignment[i])
+            hospital = candidates[i][hospitals[col]["hospital_name"]]
+            rating_info = rating_infos[col]
+            
+            map_path = None
+            if generate_map:
+                map_path = os.path.join("emergency_maps", f"emergency_route_map_{accident_ids[i]}.html")
+                os.makedirs("emergency_maps", exist_ok=True)
+                self.map_generator.generate_map_html(
+                    accident_lat=lat,
+                    accident_lon=lon,
+                    hospital_name=hospital["hospital_name"],
+                    hospital_lat=hospital["hospital_lat"],
+                    hospital_lon=hospital["hospital_lon"],
+                    output_file=map_path,
+                    route_info=self._route_info(hospital)
+                )
+            
+            responses.append({
+                "success": True,
+                "accident_id": accident_ids[i],
+                "accident_location": {"latitude": lat, "longitude": lon},
+                "selected_hospital": {
+                    "name": hospital["hospital_name"],
+                    "address": hospital.get("hospital_address", ""),
+                    "phone": hospital.get("hospital_phone", ""),
+                    "latitude": hospital["hospital_lat"],
+                    "longitude": hospital["hospital_lon"],
+                    "star_rating": rating_info["current_rating"] if rating_info else 2.5,
+                    "total_cases": rating_info.get("total_cases", 0) if rating_info else 0
+                },
+                "route": {
+                    "distance_km": hospital["route_distance_km"],
+                    "distance_m": hospital["route_distance_m"],
+                    "eta_minutes": hospital["eta_minutes"],
+                    "dispatch_time": dispatch_time.isoformat(),
+                    "route_coordinates": hospital.get("route_coordinates", [])
+                },
+                "over_capacity": bool(over_capacity[i]),
+                "map_file": map_path,
+                "timestamp": datetime.now().isoformat()
+            })
+        
+        assigned = {}
+        for response in responses:
+            if response["success"]:
+                name = response["selected_hospital"]["name"]
+                assigned[name] = assigned.get(name, 0) + 1
+        batch = {
+            "success": any(r["success"] for r in responses),
+            "batch_id": batch_id,
+            "dispatch_time": dispatch_time.isoformat(),
+            "responses": responses,
+            "hospital_load": assigned,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        report_path = self.response_sink.write(batch, batch_id)
+        for response in responses:
+            if response["success"]:
+                self.incident_store.record_dispatch(response, report_path=report_path)
+        
+        return batch
     
     def record_treatment_outcome(self, accident_id: str, hospital_name: str,
                                 patient_outcome: str,
@@ -188,7 +573,7 @@ class EmergencyResponseSystem:
             response_time_minutes: Time taken to respond and treat
             treatment_notes: Optional notes
         """
-        return self.rating_system.record_case_outcome(
+        queued = self.rating_system.record_case_outcome(
             hospital_name=hospital_name,
             accident_id=accident_id,
             patient_outcome=patient_outcome,
@@ -196,6 +581,8 @@ class EmergencyResponseSystem:
             response_time_minutes=response_time_minutes,
             treatment_notes=treatment_notes
         )
+        # Off the alert path: wait for the commit so the updated rating is readable
+        return queued and self.rating_system.flush()
     
     def get_hospital_performance_report(self, hospital_name: str) -> dict:
         """Get detailed performance report for a hospital"""
@@ -2,31 +2,52 @@
 Intelligent Emergency Route Finding System
 Uses Bidirectional Dijkstra algorithm for high-performance route computation
 Replaces older path-finding algorithms with modern, optimized approach
+Correctness and speed versus plain Dijkstra are checked by route_benchmarks.py
 """
 
-import pandas as pd
-import math
-import osmnx as ox
 import networkx as nx
 from heapq import heappush, heappop
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Union
+from datetime import datetime
 import json
+from road_graph_store import RoadGraphStore, StoredRoadGraph
+from csr_graph import CSRGraph, CSRBidirectionalDijkstra
+from contraction_hierarchies import ContractionHierarchy, CH_FILENAME
+from alt_landmarks import ALTLandmarks, ALT_FILENAME
+from hospital_distance_tables import HospitalDistanceTables, tables_filename
+from speed_profiles import SpeedProfiles, TimeDependentRouter, TravelTimeWeights, hour_of_day
+from facility_index import get_facility_index, haversine_km
+from road_tile_cache import DEFAULT_MEMORY_BUDGET_MB, RoadTileCache, StitchedRoadGraph
+from route_cache import DEFAULT_TTL_S, RouteCache
+
+# Road networks the finder routes on: array-backed stored / stitched graphs
+# (a networkx graph is still accepted and compiled on first use)
+RoadNetwork = Union[StoredRoadGraph, StitchedRoadGraph, nx.MultiDiGraph]
 
 class BidirectionalDijkstra:
     """
     Bidirectional Dijkstra algorithm implementation
-    Faster than standard Dijkstra and A* for road network routing
+    Settles far fewer nodes than standard Dijkstra on road networks
+    (measured by route_benchmarks.py)
     Searches from both source and destination simultaneously
     """
     
     def __init__(self, graph: nx.MultiDiGraph):
         self.graph = graph
         self.weight = 'length'
+        self.settled_nodes = 0  # Nodes settled by the last query (both directions)
+    
+    def _edge_weight(self, edge_data: Dict) -> float:
+        """Weight of the cheapest parallel edge between two nodes"""
+        return min(data.get(self.weight, 1.0) for data in edge_data.values())
     
     def find_shortest_path(self, source: int, target: int) -> Tuple[Optional[List[int]], float]:
         """
         Find shortest path using bidirectional Dijkstra
         
+        The search stops only once the smallest forward and backward frontier
+        distances together reach the best path found, which proves optimality
+        
         Args:
             source: Source node ID
             target: Target node ID
@@ -35,6 +56,7 @@ class BidirectionalDijkstra:
             Tuple of (path list, total distance in meters)
             Returns (None, float('inf')) if no path exists
         """
+        self.settled_nodes = 0
         if source == target:
             return ([source], 0.0)
         
@@ -54,29 +76,24 @@ class BidirectionalDijkstra:
         meeting_point = None
         min_total_dist = float('inf')
         
-        # Iterate until one heap is empty
-        while forward_heap or backward_heap:
-            # Forward step
-            if forward_heap:
+        while forward_heap and backward_heap:
+            # Stopping rule: no path through unsettled nodes can be shorter
+            if forward_heap[0][0] + backward_heap[0][0] >= min_total_dist:
+                break
+            
+            # Expand the direction with the smaller frontier
+            if forward_heap[0][0] <= backward_heap[0][0]:
                 dist_f, node_f = heappop(forward_heap)
                 if node_f in forward_visited:
                     continue
                 forward_visited.add(node_f)
                 
-                # Check if we've found a shorter path through backward search
-                if node_f in backward_dist:
-                    total_dist = dist_f + backward_dist[node_f]
-                    if total_dist < min_total_dist:
-                        min_total_dist = total_dist
-                        meeting_point = node_f
-                
-                # Expand forward
-                for neighbor, edge_data in self.graph[node_f].items():
+                # Expand forward (outgoing edges)
+                for neighbor, edge_data in self.graph.succ[node_f].items():
                     if neighbor in forward_visited:
                         continue
                     
-                    edge_weight = edge_data[0].get(self.weight, 1.0)
-                    new_dist = dist_f + edge_weight
+                    new_dist = dist_f + self._edge_weight(edge_data)
                     
                     if neighbor not in forward_dist or new_dist < forward_dist[neighbor]:
                         forward_dist[neighbor] = new_dist
@@ -85,33 +102,22 @@ class BidirectionalDijkstra:
                     
                     # Check meeting point during expansion
                     if neighbor in backward_dist:
-                        total_dist = new_dist + backward_dist[neighbor]
+                        total_dist = forward_dist[neighbor] + backward_dist[neighbor]
                         if total_dist < min_total_dist:
                             min_total_dist = total_dist
                             meeting_point = neighbor
-            
-            # Backward step
-            if backward_heap:
+            else:
                 dist_b, node_b = heappop(backward_heap)
                 if node_b in backward_visited:
                     continue
                 backward_visited.add(node_b)
                 
-                # Check if we've found a shorter path through forward search
-                if node_b in forward_dist:
-                    total_dist = dist_b + forward_dist[node_b]
-                    if total_dist < min_total_dist:
-                        min_total_dist = total_dist
-                        meeting_point = node_b
-                
                 # Expand backward (incoming edges)
-                for predecessor in self.graph.predecessors(node_b):
+                for predecessor, edge_data in self.graph.pred[node_b].items():
                     if predecessor in backward_visited:
                         continue
                     
-                    edge_data = self.graph[predecessor][node_b]
-                    edge_weight = edge_data[0].get(self.weight, 1.0)
-                    new_dist = dist_b + edge_weight
+                    new_dist = dist_b + self._edge_weight(edge_data)
                     
                     if predecessor not in backward_dist or new_dist < backward_dist[predecessor]:
                         backward_dist[predecessor] = new_dist
@@ -120,35 +126,32 @@ class BidirectionalDijkstra:
                     
                     # Check meeting point during expansion
                     if predecessor in forward_dist:
-                        total_dist = new_dist + forward_dist[predecessor]
+                        total_dist = forward_dist[predecessor] + backward_dist[predecessor]
                         if total_dist < min_total_dist:
                             min_total_dist = total_dist
                             meeting_point = predecessor
-            
-            # Early termination: if we've found a path and both searches have explored enough
-            if meeting_point and min_total_dist < float('inf'):
-                # Reconstruct path
-                path = []
-                
-                # Forward path
-                node = meeting_point
-                forward_path = []
-                while node is not None:
-                    forward_path.append(node)
-                    node = forward_prev.get(node)
-                forward_path.reverse()
-                
-                # Backward path (without meeting point to avoid duplication)
-                node = backward_prev.get(meeting_point)
-                backward_path = []
-                while node is not None:
-                    backward_path.append(node)
-                    node = backward_prev.get(node)
-                
-                path = forward_path + backward_path
-                return (path, min_total_dist)
         
-        return (None, float('inf'))
+        self.settled_nodes = len(forward_visited) + len(backward_visited)
+        
+        if meeting_point is None:
+            return (None, float('inf'))
+        
+        # Forward path
+        node = meeting_point
+        forward_path = []
+        while node is not None:
+            forward_path.append(node)
+            node = forward_prev.get(node)
+        forward_path.reverse()
+        
+        # Backward path (without meeting point to avoid duplication)
+        node = backward_prev.get(meeting_point)
+        backward_path = []
+        while node is not None:
+            backward_path.append(node)
+            node = backward_prev.get(node)
+        
+        return (forward_path + backward_path, min_total_dist)
 
 
 class EmergencyRouteFinder:
@@ -157,70 +160,174 @@ class EmergencyRouteFinder:
     Finds optimal routes between hospitals and accident locations
     """
     
-    def __init__(self, places_dataset_path: str = "places_dataset.csv"):
+    def __init__(self, places_dataset_path: str = "places_dataset.csv",
+                 graph_store_dir: Optional[str] = None,
+                 routing_engine: str = "csr",
+                 tile_memory_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+                 speed_profiles: Optional[SpeedProfiles] = None,
+                 route_cache_ttl_s: float = DEFAULT_TTL_S):
+        """
+        Args:
+            places_dataset_path: CSV with hospitals (Category, Name, Latitude, Longitude, ...)
+            graph_store_dir: Offline road graph store directory (default: road_graphs/)
+            routing_engine: 'csr' (array-backed search), 'alt' (landmark A*),
+                            'ch' (contraction hierarchies), 'networkx' (adjacency-dict search)
+                            or 'td' (fastest path for the dispatch time, hour-of-day speeds);
+                            'alt' and 'ch' are preprocessed once per graph
+            tile_memory_mb: Memory budget for cached road network tiles
+            speed_profiles: Hour-of-day speeds per road class (used for ETAs and 'td')
+            route_cache_ttl_s: Seconds routes between snapped nodes are reused (0 disables)
+        """
         self.dataset_path = places_dataset_path
-        self.graph_cache = {}
+        self.routing_engine = routing_engine
+        # Compiled CSR graphs, keyed by id() of the cached road network
+        self.compiled_graphs: Dict[int, CSRGraph] = {}
+        # Stored graph behind each cached road network (where preprocessing is persisted)
+        self.graph_sources: Dict[int, object] = {}
+        # Reusable routing engines, keyed by (engine name, id() of the graph)
+        self.route_engines: Dict[Tuple[str, int], object] = {}
+        # Travel-time weights (edges x 24 hours), keyed by id() of the graph
+        self.speed_profiles = speed_profiles or SpeedProfiles()
+        self.travel_times: Dict[int, TravelTimeWeights] = {}
+        # Precomputed hospital distance tables for this dataset: (stored graph, tables),
+        # loaded lazily (built with: python hospital_distance_tables.py)
+        self._hospital_tables = None
+        # Offline road networks (built once with: python road_graph_store.py --build)
+        self.graph_store = RoadGraphStore(graph_store_dir)
+        # Grid tiles for areas outside the stored graphs (downloaded once, LRU in memory)
+        self.tile_cache = RoadTileCache(self.graph_store, memory_budget_mb=tile_memory_mb,
+                                        on_evict_graph=self._forget_graph)
+        # Routes between snapped nodes, so repeated alerts from a camera skip routing
+        self.route_cache = RouteCache(ttl_s=route_cache_ttl_s)
         
     def haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate great circle distance between two points in km"""
-        R = 6371  # Earth radius in km
-        d_lat = math.radians(lat2 - lat1)
-        d_lon = math.radians(lon2 - lon1)
-        a = (math.sin(d_lat/2)**2 + 
-             math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-             math.sin(d_lon/2)**2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
+        return haversine_km(lat1, lon1, lat2, lon2)
     
     def get_road_network(self, center_lat: float, center_lon: float, 
-                        radius_m: int = 5000, show_progress: bool = True) -> nx.MultiDiGraph:
+                        radius_m: int = 5000, show_progress: bool = True) -> Optional[RoadNetwork]:
         """
         Get or create road network graph for the area
-        Uses caching to avoid repeated API calls
+        Offline graph store first; otherwise the area is stitched from cached
+        grid tiles, so overlapping requests reuse tiles instead of downloading
         
         Args:
             center_lat, center_lon: Center point coordinates
             radius_m: Search radius in meters (smaller = faster, default 5000m)
             show_progress: Show progress messages
+            
+        Returns:
+            Array-backed road network (StoredRoadGraph or StitchedRoadGraph; call
+            .to_networkx() for an OSMnx MultiDiGraph), None if unavailable
         """
-        cache_key = f"{center_lat:.4f}_{center_lon:.4f}_{radius_m}"
-        if cache_key in self.graph_cache:
+        stored = self.graph_store.find_covering(center_lat, center_lon, radius_m)
+        if stored is not None:
+            # Compile straight from the memory-mapped arrays (no networkx graph)
+            if id(stored) not in self.compiled_graphs:
+                self.compiled_graphs[id(stored)] = CSRGraph.from_store(stored)
+            self.graph_sources[id(stored)] = stored
             if show_progress:
-                print("   ✓ Using cached road network")
-            return self.graph_cache[cache_key]
-        
-        if show_progress:
-            print(f"   ⏳ Downloading road network (radius: {radius_m/1000:.1f}km)...")
-            print("      This may take 10-30 seconds on first run...")
+                print(f"   ✓ Using offline road network '{stored.name}' "
+                      f"({stored.num_nodes} nodes, {stored.num_edges} edges)")
+            return stored
         
         try:
-            # Configure OSMnx to be faster
-            ox.settings.timeout = 60  # 60 second timeout
-            ox.settings.memory = 2000000000  # 2GB memory limit
-            
-            G = ox.graph_from_point(
-                (center_lat, center_lon), 
-                dist=radius_m, 
-                network_type="drive",
-                simplify=True  # Simplify graph for faster processing
-            )
-            
+            graph = self.tile_cache.graph_for(center_lat, center_lon, radius_m, show_progress)
+            if id(graph) not in self.compiled_graphs:
+                self.compiled_graphs[id(graph)] = CSRGraph.from_store(graph)
             if show_progress:
-                print(f"   ✓ Road network downloaded ({len(G.nodes)} nodes, {len(G.edges)} edges)")
-            
-            # OSMnx stores coordinates as lat/lon in 'y'/'x' attributes
-            self.graph_cache[cache_key] = G
-            return G
+                print(f"   ✓ Road network from {len(graph.tile_keys)} tiles "
+                      f"({graph.num_nodes} nodes, {graph.num_edges} edges)")
+            return graph
         except Exception as e:
             if show_progress:
                 print(f"   ❌ Error fetching road network: {e}")
                 print("   💡 Tip: Check internet connection or try 'fast_mode=True'")
+                print("   💡 Tip: Build an offline network once with 'python road_graph_store.py --build'")
             return None
     
+    def _forget_graph(self, G: StitchedRoadGraph):
+        """Drop compiled graphs and engines of a stitched graph evicted from the tile cache"""
+        self.compiled_graphs.pop(id(G), None)
+        self.graph_sources.pop(id(G), None)
+        self.travel_times.pop(id(G), None)
+        self.route_cache.invalidate(id(G))
+        for key in [key for key in self.route_engines if key[1] == id(G)]:
+            del self.route_engines[key]
+    
+    def set_speed_profiles(self, speed_profiles: SpeedProfiles):
+        """Replace the hour-of-day speeds; travel-time weights and cached routes are rebuilt"""
+        self.speed_profiles = speed_profiles
+        self.travel_times.clear()
+        for key in [key for key in self.route_engines if key[0] == "td"]:
+            del self.route_engines[key]
+        self.route_cache.invalidate()
+    
+    def _weight_profile(self, depart_time: Optional[datetime] = None) -> tuple:
+        """Edge weights a route is optimized for (part of the route cache key)"""
+        if self.routing_engine == "td":
+            return ("td", hour_of_day(depart_time or datetime.now()))
+        # Every other engine minimizes length, whatever the dispatch time
+        return ("length",)
+    
+    def get_compiled_graph(self, G: RoadNetwork) -> CSRGraph:
+        """Get (or build once) the CSR representation of a cached road network"""
+        csr = self.compiled_graphs.get(id(G))
+        if csr is None:
+            csr = CSRGraph.from_networkx(G) if isinstance(G, nx.Graph) else CSRGraph.from_store(G)
+            self.compiled_graphs[id(G)] = csr
+        return csr
+    
+    def get_travel_times(self, G: RoadNetwork) -> TravelTimeWeights:
+        """Hour-of-day travel-time weights of a cached road network (built once per graph)"""
+        weights = self.travel_times.get(id(G))
+        if weights is None:
+            weights = TravelTimeWeights(self.get_compiled_graph(G), self.speed_profiles)
+            self.travel_times[id(G)] = weights
+        return weights
+    
+    def _eta_minutes(self, G: RoadNetwork, path: List[int],
+                     depart_time: Optional[datetime] = None) -> float:
+        """Travel time in minutes along a path of OSM node IDs, leaving at depart_time"""
+        csr = self.get_compiled_graph(G)
+        seconds = self.get_travel_times(G).path_seconds(
+            [csr.index_of(node) for node in path], depart_time or datetime.now())
+        return seconds / 60.0
+    
+    def _straight_line_eta_minutes(self, distance_km: float,
+                                   depart_time: Optional[datetime] = None) -> float:
+        """ETA estimate for fast mode: straight-line distance at the unclassified-road speed"""
+        speed_kmh = self.speed_profiles.speed_kmh(0, hour_of_day(depart_time or datetime.now()))
+        return distance_km / speed_kmh * 60.0
+    
+    def get_route_engine(self, G: RoadNetwork):
+        """Routing engine for a cached road network (built once per graph and engine)"""
+        key = (self.routing_engine, id(G))
+        engine = self.route_engines.get(key)
+        if engine is None:
+            if self.routing_engine == "networkx":
+                engine = BidirectionalDijkstra(G if isinstance(G, nx.Graph) else G.to_networkx())
+            elif self.routing_engine == "ch":
+                # Persist the hierarchy next to the stored graph so it is built only once
+                stored = self.graph_sources.get(id(G))
+                ch_path = str(stored.path / CH_FILENAME) if stored is not None else None
+                engine = ContractionHierarchy.load_or_build(self.get_compiled_graph(G), ch_path)
+            elif self.routing_engine == "td":
+                engine = TimeDependentRouter(self.get_compiled_graph(G), self.get_travel_times(G))
+            elif self.routing_engine == "alt":
+                stored = self.graph_sources.get(id(G))
+                alt_path = str(stored.path / ALT_FILENAME) if stored is not None else None
+                engine = ALTLandmarks.load_or_build(self.get_compiled_graph(G), alt_path)
+            else:
+                engine = CSRBidirectionalDijkstra(self.get_compiled_graph(G))
+            self.route_engines[key] = engine
+        return engine
+    
     def find_optimal_hospital_route(self, accident_lat: float, accident_lon: float,
                                    hospital_lat: float, hospital_lon: float,
                                    radius_m: int = 5000, fast_mode: bool = False,
-                                   show_progress: bool = True) -> Dict:
+                                   show_progress: bool = True,
+                                   depart_time: Optional[datetime] = None) -> Dict:
         """
         Find optimal route from hospital to accident location
         
@@ -228,6 +335,7 @@ class EmergencyRouteFinder:
             accident_lat, accident_lon: Accident location coordinates
             hospital_lat, hospital_lon: Hospital location coordinates
             radius_m: Search radius in meters
+            depart_time: Dispatch time for ETA / time-dependent routing (default: now)
             
         Returns:
             Dictionary containing route information including path, distance, coordinates
@@ -252,6 +360,7 @@ class EmergencyRouteFinder:
                 "path_coordinates": path_coordinates,
                 "distance_km": straight_distance,
                 "distance_m": straight_distance * 1000,
+                "eta_minutes": self._straight_line_eta_minutes(straight_distance, depart_time),
                 "hospital_coords": {"lat": hospital_lat, "lon": hospital_lon},
                 "accident_coords": {"lat": accident_lat, "lon": accident_lon},
                 "fast_mode": True,
@@ -270,22 +379,32 @@ class EmergencyRouteFinder:
                 print("   ⚠️  Falling back to fast mode (straight-line distance)")
             return self.find_optimal_hospital_route(
                 accident_lat, accident_lon, hospital_lat, hospital_lon,
-                fast_mode=True, show_progress=show_progress
+                fast_mode=True, show_progress=show_progress, depart_time=depart_time
             )
         
-        # Find nearest nodes
+        # Find nearest nodes (one query on the graph's cached KD-tree)
         try:
-            accident_node = ox.distance.nearest_nodes(G, X=accident_lon, Y=accident_lat)
-            hospital_node = ox.distance.nearest_nodes(G, X=hospital_lon, Y=hospital_lat)
+            accident_node, hospital_node = self.get_compiled_graph(G).nearest_nodes(
+                [accident_lat, hospital_lat], [accident_lon, hospital_lon])
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Could not find nodes: {e}"
             }
         
-        # Use Bidirectional Dijkstra to find optimal path
-        route_finder = BidirectionalDijkstra(G)
-        path, distance_m = route_finder.find_shortest_path(hospital_node, accident_node)
+        # Repeated alerts reuse the cached route between the same snapped nodes
+        cache_key = (id(G), accident_node, hospital_node, self._weight_profile(depart_time))
+        cached = self.route_cache.get(cache_key)
+        if cached is not None:
+            path, distance_m = cached
+        else:
+            # Use Bidirectional Dijkstra (or CH / ALT / time-dependent, per routing_engine) to find optimal path
+            route_finder = self.get_route_engine(G)
+            if self.routing_engine == "td":
+                path, distance_m = route_finder.find_shortest_path(hospital_node, accident_node, depart_time)
+            else:
+                path, distance_m = route_finder.find_shortest_path(hospital_node, accident_node)
+            self.route_cache.put(cache_key, (path, distance_m))
         
         if path is None:
             return {
@@ -293,37 +412,210 @@ class EmergencyRouteFinder:
                 "error": "No route found between hospital and accident location"
             }
         
-        # Extract coordinates for the path
-        # OSMnx stores coordinates as 'y' (latitude) and 'x' (longitude) in unprojected graphs
-        path_coordinates = []
-        for node in path:
-            node_data = G.nodes[node]
-            # Get lat/lon from node data (y=lat, x=lon in OSMnx convention)
-            lat = node_data.get('y', node_data.get('lat', 0))
-            lon = node_data.get('x', node_data.get('lon', 0))
-            path_coordinates.append({
-                "lat": float(lat),
-                "lon": float(lon)
-            })
-        
         return {
             "success": True,
             "path_nodes": path,
-            "path_coordinates": path_coordinates,
+            "path_coordinates": self._path_coordinates(G, path),
             "distance_km": distance_m / 1000.0,
             "distance_m": distance_m,
+            "eta_minutes": self._eta_minutes(G, path, depart_time),
             "hospital_coords": {"lat": hospital_lat, "lon": hospital_lon},
             "accident_coords": {"lat": accident_lat, "lon": accident_lon},
             "hospital_node": hospital_node,
             "accident_node": accident_node
         }
     
+    def _path_coordinates(self, G: RoadNetwork, path: List[int]) -> List[Dict]:
+        """Extract lat/lon coordinates for a path of OSM node IDs"""
+        # Read from the compiled node arrays (y=lat, x=lon in OSMnx convention)
+        csr = self.get_compiled_graph(G)
+        indices = [csr.index_of(node) for node in path]
+        return [
+            {"lat": lat, "lon": lon}
+            for lat, lon in zip(csr.node_y[indices].tolist(), csr.node_x[indices].tolist())
+        ]
+    
+    def find_routes_to_accident(self, accident_lat: float, accident_lon: float,
+                                hospitals: List[Tuple[float, float]],
+                                radius_m: int = 5000,
+                                show_progress: bool = True,
+                                depart_time: Optional[datetime] = None) -> List[Dict]:
+        """
+        Find optimal routes from several hospitals to one accident location
+        with a single one-to-many search (reverse Dijkstra from the accident
+        that stops once every hospital node is settled)
+        With routing_engine='td' each hospital gets its own time-dependent search
+        instead (speeds change along the way, so one reverse search cannot be
+        exact), giving the same routes as find_optimal_hospital_route
+        
+        Args:
+            accident_lat, accident_lon: Accident location coordinates
+            hospitals: List of (lat, lon) hospital coordinates
+            radius_m: Minimum road network radius around the accident in meters
+            depart_time: Dispatch time for ETAs (default: now); with routing_engine='td'
+                         routes minimize travel time leaving at the dispatch time
+            
+        Returns:
+            List of route dictionaries (same format as find_optimal_hospital_route),
+            in the same order as hospitals
+        """
+        if not hospitals:
+            return []
+        
+        depart_time = depart_time or datetime.now()
+        
+        # Precomputed hospital tables (shortest by length) turn routing into array lookups
+        if self.routing_engine != "td":
+            routes = self._routes_from_tables(accident_lat, accident_lon, hospitals,
+                                              show_progress, depart_time)
+            if routes is not None:
+                return routes
+        
+        # One road network around the accident that reaches every hospital
+        lats, lons = zip(*hospitals)
+        farthest_m = float(haversine_km(accident_lat, accident_lon, lats, lons).max()) * 1000
+        G = self.get_road_network(accident_lat, accident_lon,
+                                  max(radius_m, int(farthest_m) + 1000), show_progress)
+        if G is None:
+            if show_progress:
+                print("   ⚠️  Falling back to fast mode (straight-line distance)")
+            return [
+                self.find_optimal_hospital_route(accident_lat, accident_lon, lat, lon,
+                                                 fast_mode=True, show_progress=False,
+                                                 depart_time=depart_time)
+                for lat, lon in hospitals
+            ]
+        
+        # Snap accident and all hospitals in one vectorized query
+        csr = self.get_compiled_graph(G)
+        snapped = csr.snap([accident_lat] + [lat for lat, _ in hospitals],
+                           [accident_lon] + [lon for _, lon in hospitals])
+        target, sources = int(snapped[0]), snapped[1:].tolist()
+        accident_node, hospital_nodes = csr.osm_id(target), csr.to_osm_ids(sources)
+        
+        # Cached routes first; one search covers the remaining hospitals
+        profile = self._weight_profile(depart_time)
+        routes = {}
+        missing = []
+        for source, hospital_node in zip(sources, hospital_nodes):
+            cached = self.route_cache.get((id(G), accident_node, hospital_node, profile))
+            if cached is None:
+                missing.append(source)
+            elif cached[0] is not None:
+                routes[source] = cached
+        if missing and self.routing_engine == "td":
+            # Fastest routes leaving at the dispatch time (same search as single routes)
+            router = self.get_route_engine(G)
+            for source in missing:
+                route = router.find_shortest_path(csr.osm_id(source), accident_node, depart_time)
+                if route[0] is not None:
+                    routes[source] = route
+                self.route_cache.put((id(G), accident_node, csr.osm_id(source), profile), route)
+        elif missing:
+            found = csr.paths_to_target(target, missing)
+            for source in missing:
+                # Cached as (OSM path, length in meters) like single routes
+                route = (None, float('inf'))
+                if source in found:
+                    path_idx, distance_m = found[source]
+                    route = (csr.to_osm_ids(path_idx), distance_m)
+                    routes[source] = route
+                self.route_cache.put((id(G), accident_node, csr.osm_id(source), profile), route)
+        
+        results = []
+        for (hospital_lat, hospital_lon), hospital_node, source in zip(hospitals, hospital_nodes, sources):
+            if source not in routes:
+                results.append({
+                    "success": False,
+                    "error": "No route found between hospital and accident location"
+                })
+                continue
+            path, distance_m = routes[source]
+            results.append({
+                "success": True,
+                "path_nodes": path,
+                "path_coordinates": self._path_coordinates(G, path),
+                "distance_km": distance_m / 1000.0,
+                "distance_m": distance_m,
+                "eta_minutes": self._eta_minutes(G, path, depart_time),
+                "hospital_coords": {"lat": hospital_lat, "lon": hospital_lon},
+                "accident_coords": {"lat": accident_lat, "lon": accident_lon},
+                "hospital_node": hospital_node,
+                "accident_node": accident_node
+            })
+        return results
+    
+    def get_hospital_tables(self) -> Optional[Tuple[object, HospitalDistanceTables]]:
+        """Stored graph and precomputed distance tables for this dataset, if built"""
+        if self._hospital_tables is None:
+            self._hospital_tables = (None, None)
+            filename = tables_filename(self.dataset_path)
+            for meta in self.graph_store.list_graphs():
+                stored = self.graph_store.load(meta["name"])
+                if stored is None or not (stored.path / filename).exists():
+                    continue
+                tables = HospitalDistanceTables.load(str(stored.path / filename))
+                if not tables.matches(stored):
+                    # Built before the graph was rebuilt: node indices no longer line up
+                    print(f"   ⚠️  Hospital distance tables for '{stored.name}' are stale; "
+                          f"rebuild with 'python hospital_distance_tables.py'")
+                    continue
+                self._hospital_tables = (stored, tables)
+                break
+        stored, tables = self._hospital_tables
+        return (stored, tables) if tables is not None else None
+    
+    def _routes_from_tables(self, accident_lat: float, accident_lon: float,
+                            hospitals: List[Tuple[float, float]],
+                            show_progress: bool = True,
+                            depart_time: Optional[datetime] = None) -> Optional[List[Dict]]:
+        """Routes read from precomputed hospital tables; None if tables do not apply"""
+        found = self.get_hospital_tables()
+        if found is None:
+            return None
+        stored, tables = found
+        rows = [tables.row_for(lat, lon) for lat, lon in hospitals]
+        if any(row is None for row in rows) or not stored.covers(accident_lat, accident_lon, 0):
+            return None
+        
+        self.graph_sources[id(stored)] = stored
+        accident_node = self.get_compiled_graph(stored).nearest_nodes(accident_lat, accident_lon)[0]
+        accident_idx = tables.node_index.get(accident_node)
+        if accident_idx is None:
+            return None
+        if show_progress:
+            print(f"   ✓ Using precomputed hospital distance tables ('{stored.name}')")
+        
+        results = []
+        for (hospital_lat, hospital_lon), row in zip(hospitals, rows):
+            path, distance_m = tables.route(row, accident_idx)
+            if path is None:
+                results.append({
+                    "success": False,
+                    "error": "No route found between hospital and accident location"
+                })
+                continue
+            results.append({
+                "success": True,
+                "path_nodes": path,
+                "path_coordinates": self._path_coordinates(stored, path),
+                "distance_km": distance_m / 1000.0,
+                "distance_m": distance_m,
+                "eta_minutes": self._eta_minutes(stored, path, depart_time),
+                "hospital_coords": {"lat": hospital_lat, "lon": hospital_lon},
+                "accident_coords": {"lat": accident_lat, "lon": accident_lon},
+                "hospital_node": path[0],
+                "accident_node": accident_node
+            })
+        return results
+    
     def find_nearest_hospitals_with_routes(self, accident_lat: float, accident_lon: float,
                                            num_hospitals: int = 3,
                                            max_radius_km: float = 20.0,
                                            fast_mode: bool = False,
                                            show_progress: bool = True,
-                                           emergency_24x7_only: bool = False) -> List[Dict]:
+                                           emergency_24x7_only: bool = False,
+                                           depart_time: Optional[datetime] = None) -> List[Dict]:
         """
         Find nearest hospitals with optimal routes to accident location.
         When emergency_24x7_only=True, only include hospitals with Emergency_24x7=Y if column exists.
@@ -333,46 +625,46 @@ class EmergencyRouteFinder:
             num_hospitals: Number of hospitals to return
             max_radius_km: Maximum search radius in km
             emergency_24x7_only: If True, filter to 24x7 emergency hospitals only
+            depart_time: Dispatch time for ETAs (default: now)
             
         Returns:
             List of dictionaries with hospital info and route details
         """
         try:
-            df = pd.read_csv(self.dataset_path)
+            index = get_facility_index(self.dataset_path)
         except Exception as e:
             return [{"error": f"Could not load dataset: {e}"}]
         
-        # Filter hospitals
-        hospitals_df = df[df["Category"].str.contains("Hospital", case=False, na=False)].copy()
-        if emergency_24x7_only and "Emergency_24x7" in hospitals_df.columns:
-            hospitals_df = hospitals_df[
-                hospitals_df["Emergency_24x7"].astype(str).str.upper().str.strip().isin(("Y", "YES", "1"))
-            ]
-        
-        if hospitals_df.empty:
+        if index.count("Hospital", emergency_24x7_only) == 0:
             return [{"error": "No hospitals found in dataset"}]
         
-        # Calculate straight-line distances
-        hospitals_df["Distance_km"] = hospitals_df.apply(
-            lambda row: self.haversine_distance(
-                accident_lat, accident_lon,
-                row["Latitude"], row["Longitude"]
-            ),
-            axis=1
-        )
+        # Nearest hospitals within max radius (spatial index, straight-line distance)
+        hospitals_df = index.nearest(accident_lat, accident_lon, k=num_hospitals,
+                                     category="Hospital",
+                                     emergency_24x7_only=emergency_24x7_only,
+                                     max_radius_km=max_radius_km)
         
-        # Filter by max radius
-        hospitals_df = hospitals_df[hospitals_df["Distance_km"] <= max_radius_km]
-        hospitals_df = hospitals_df.sort_values(by="Distance_km").head(num_hospitals)
-        
-        results = []
-        for _, hospital in hospitals_df.iterrows():
-            route_info = self.find_optimal_hospital_route(
+        # Road mode: route every candidate hospital in one one-to-many search
+        if not fast_mode:
+            route_infos = self.find_routes_to_accident(
                 accident_lat, accident_lon,
-                hospital["Latitude"], hospital["Longitude"],
-                fast_mode=fast_mode,
-                show_progress=show_progress and (len(results) == 0)  # Only show progress for first
+                list(zip(hospitals_df["Latitude"], hospitals_df["Longitude"])),
+                show_progress=show_progress,
+                depart_time=depart_time
             )
+        
+        results = []
+        for i, (_, hospital) in enumerate(hospitals_df.iterrows()):
+            if fast_mode:
+                route_info = self.find_optimal_hospital_route(
+                    accident_lat, accident_lon,
+                    hospital["Latitude"], hospital["Longitude"],
+                    fast_mode=True,
+                    show_progress=show_progress and (len(results) == 0),  # Only show progress for first
+                    depart_time=depart_time
+                )
+            else:
+                route_info = route_infos[i]
             
             if route_info["success"]:
                 results.append({
@@ -384,6 +676,7 @@ class EmergencyRouteFinder:
                     "straight_distance_km": hospital["Distance_km"],
                     "route_distance_km": route_info["distance_km"],
                     "route_distance_m": route_info["distance_m"],
+                    "eta_minutes": route_info["eta_minutes"],
                     "route_coordinates": route_info["path_coordinates"],
                     "route_success": True
                 })
@@ -0,0 +1,329 @@
+"""
+Facility Spatial Index and Registry
+Loads facility datasets (hospitals, police, pharmacies, ...) once into typed
+NumPy columns with a name -> row hash index, and answers nearest-facility
+queries with a KD-tree instead of a row-wise haversine over the whole DataFrame.
+
+The registry keeps one index per dataset and reloads it only when a source
+file's mtime changes, so the alert path does no CSV parsing.
+
+Points are indexed as unit vectors on the sphere: straight-line (chord)
+distance between unit vectors is monotonic in great-circle distance, so
+k-nearest and radius results are exactly those of the haversine metric.
+
+Usage:
+    from facility_index import get_facility_index
+    index = get_facility_index("t_nagar_emergency_dataset.csv")
+    hospitals = index.nearest(13.04, 80.23, k=5, category="Hospital", emergency_24x7_only=True)
+    police = index.within(13.04, 80.23, radius_km=5, category="Police")
+    info = index.lookup("Apollo Medical Centre")  # normalized record, or None
+
+    # Many accidents at once (e.g. replaying historical incidents)
+    batch = index.nearest_emergency_batch(lats, lons, k=3)
+    batch["hospital_rows"], batch["hospital_km"]  # (M, k) arrays, -1 / inf padded
+"""
+
+import time
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0
+TRUE_VALUES = ("Y", "YES", "1", "TRUE")
+MTIME_CHECK_INTERVAL_S = 1.0  # Source files are stat()ed at most this often per dataset
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in km, vectorized (scalars or broadcastable arrays)
+
+    Returns:
+        float for scalar inputs, otherwise an ndarray
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    d = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return float(d) if d.ndim == 0 else d
+
+
+def _unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    lat_r = np.radians(np.asarray(lat, dtype=np.float64))
+    lon_r = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat_r)
+    return np.column_stack((cos_lat * np.cos(lon_r), cos_lat * np.sin(lon_r), np.sin(lat_r)))
+
+
+def _chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+def _km_to_chord(km: float) -> float:
+    return 2.0 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2.0)
+
+
+class FacilityIndex:
+    """
+    Nearest-facility lookups over one facility dataset
+    One KD-tree per (category, 24x7) filter, built on first use
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.dropna(subset=["Latitude", "Longitude"]).reset_index(drop=True)
+        self.df = df
+        self.lat = df["Latitude"].astype(float).to_numpy()
+        self.lon = df["Longitude"].astype(float).to_numpy()
+        self.category = df["Category"].fillna("").astype(str).to_numpy() if "Category" in df.columns \
+            else np.full(len(df), "", dtype=object)
+        if "Emergency_24x7" in df.columns:
+            self.emergency_24x7 = df["Emergency_24x7"].astype(str).str.upper().str.strip().isin(TRUE_VALUES).to_numpy()
+        else:
+            # Datasets without the column make no 24x7 distinction
+            self.emergency_24x7 = np.ones(len(df), dtype=bool)
+        self.name = self._text_column("Name")
+        self.address = self._text_column("Address")
+        self.phone = self._text_column("Phone")
+        self.icu_availability = np.char.upper(self._text_column("ICU_availability").astype(str)) == "Y"
+        readiness = np.char.lower(self._text_column("Response_readiness").astype(str))
+        self.response_readiness = np.where(readiness == "", "medium", readiness).astype(object)
+        # Exact (case-insensitive) name lookup; first row wins for duplicate names
+        self.name_index: Dict[str, int] = {}
+        for row, name in enumerate(self.name):
+            self.name_index.setdefault(name.lower(), row)
+        self.points = _unit_vectors(self.lat, self.lon)
+        self._trees: Dict[Tuple[Optional[str], bool], Tuple[np.ndarray, Optional[cKDTree]]] = {}
+
+    @classmethod
+    def from_csv(cls, dataset_path: str) -> "FacilityIndex":
+        return cls(pd.read_csv(dataset_path))
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def _text_column(self, column: str) -> np.ndarray:
+        """Stripped string column, '' for missing values or a missing column"""
+        if column not in self.df.columns:
+            return np.full(len(self.df), "", dtype=object)
+        return self.df[column].fillna("").astype(str).str.strip().to_numpy(dtype=object)
+
+    def row_of(self, name: str) -> Optional[int]:
+        """Row number of a facility by name (case-insensitive), or None"""
+        return self.name_index.get(str(name).strip().lower())
+
+    def record(self, row: int) -> Dict:
+        """Normalized facility record for a row"""
+        return {
+            "name": self.name[row],
+            "category": self.category[row],
+            "address": self.address[row],
+            "lat": float(self.lat[row]),
+            "lon": float(self.lon[row]),
+            "phone": self.phone[row],
+            "emergency_24x7": bool(self.emergency_24x7[row]),
+            "icu_availability": bool(self.icu_availability[row]),
+            "response_readiness": self.response_readiness[row],
+        }
+
+    def lookup(self, name: str) -> Optional[Dict]:
+        """Normalized facility record by name (case-insensitive), or None"""
+        row = self.row_of(name)
+        return self.record(row) if row is not None else None
+
+    def _subset(self, category: Optional[str], emergency_24x7_only: bool) -> Tuple[np.ndarray, Optional[cKDTree]]:
+        """Row numbers and KD-tree for a filter (cached)"""
+        key = (category.lower() if category else None, bool(emergency_24x7_only))
+        if key not in self._trees:
+            mask = np.ones(len(self.df), dtype=bool)
+            if category:
+                # Case-insensitive substring match, like str.contains(category, case=False)
+                lowered = np.char.lower(self.category.astype(str))
+                mask &= np.char.find(lowered, key[0]) >= 0
+            if emergency_24x7_only:
+                mask &= self.emergency_24x7
+            rows = np.flatnonzero(mask)
+            tree = cKDTree(self.points[rows]) if len(rows) else None
+            self._trees[key] = (rows, tree)
+        return self._trees[key]
+
+    def count(self, category: Optional[str] = None, emergency_24x7_only: bool = False) -> int:
+        """Number of facilities matching a filter"""
+        return len(self._subset(category, emergency_24x7_only)[0])
+
+    def query(self, lat: float, lon: float, k: int = 1,
+              category: Optional[str] = None,
+              emergency_24x7_only: bool = False,
+              max_radius_km: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest facilities to (lat, lon)
+
+        Returns:
+            Tuple of (row numbers into self.df, great-circle distances in km),
+            sorted by distance
+        """
+        rows, tree = self._subset(category, emergency_24x7_only)
+        k = min(k, len(rows))
+        if tree is None or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        bound = _km_to_chord(max_radius_km) if max_radius_km is not None else np.inf
+        chord, idx = tree.query(_unit_vectors([lat], [lon])[0], k=k, distance_upper_bound=bound)
+        chord, idx = np.atleast_1d(chord), np.atleast_1d(idx)
+        found = np.isfinite(chord)
+        return rows[idx[found]], _chord_to_km(chord[found])
+
+    def query_batch(self, lats: np.ndarray, lons: np.ndarray, k: int = 1,
+                    category: Optional[str] = None,
+                    emergency_24x7_only: bool = False,
+                    max_radius_km: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest facilities for each of M points in one tree query
+
+        Returns:
+            Tuple of (rows, dist_km), both shaped (M, k) and sorted by distance
+            per point; missing neighbours are padded with row -1 and inf km
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        out_rows = np.full((len(lats), k), -1, dtype=np.int64)
+        out_km = np.full((len(lats), k), np.inf)
+        rows, tree = self._subset(category, emergency_24x7_only)
+        kk = min(k, len(rows))
+        if tree is None or kk <= 0 or not len(lats):
+            return out_rows, out_km
+        bound = _km_to_chord(max_radius_km) if max_radius_km is not None else np.inf
+        chord, idx = tree.query(_unit_vectors(lats, lons), k=kk, distance_upper_bound=bound)
+        chord, idx = chord.reshape(len(lats), kk), idx.reshape(len(lats), kk)
+        found = np.isfinite(chord)
+        out_rows[:, :kk][found] = rows[idx[found]]
+        out_km[:, :kk][found] = _chord_to_km(chord[found])
+        return out_rows, out_km
+
+    def nearest_emergency_batch(self, lats: np.ndarray, lons: np.ndarray, k: int = 3,
+                                emergency_24x7_only: bool = False,
+                                max_radius_km: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        k nearest hospitals and police stations for M accident locations
+
+        Args:
+            lats, lons: Accident coordinates, shape (M,)
+            k: Facilities per category and accident
+            emergency_24x7_only: Only 24x7 facilities
+            max_radius_km: Optional search radius
+
+        Returns:
+            Dictionary of (M, k) arrays: hospital_rows, hospital_km, police_rows, police_km
+            (rows index self.df; -1 / inf where fewer than k facilities are found)
+        """
+        hospital_rows, hospital_km = self.query_batch(lats, lons, k, "Hospital", emergency_24x7_only, max_radius_km)
+        police_rows, police_km = self.query_batch(lats, lons, k, "Police", emergency_24x7_only, max_radius_km)
+        return {
+            "hospital_rows": hospital_rows,
+            "hospital_km": hospital_km,
+            "police_rows": police_rows,
+            "police_km": police_km,
+        }
+
+    def query_radius(self, lat: float, lon: float, radius_km: float,
+                     category: Optional[str] = None,
+                     emergency_24x7_only: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All facilities within radius_km of (lat, lon)
+
+        Returns:
+            Tuple of (row numbers into self.df, great-circle distances in km),
+            sorted by distance
+        """
+        rows, tree = self._subset(category, emergency_24x7_only)
+        if tree is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        point = _unit_vectors([lat], [lon])[0]
+        idx = np.asarray(tree.query_ball_point(point, _km_to_chord(radius_km)), dtype=np.int64)
+        if not len(idx):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        dist_km = _chord_to_km(np.linalg.norm(self.points[rows[idx]] - point, axis=1))
+        order = np.argsort(dist_km, kind="stable")
+        return rows[idx[order]], dist_km[order]
+
+    def _frame(self, rows: np.ndarray, dist_km: np.ndarray) -> pd.DataFrame:
+        out = self.df.iloc[rows].copy()
+        out["Distance_km"] = dist_km
+        return out
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                category: Optional[str] = None,
+                emergency_24x7_only: bool = False,
+                max_radius_km: Optional[float] = None) -> pd.DataFrame:
+        """k nearest facilities as dataset rows with a Distance_km column, sorted by distance"""
+        return self._frame(*self.query(lat, lon, k, category, emergency_24x7_only, max_radius_km))
+
+    def within(self, lat: float, lon: float, radius_km: float,
+               category: Optional[str] = None,
+               emergency_24x7_only: bool = False) -> pd.DataFrame:
+        """Facilities within radius_km as dataset rows with a Distance_km column, sorted by distance"""
+        return self._frame(*self.query_radius(lat, lon, radius_km, category, emergency_24x7_only))
+
+
+class FacilityRegistry:
+    """
+    Process-wide cache of FacilityIndex objects, one per dataset
+    Reloads a dataset only when one of its source files changes (mtime)
+    """
+
+    def __init__(self, check_interval_s: float = MTIME_CHECK_INTERVAL_S):
+        self.check_interval_s = check_interval_s
+        # key -> [index, source mtimes, last mtime check]
+        self._entries: Dict[Tuple[str, Optional[Hashable]], List] = {}
+
+    @staticmethod
+    def _mtimes(sources: Tuple[Path, ...]) -> Tuple[Optional[float], ...]:
+        return tuple(p.stat().st_mtime if p.exists() else None for p in sources)
+
+    def get(self, dataset_path: str,
+            loader: Optional[Callable[[], pd.DataFrame]] = None,
+            sources: Optional[List[str]] = None) -> FacilityIndex:
+        """
+        FacilityIndex for a dataset, (re)loaded only when its files change
+
+        Args:
+            dataset_path: Facility CSV
+            loader: Optional function returning the normalized DataFrame
+            sources: Files the loader reads (default: dataset_path)
+        """
+        key = (str(Path(dataset_path).resolve()), loader)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[2] < self.check_interval_s:
+            return entry[0]
+
+        paths = tuple(Path(p).resolve() for p in (sources or [dataset_path]))
+        mtimes = self._mtimes(paths)
+        if entry is not None and entry[1] == mtimes:
+            entry[2] = now
+            return entry[0]
+
+        index = FacilityIndex(loader() if loader else pd.read_csv(dataset_path))
+        self._entries[key] = [index, mtimes, now]
+        return index
+
+    def clear(self):
+        """Drop all cached datasets"""
+        self._entries.clear()
+
+
+registry = FacilityRegistry()
+
+
+def get_facility_index(dataset_path: str,
+                       loader: Optional[Callable[[], pd.DataFrame]] = None,
+                       sources: Optional[List[str]] = None) -> FacilityIndex:
+    """
+    Shared FacilityIndex for a dataset from the process-wide registry
+
+    Args:
+        dataset_path: Facility CSV
+        loader: Optional function returning the DataFrame (for datasets that
+                need normalizing, e.g. t_nagar_emergency_service.load_t_nagar_combined)
+        sources: Files the loader reads, watched for changes (default: dataset_path)
+    """
+    return registry.get(dataset_path, loader, sources)
@@ -0,0 +1,189 @@
+"""
+Precomputed Hospital Distance Tables
+The hospital sets (t_nagar_emergency_dataset.csv, places_dataset.csv) are small
+and static, so the road distance from every hospital to every road node is
+computed once offline: one shortest-path tree per hospital, stored as
+distance and predecessor arrays next to the stored road graph.
+
+At alert time, "road distance from every hospital to the accident" is an array
+lookup after snapping the accident to its nearest node, and the route is read
+back from the predecessor array.
+
+Build once (after python road_graph_store.py --build; rebuild whenever the graph is
+rebuilt, stale tables are ignored):
+    python hospital_distance_tables.py
+    python hospital_distance_tables.py --dataset t_nagar_emergency_dataset.csv --graph chennai_t_nagar
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csr_graph import CSRGraph
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_DATASETS = ["t_nagar_emergency_dataset.csv", "places_dataset.csv"]
+COORD_TOLERANCE_DEG = 1e-6
+
+
+def tables_filename(dataset_path: str) -> str:
+    """Tables file name for a hospital dataset (stored inside the graph directory)"""
+    return f"hospital_tables_{Path(dataset_path).stem}.npz"
+
+
+class HospitalDistanceTables:
+    """
+    Shortest-path trees from each hospital over one road graph
+
+    dist[h, v] = road distance hospital h -> node v (meters, inf if unreachable)
+    pred[h, v] = previous node on that route (-1 at the hospital / unreachable)
+    """
+
+    def __init__(self, names: np.ndarray, lats: np.ndarray, lons: np.ndarray,
+                 hospital_nodes: np.ndarray, node_ids: np.ndarray,
+                 dist: np.ndarray, pred: np.ndarray):
+        self.names = np.asarray(names, dtype=str)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.hospital_nodes = np.asarray(hospital_nodes, dtype=np.int32)
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.dist = np.asarray(dist, dtype=np.float32)
+        self.pred = np.asarray(pred, dtype=np.int32)
+        self.node_index = {nid: i for i, nid in enumerate(self.node_ids.tolist())}
+
+    @property
+    def num_hospitals(self) -> int:
+        return len(self.names)
+
+    def matches(self, graph) -> bool:
+        """True if the tables were built over this graph's nodes (False after a graph rebuild)"""
+        return np.array_equal(self.node_ids, np.asarray(graph.node_ids))
+
+    @classmethod
+    def build(cls, csr: CSRGraph, hospitals: pd.DataFrame,
+              show_progress: bool = True) -> "HospitalDistanceTables":
+        """
+        Compute one shortest-path tree per hospital
+
+        Args:
+            csr: Compiled road network
+            hospitals: DataFrame with Name, Latitude, Longitude columns
+            show_progress: Print progress messages
+        """
+        from scipy.sparse.csgraph import dijkstra
+
+        t0 = time.time()
+        lats = hospitals["Latitude"].astype(float).to_numpy()
+        lons = hospitals["Longitude"].astype(float).to_numpy()
+        hospital_nodes = csr.snap(lats, lons).astype(np.int32)
+
+        dist, pred = dijkstra(csr.to_scipy(), indices=hospital_nodes, return_predecessors=True)
+        pred[pred < 0] = -1
+
+        tables = cls(hospitals["Name"].astype(str).to_numpy(), lats, lons, hospital_nodes,
+                     csr.node_ids, dist.astype(np.float32), pred.astype(np.int32))
+        if show_progress:
+            print(f"   ✓ Distance tables for {len(lats)} hospitals ({time.time() - t0:.1f}s)")
+        return tables
+
+    def save(self, path: str):
+        """Persist tables to .npz"""
+        np.savez(path, names=self.names, lats=self.lats, lons=self.lons,
+                 hospital_nodes=self.hospital_nodes, node_ids=self.node_ids,
+                 dist=self.dist, pred=self.pred)
+
+    @classmethod
+    def load(cls, path: str) -> "HospitalDistanceTables":
+        """Load tables written by save()"""
+        data = np.load(path)
+        return cls(data["names"], data["lats"], data["lons"], data["hospital_nodes"],
+                   data["node_ids"], data["dist"], data["pred"])
+
+    def row_for(self, lat: float, lon: float) -> Optional[int]:
+        """Table row of the hospital at (lat, lon), or None if not in the table"""
+        match = np.flatnonzero((np.abs(self.lats - lat) <= COORD_TOLERANCE_DEG) &
+                               (np.abs(self.lons - lon) <= COORD_TOLERANCE_DEG))
+        return int(match[0]) if len(match) else None
+
+    def distances_to(self, node: int) -> np.ndarray:
+        """Road distance from every hospital to a node index (meters)"""
+        return self.dist[:, node]
+
+    def route(self, row: int, node: int) -> Tuple[Optional[List[int]], float]:
+        """
+        Route from hospital `row` to node index `node`
+
+        Returns:
+            Tuple of (path as OSM node IDs, distance in meters)
+            Returns (None, float('inf')) if the node is unreachable
+        """
+        distance = float(self.dist[row, node])
+        if not np.isfinite(distance):
+            return (None, float('inf'))
+        pred = self.pred[row]
+        path = [node]
+        while path[-1] != self.hospital_nodes[row]:
+            path.append(int(pred[path[-1]]))
+        path.reverse()
+        return (self.node_ids[path].tolist(), distance)
+
+
+def load_hospitals(dataset_path: str) -> pd.DataFrame:
+    """Hospital rows of a facility dataset (same filter as EmergencyRouteFinder)"""
+    df = pd.read_csv(dataset_path)
+    return df[df["Category"].str.contains("Hospital", case=False, na=False)].reset_index(drop=True)
+
+
+def build_tables(dataset_path: str, graph: Optional[str] = None,
+                 store_dir: Optional[str] = None) -> List[Path]:
+    """Build and save hospital tables for a dataset over stored road graphs"""
+    from road_graph_store import RoadGraphStore
+
+    store = RoadGraphStore(store_dir)
+    names = [graph] if graph else [meta["name"] for meta in store.list_graphs()]
+    if not names:
+        print("No stored road networks. Build one with: python road_graph_store.py --build")
+    hospitals = load_hospitals(dataset_path)
+    written = []
+    for name in names:
+        stored = store.load(name)
+        if stored is None:
+            print(f"❌ Stored road network '{name}' not found")
+            continue
+        # Only hospitals inside the stored area can be routed on it
+        inside = [stored.covers(lat, lon, 0) for lat, lon in
+                  zip(hospitals["Latitude"].astype(float), hospitals["Longitude"].astype(float))]
+        subset = hospitals[inside]
+        print(f"{name}: {len(subset)}/{len(hospitals)} hospitals of {Path(dataset_path).name} inside the graph")
+        if subset.empty:
+            continue
+        tables = HospitalDistanceTables.build(CSRGraph.from_store(stored), subset)
+        path = stored.path / tables_filename(dataset_path)
+        tables.save(str(path))
+        print(f"✓ Saved to {path}")
+        written.append(path)
+    return written
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser(description="Precompute hospital-to-node road distance tables")
+    parser.add_argument("--dataset", nargs="+", default=DEFAULT_DATASETS, help="hospital dataset CSV(s)")
+    parser.add_argument("--graph", default=None, help="stored graph name (default: all stored graphs)")
+    parser.add_argument("--store-dir", default=None, help="offline road graph store directory")
+    return parser.parse_args()
+
+
+def main(opt):
+    for dataset in opt.dataset:
+        path = Path(dataset)
+        if not path.is_absolute() and not path.exists():
+            path = ROOT / dataset
+        build_tables(str(path), opt.graph, opt.store_dir)
+
+
+if __name__ == "__main__":
+    main(parse_opt())
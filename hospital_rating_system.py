@@ -1,10 +1,143 @@
 import sqlite3
 import json
-from datetime import datetime
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 import os
 
+from db_connections import get_connection_manager
+from rating_writer import DEFAULT_FLUSH_INTERVAL_S, get_rating_writer
+
+# Half-life of the exponentially-decayed aggregates (older cases count half as much)
+DECAY_HALF_LIFE_DAYS = 90.0
+
+# Running aggregates kept in `hospitals` so rating updates never scan case_history
+AGGREGATE_COLUMNS = (
+    ("quality_score_sum", "REAL DEFAULT 0.0"),
+    ("quality_score_count", "INTEGER DEFAULT 0"),
+    ("response_time_count", "INTEGER DEFAULT 0"),
+    ("decayed_weight", "REAL DEFAULT 0.0"),
+    ("decayed_successes", "REAL DEFAULT 0.0"),
+    ("decayed_quality_sum", "REAL DEFAULT 0.0"),
+    ("decayed_quality_weight", "REAL DEFAULT 0.0"),
+    ("decayed_response_time_sum", "REAL DEFAULT 0.0"),
+    ("decayed_response_time_weight", "REAL DEFAULT 0.0"),
+    ("decayed_at", "REAL"),  # Unix time the decayed sums refer to
+)
+
+
+# Rolling rating windows (days, today included), materialized in `hospitals`
+# from the hospital_daily_stats rollup
+RATING_WINDOWS_DAYS = (7, 30, 90)
+WINDOW_COLUMNS = tuple(
+    (column, decl) for days in RATING_WINDOWS_DAYS
+    for column, decl in ((f"rating_{days}d", "REAL DEFAULT 2.5"), (f"cases_{days}d", "INTEGER DEFAULT 0"))
+) + (("decayed_rating", "REAL DEFAULT 2.5"), ("windows_day", "TEXT"))
+# Dispatch scores by the 30-day rating once a hospital has this many recent cases
+RECENT_RATING_DAYS = 30
+RECENT_RATING_MIN_CASES = 5
+
+
+def utc_day(offset_days: int = 0) -> str:
+    """UTC date (YYYY-MM-DD) offset_days from today, matching SQLite's CURRENT_TIMESTAMP"""
+    return (datetime.now(timezone.utc) + timedelta(days=offset_days)).strftime("%Y-%m-%d")
+
+
+def performance_rating(cases: float, successes: float, quality_sum: float, quality_count: float,
+                       response_sum: float, response_count: float) -> float:
+    """Star rating (HospitalPerformance formula) from summed case metrics"""
+    avg_quality = quality_sum / quality_count if quality_count else None
+    avg_response_time = response_sum / response_count if response_count else None
+    return HospitalPerformance(
+        hospital_name="",
+        total_cases=cases,
+        successful_outcomes=successes,
+        average_response_time_minutes=avg_response_time if avg_response_time else 60.0,
+        quality_score=avg_quality if avg_quality else 50.0,
+        current_rating=2.5
+    ).calculate_new_rating()
+
+
+def decay_factor(elapsed_s: float, half_life_days: float = DECAY_HALF_LIFE_DAYS) -> float:
+    """Weight left after elapsed_s seconds of exponential decay"""
+    return math.exp(-math.log(2.0) * max(0.0, elapsed_s) / (half_life_days * 86400.0))
+
+
+# SQLite's default limit on host parameters per statement is 999
+MAX_QUERY_PARAMS = 500
+
+# Rating cache per database file, shared by every HospitalRatingSystem on that file
+# in this process (the map generator and the response system each hold one)
+_rating_caches: Dict[str, "RatingCache"] = {}
+_rating_caches_lock = threading.Lock()
+
+
+class RatingCache:
+    """
+    In-process cache of get_hospital_rating results, keyed by hospital name
+    Write-through invalidated by HospitalRatingSystem writes; None is cached for
+    unknown hospitals until they are registered
+    """
+    
+    def __init__(self):
+        self._entries: Dict[str, Optional[Dict]] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation, so a read that raced a write is not cached
+        self.generation = 0
+        # UTC day the rolling rating windows were last slid to (see refresh_windowed_ratings)
+        self.windows_day = None
+        self.hits = 0
+        self.misses = 0
+    
+    def get_many(self, names: List[str]) -> Tuple[Dict[str, Optional[Dict]], List[str]]:
+        """Cached entries for names, plus the names that are not cached"""
+        found, missing = {}, []
+        with self._lock:
+            for name in names:
+                if name in self._entries:
+                    entry = self._entries[name]
+                    found[name] = dict(entry) if entry is not None else None
+                else:
+                    missing.append(name)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+    
+    def put_many(self, entries: Dict[str, Optional[Dict]], generation: int):
+        """Cache entries read from the database when the cache was at `generation`"""
+        with self._lock:
+            if generation == self.generation:
+                self._entries.update(entries)
+    
+    def invalidate(self, name: Optional[str] = None):
+        """Drop one hospital (after a write to it) or everything"""
+        with self._lock:
+            self.generation += 1
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+    
+    def claim_windows_day(self, day: str) -> bool:
+        """Mark the rating windows as slid to day; False if another caller already did"""
+        with self._lock:
+            if self.windows_day == day:
+                return False
+            self.windows_day = day
+            return True
+
+
+def get_rating_cache(db_path: str) -> RatingCache:
+    """Shared rating cache for a database file"""
+    key = os.path.abspath(db_path)
+    with _rating_caches_lock:
+        if key not in _rating_caches:
+            _rating_caches[key] = RatingCache()
+        return _rating_caches[key]
+
 @dataclass
 class HospitalPerformance:
     """Data class for hospital performance metrics"""
@@ -52,13 +185,36 @@ class HospitalRatingSystem:
     Ratings increase/decrease based on actual performance metrics
     """
     
-    def __init__(self, db_path: str = "hospital_ratings.db"):
+    def __init__(self, db_path: str = "hospital_ratings.db", write_behind: bool = False,
+                 flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S):
+        """
+        Args:
+            db_path: SQLite database file
+            write_behind: Queue writes (registrations, outcomes, manual ratings) for a
+                          background writer thread instead of committing in the caller;
+                          call flush() when a write must be durable
+            flush_interval_s: Longest a queued write waits to share a commit
+        """
         self.db_path = db_path
+        # Persistent per-thread connections (WAL), shared by every instance on this file
+        self.db = get_connection_manager(db_path)
+        self.cache = get_rating_cache(db_path)
         self.init_database()
+        self.writer = get_rating_writer(self, flush_interval_s) if write_behind else None
+        self._ensure_windows_fresh()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Durability barrier for write-behind mode: wait until queued writes are committed
+        
+        Returns:
+            True if everything queued before the call is committed
+        """
+        return self.writer.flush(timeout) if self.writer else True
     
     def init_database(self):
         """Initialize SQLite database with hospital rating tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connection()
         cursor = conn.cursor()
         
         # Hospital info table
@@ -107,48 +263,250 @@ class HospitalRatingSystem:
             )
         ''')
         
+        # Per-hospital lookups of history (older databases were created without these)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_case_history_hospital ON case_history(hospital_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_rating_history_hospital ON rating_history(hospital_id)')
+        
+        self._migrate_aggregates(cursor)
+        self._migrate_rollups(cursor)
         conn.commit()
-        conn.close()
+        
+        # Windows already slid today (by any process): nothing to refresh
+        cursor.execute('SELECT 1 FROM hospitals WHERE windows_day IS NULL OR windows_day < ? LIMIT 1',
+                       (utc_day(),))
+        if cursor.fetchone() is None:
+            self.cache.windows_day = utc_day()
+    
+    def _migrate_rollups(self, cursor: sqlite3.Cursor):
+        """Create the daily rollup (backfilled once from case_history) and window columns"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hospital_daily_stats'")
+        exists = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS hospital_daily_stats (
+                hospital_id INTEGER NOT NULL,
+                day TEXT NOT NULL,  -- UTC date of the case (YYYY-MM-DD)
+                cases INTEGER DEFAULT 0,
+                successes INTEGER DEFAULT 0,
+                quality_sum REAL DEFAULT 0.0,
+                quality_count INTEGER DEFAULT 0,
+                response_time_sum REAL DEFAULT 0.0,
+                response_time_count INTEGER DEFAULT 0,
+                PRIMARY KEY (hospital_id, day)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_hospital_daily_stats_day ON hospital_daily_stats(day)')
+        if not exists:
+            cursor.execute('''
+                INSERT INTO hospital_daily_stats
+                SELECT hospital_id, date(created_at), COUNT(*),
+                       SUM(patient_outcome = 'successful'),
+                       COALESCE(SUM(quality_score), 0.0), COUNT(quality_score),
+                       COALESCE(SUM(response_time_minutes), 0.0), COUNT(response_time_minutes)
+                FROM case_history WHERE hospital_id IS NOT NULL
+                GROUP BY hospital_id, date(created_at)
+            ''')
+        
+        cursor.execute('PRAGMA table_info(hospitals)')
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, decl in WINDOW_COLUMNS:
+            if name not in existing:
+                cursor.execute(f'ALTER TABLE hospitals ADD COLUMN {name} {decl}')
+        if not exists or "windows_day" not in existing:
+            # Windows of the backfilled history, in the migration transaction
+            self.refresh_windowed_ratings(cursor=cursor)
+        if "decayed_rating" not in existing:
+            cursor.execute('''
+                SELECT id, decayed_weight, decayed_successes, decayed_quality_sum,
+                       decayed_quality_weight, decayed_response_time_sum,
+                       decayed_response_time_weight
+                FROM hospitals
+            ''')
+            cursor.executemany('UPDATE hospitals SET decayed_rating = ? WHERE id = ?', [
+                (performance_rating(*(value or 0.0 for value in row[1:])), row[0])
+                for row in cursor.fetchall()
+            ])
+    
+    def refresh_windowed_ratings(self, hospital_ids: Optional[List[int]] = None,
+                                 cursor: Optional[sqlite3.Cursor] = None):
+        """
+        Recompute the 7/30/90-day ratings from the daily rollup
+        Runs for every hospital once per UTC day (windows move even without new
+        cases) and for the hospitals touched by each outcome insert
+        
+        Args:
+            hospital_ids: Hospitals to refresh (default: all)
+            cursor: Cursor of an open transaction (default: own transaction)
+        """
+        today = utc_day()
+        if cursor is None:
+            with self.db.transaction() as conn:
+                self.refresh_windowed_ratings(hospital_ids, conn.cursor())
+            self.cache.invalidate()
+            self.cache.windows_day = today
+            return
+        
+        starts = [utc_day(1 - days) for days in RATING_WINDOWS_DAYS]
+        window_sums = ", ".join(
+            f"SUM(CASE WHEN day >= '{start}' THEN {column} ELSE 0 END)"
+            for start in starts
+            for column in ("cases", "successes", "quality_sum", "quality_count",
+                           "response_time_sum", "response_time_count")
+        )
+        if hospital_ids is None:
+            chunks = [("day >= ?", [min(starts)])]
+        else:
+            hospital_ids = list(hospital_ids)
+            chunks = [
+                (f'day >= ? AND hospital_id IN ({", ".join("?" * len(chunk))})', [min(starts)] + chunk)
+                for chunk in (hospital_ids[i:i + MAX_QUERY_PARAMS]
+                              for i in range(0, len(hospital_ids), MAX_QUERY_PARAMS))
+            ]
+        
+        updates = {}
+        for where, params in chunks:
+            cursor.execute(f'''
+                SELECT hospital_id, {window_sums} FROM hospital_daily_stats
+                WHERE {where} GROUP BY hospital_id
+            ''', params)
+            for row in cursor.fetchall():
+                values = []
+                for i in range(len(RATING_WINDOWS_DAYS)):
+                    sums = row[1 + 6 * i: 7 + 6 * i]
+                    values += [performance_rating(*sums), sums[0]]
+                updates[row[0]] = values
+        
+        # Hospitals without cases in any window get the default rating
+        empty = [2.5, 0] * len(RATING_WINDOWS_DAYS)
+        assignments = ", ".join(f"{column} = ?" for column, _ in WINDOW_COLUMNS[:-2])
+        if hospital_ids is None:
+            cursor.execute(f'UPDATE hospitals SET {assignments}, windows_day = ?', empty + [today])
+        else:
+            updates = {hospital_id: updates.get(hospital_id, empty) for hospital_id in hospital_ids}
+        cursor.executemany(f'UPDATE hospitals SET {assignments}, windows_day = ? WHERE id = ?',
+                           [values + [today, hospital_id] for hospital_id, values in updates.items()])
+    
+    def _ensure_windows_fresh(self):
+        """
+        Slide the rating windows when the UTC day changed since the last refresh
+        The refresh is queued to the writer (or a background thread); reads keep
+        serving the stored windows until it commits
+        """
+        if not self.cache.claim_windows_day(utc_day()):
+            return
+        if self.writer:
+            self.writer.submit("windows", None)
+        else:
+            threading.Thread(target=self._refresh_windows_in_background,
+                             name="rating-windows", daemon=True).start()
+    
+    def _refresh_windows_in_background(self):
+        try:
+            self.refresh_windowed_ratings()
+        except Exception as e:
+            self.cache.windows_day = None  # Retried by the next read
+            print(f"⚠️ Rating window refresh failed: {e}")
+    
+    def _migrate_aggregates(self, cursor: sqlite3.Cursor):
+        """Add the running aggregate columns and backfill them once from case_history"""
+        cursor.execute('PRAGMA table_info(hospitals)')
+        existing = {row[1] for row in cursor.fetchall()}
+        missing = [(name, decl) for name, decl in AGGREGATE_COLUMNS if name not in existing]
+        if not missing:
+            return
+        for name, decl in missing:
+            cursor.execute(f'ALTER TABLE hospitals ADD COLUMN {name} {decl}')
+        
+        cursor.execute('''
+            UPDATE hospitals SET
+                total_response_time_minutes = (SELECT COALESCE(SUM(response_time_minutes), 0.0)
+                                               FROM case_history WHERE hospital_id = hospitals.id),
+                quality_score_sum = (SELECT COALESCE(SUM(quality_score), 0.0)
+                                     FROM case_history WHERE hospital_id = hospitals.id),
+                quality_score_count = (SELECT COUNT(quality_score)
+                                       FROM case_history WHERE hospital_id = hospitals.id),
+                response_time_count = (SELECT COUNT(response_time_minutes)
+                                       FROM case_history WHERE hospital_id = hospitals.id)
+        ''')
+        
+        # Decayed sums replay each hospital's history in order (one pass, migration only)
+        now = time.time()
+        cursor.execute('''
+            SELECT hospital_id, patient_outcome, quality_score, response_time_minutes,
+                   CAST(strftime('%s', created_at) AS REAL)
+            FROM case_history ORDER BY hospital_id, id
+        ''')
+        decayed: Dict[int, List[float]] = {}
+        for hospital_id, outcome, quality, response_time, created in cursor.fetchall():
+            sums = decayed.setdefault(hospital_id, [0.0] * 6 + [created or now])
+            self._decay_add(sums, created or now, outcome == 'successful', quality, response_time)
+        for hospital_id, sums in decayed.items():
+            self._decay_add(sums, now)
+            cursor.execute('''
+                UPDATE hospitals SET decayed_weight = ?, decayed_successes = ?,
+                    decayed_quality_sum = ?, decayed_quality_weight = ?,
+                    decayed_response_time_sum = ?, decayed_response_time_weight = ?,
+                    decayed_at = ?
+                WHERE id = ?
+            ''', (*sums, hospital_id))
+    
+    @staticmethod
+    def _decay_add(sums: List[float], at: float, successful: Optional[bool] = None,
+                   quality: Optional[float] = None, response_time: Optional[float] = None):
+        """
+        Advance decayed sums to time `at` and add one case (successful is None: decay only)
+        sums: [weight, successes, quality_sum, quality_weight, response_sum, response_weight, decayed_at]
+        """
+        weight = 1.0
+        if at >= sums[6]:
+            factor = decay_factor(at - sums[6])
+            for i in range(6):
+                sums[i] *= factor
+            sums[6] = at
+        else:
+            weight = decay_factor(sums[6] - at)  # Case older than the sums (backdated import)
+        if successful is None:
+            return
+        sums[0] += weight
+        sums[1] += weight if successful else 0.0
+        if quality is not None:
+            sums[2] += weight * quality
+            sums[3] += weight
+        if response_time is not None:
+            sums[4] += weight * response_time
+            sums[5] += weight
     
     def register_hospital(self, name: str, address: str = "", 
                          latitude: float = None, longitude: float = None,
-                         phone: str = "") -> int:
+                         phone: str = "") -> Optional[int]:
         """
         Register a new hospital in the system
         
         Returns:
-            Hospital ID
+            Hospital ID (None in write-behind mode: the registration is queued)
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT OR IGNORE INTO hospitals (name, address, latitude, longitude, phone)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (name, address, latitude, longitude, phone))
-            
-            cursor.execute('SELECT id FROM hospitals WHERE name = ?', (name,))
-            result = cursor.fetchone()
-            hospital_id = result[0] if result else None
-            
-            conn.commit()
-            return hospital_id
-        except sqlite3.IntegrityError:
-            # Hospital already exists, return existing ID
-            cursor.execute('SELECT id FROM hospitals WHERE name = ?', (name,))
-            result = cursor.fetchone()
-            return result[0] if result else None
-        finally:
-            conn.close()
+        if self.writer:
+            self.writer.submit("register", (name, address, latitude, longitude, phone))
+            return None
+        with self.db.transaction() as conn:
+            hospital_id = self._register(conn.cursor(), name, address, latitude, longitude, phone)
+        self.cache.invalidate(name)
+        return hospital_id
     
-    def get_hospital_id(self, name: str) -> Optional[int]:
-        """Get hospital ID by name"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _register(self, cursor: sqlite3.Cursor, name: str, address: str = "",
+                  latitude: float = None, longitude: float = None, phone: str = "") -> Optional[int]:
+        """Insert a hospital if missing and return its ID (inside the caller's transaction)"""
+        cursor.execute('''
+            INSERT OR IGNORE INTO hospitals (name, address, latitude, longitude, phone)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (name, address, latitude, longitude, phone))
         cursor.execute('SELECT id FROM hospitals WHERE name = ?', (name,))
         result = cursor.fetchone()
-        conn.close()
+        return result[0] if result else None
+    
+    def get_hospital_id(self, name: str) -> Optional[int]:
+        """Get hospital ID by name"""
+        result = self.db.connection().execute(
+            'SELECT id FROM hospitals WHERE name = ?', (name,)).fetchone()
         return result[0] if result else None
     
     def record_case_outcome(self, hospital_name: str, accident_id: str,
@@ -167,59 +525,189 @@ class HospitalRatingSystem:
             treatment_notes: Optional notes about the treatment
             
         Returns:
-            True if successful, False otherwise
+            True if successful (or queued in write-behind mode), False otherwise
         """
-        # Ensure hospital is registered
-        hospital_id = self.get_hospital_id(hospital_name)
-        if not hospital_id:
-            hospital_id = self.register_hospital(hospital_name)
-        
-        if not hospital_id:
-            return False
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        recorded = self.record_case_outcomes([{
+            "hospital_name": hospital_name,
+            "accident_id": accident_id,
+            "patient_outcome": patient_outcome,
+            "quality_score": quality_score,
+            "response_time_minutes": response_time_minutes,
+            "treatment_notes": treatment_notes,
+        }])
+        return recorded == 1
+    
+    def record_case_outcomes(self, outcomes: List[Dict]) -> int:
+        """
+        Record many case outcomes in one transaction
+        Hospitals are registered as needed, cases inserted with executemany, and
+        each affected hospital's aggregates and rating are updated once
         
+        Args:
+            outcomes: Dicts with hospital_name, accident_id, patient_outcome,
+                      quality_score, response_time_minutes, optional treatment_notes
+                      and optional created_at (ISO timestamp, UTC if naive; default: now)
+            
+        Returns:
+            Number of outcomes recorded or queued (0 if the transaction failed)
+        """
+        if not outcomes:
+            return 0
+        rows = self._outcome_rows(outcomes)
+        if self.writer:
+            self.writer.submit("outcomes", rows)
+            return len(rows)
+        
+        conn = self.db.connection()
         try:
-            # Record case in history
+            self._write_outcome_rows(conn.cursor(), rows)
+            conn.commit()
+        except Exception as e:
+            print(f"Error recording case outcome: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            for name in dict.fromkeys(row[0] for row in rows):
+                self.cache.invalidate(name)
+        return len(rows)
+    
+    @staticmethod
+    def _outcome_rows(outcomes: List[Dict]) -> List[Tuple]:
+        """Outcome dicts as case rows (timestamps resolved now, in the caller's thread)"""
+        now = time.time()
+        rows = []
+        for outcome in outcomes:
+            created_at = outcome.get("created_at")
+            created_s = now
+            if created_at:
+                created = datetime.fromisoformat(str(created_at))
+                if created.tzinfo is None:
+                    created = created.replace(tzinfo=timezone.utc)
+                created_s = created.timestamp()
+            created_at = datetime.fromtimestamp(created_s, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            rows.append((outcome["hospital_name"], outcome.get("accident_id"),
+                         outcome.get("patient_outcome"), outcome.get("quality_score"),
+                         outcome.get("response_time_minutes"), outcome.get("treatment_notes", ""),
+                         created_at, created_s))
+        return rows
+    
+    def _write_outcome_rows(self, cursor: sqlite3.Cursor, rows: List[Tuple]) -> List[str]:
+        """
+        Insert case rows and update aggregates, rollups and ratings (inside the
+        caller's transaction)
+        
+        Returns:
+            Names of the hospitals the cases belong to
+        """
+        names = list(dict.fromkeys(row[0] for row in rows))
+        # Ensure hospitals are registered (same transaction as the outcomes)
+        cursor.executemany("INSERT OR IGNORE INTO hospitals (name, address, phone) VALUES (?, '', '')",
+                           [(name,) for name in names])
+        hospital_ids = {}
+        for i in range(0, len(names), MAX_QUERY_PARAMS):
+            chunk = names[i:i + MAX_QUERY_PARAMS]
+            cursor.execute(f'SELECT name, id FROM hospitals WHERE name IN ({", ".join("?" * len(chunk))})',
+                           chunk)
+            hospital_ids.update(cursor.fetchall())
+        
+        # Record cases in history
+        cursor.executemany('''
+            INSERT INTO case_history 
+            (hospital_id, accident_id, patient_outcome, quality_score, 
+             response_time_minutes, treatment_quality_notes, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        ''', [(hospital_ids[row[0]],) + row[1:7] for row in rows])
+        
+        # Daily rollup (one upsert per hospital and day)
+        daily = {}
+        for name, _, outcome, quality, response_time, _, _, created_s in rows:
+            day = datetime.fromtimestamp(created_s, timezone.utc).strftime("%Y-%m-%d")
+            sums = daily.setdefault((hospital_ids[name], day), [0, 0, 0.0, 0, 0.0, 0])
+            sums[0] += 1
+            sums[1] += 1 if outcome == 'successful' else 0
+            if quality is not None:
+                sums[2] += quality
+                sums[3] += 1
+            if response_time is not None:
+                sums[4] += response_time
+                sums[5] += 1
+        cursor.executemany('''
+            INSERT INTO hospital_daily_stats
+            (hospital_id, day, cases, successes, quality_sum, quality_count,
+             response_time_sum, response_time_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (hospital_id, day) DO UPDATE SET
+                cases = cases + excluded.cases,
+                successes = successes + excluded.successes,
+                quality_sum = quality_sum + excluded.quality_sum,
+                quality_count = quality_count + excluded.quality_count,
+                response_time_sum = response_time_sum + excluded.response_time_sum,
+                response_time_count = response_time_count + excluded.response_time_count
+        ''', [key + tuple(sums) for key, sums in daily.items()])
+        
+        # Per-hospital deltas of the statistics and running aggregates
+        deltas = {}
+        for name, _, outcome, quality, response_time, _, _, created_s in sorted(rows, key=lambda r: r[7]):
+            delta = deltas.setdefault(hospital_ids[name], {
+                "cases": 0, "successes": 0, "response_sum": 0.0, "quality_sum": 0.0,
+                "quality_count": 0, "response_count": 0, "cases_decayed": []})
+            delta["cases"] += 1
+            delta["successes"] += 1 if outcome == 'successful' else 0
+            if quality is not None:
+                delta["quality_sum"] += quality
+                delta["quality_count"] += 1
+            if response_time is not None:
+                delta["response_sum"] += response_time
+                delta["response_count"] += 1
+            delta["cases_decayed"].append((created_s, outcome == 'successful', quality, response_time))
+        
+        # Update hospital statistics and running aggregates (no history scan)
+        for hospital_id, delta in deltas.items():
             cursor.execute('''
-                INSERT INTO case_history 
-                (hospital_id, accident_id, patient_outcome, quality_score, 
-                 response_time_minutes, treatment_quality_notes)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (hospital_id, accident_id, patient_outcome, quality_score,
-                  response_time_minutes, treatment_notes))
-            
-            # Update hospital statistics
-            is_successful = 1 if patient_outcome == 'successful' else 0
+                SELECT decayed_weight, decayed_successes, decayed_quality_sum,
+                       decayed_quality_weight, decayed_response_time_sum,
+                       decayed_response_time_weight, decayed_at
+                FROM hospitals WHERE id = ?
+            ''', (hospital_id,))
+            decayed = [value or 0.0 for value in cursor.fetchone()]
+            decayed[6] = decayed[6] or delta["cases_decayed"][0][0]
+            for case in delta["cases_decayed"]:
+                self._decay_add(decayed, *case)
             
             cursor.execute('''
                 UPDATE hospitals 
-                SET total_cases = total_cases + 1,
+                SET total_cases = total_cases + ?,
                     successful_outcomes = successful_outcomes + ?,
                     total_response_time_minutes = total_response_time_minutes + ?,
+                    quality_score_sum = quality_score_sum + ?,
+                    quality_score_count = quality_score_count + ?,
+                    response_time_count = response_time_count + ?,
+                    decayed_weight = ?, decayed_successes = ?,
+                    decayed_quality_sum = ?, decayed_quality_weight = ?,
+                    decayed_response_time_sum = ?, decayed_response_time_weight = ?,
+                    decayed_at = ?,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
-            ''', (is_successful, response_time_minutes, hospital_id))
+            ''', (delta["cases"], delta["successes"], delta["response_sum"],
+                  delta["quality_sum"], delta["quality_count"], delta["response_count"],
+                  *decayed, hospital_id))
             
-            # Recalculate and update rating
+            # Recalculate and update rating (once per hospital)
             self._update_hospital_rating(hospital_id, cursor)
-            
-            conn.commit()
-            return True
-        except Exception as e:
-            print(f"Error recording case outcome: {e}")
-            conn.rollback()
-            return False
-        finally:
-            conn.close()
+        self.refresh_windowed_ratings(list(deltas), cursor)
+        
+        return names
     
     def _update_hospital_rating(self, hospital_id: int, cursor: sqlite3.Cursor):
         """Recalculate and update hospital rating based on all metrics"""
         # Get current hospital statistics
         cursor.execute('''
             SELECT name, total_cases, successful_outcomes, 
-                   total_response_time_minutes, current_rating
+                   total_response_time_minutes, current_rating,
+                   quality_score_sum, quality_score_count, response_time_count,
+                   decayed_weight, decayed_successes, decayed_quality_sum,
+                   decayed_quality_weight, decayed_response_time_sum,
+                   decayed_response_time_weight
             FROM hospitals WHERE id = ?
         ''', (hospital_id,))
         
@@ -227,17 +715,17 @@ class HospitalRatingSystem:
         if not result:
             return
         
-        name, total_cases, successful_outcomes, total_response_time, old_rating = result
+        (name, total_cases, successful_outcomes, total_response_time, old_rating,
+         quality_sum, quality_count, response_count) = result[:8]
         
-        # Calculate average quality score and response time
-        cursor.execute('''
-            SELECT AVG(quality_score), AVG(response_time_minutes)
-            FROM case_history WHERE hospital_id = ?
-        ''', (hospital_id,))
+        # Decayed averages are ratios of equally-decayed sums, so this stays valid as time passes
+        decayed_rating = performance_rating(*(value or 0.0 for value in result[8:]))
         
-        avg_result = cursor.fetchone()
-        avg_quality = avg_result[0] if avg_result[0] else 50.0
-        avg_response_time = avg_result[1] if avg_result[1] else 60.0
+        # Average quality score and response time from the running sums
+        avg_quality = quality_sum / quality_count if quality_count else None
+        avg_response_time = total_response_time / response_count if response_count else None
+        avg_quality = avg_quality if avg_quality else 50.0
+        avg_response_time = avg_response_time if avg_response_time else 60.0
         
         # Create performance object
         performance = HospitalPerformance(
@@ -254,8 +742,8 @@ class HospitalRatingSystem:
         
         # Update hospital rating
         cursor.execute('''
-            UPDATE hospitals SET current_rating = ? WHERE id = ?
-        ''', (new_rating, hospital_id))
+            UPDATE hospitals SET current_rating = ?, decayed_rating = ? WHERE id = ?
+        ''', (new_rating, decayed_rating, hospital_id))
         
         # Record rating change in history
         if abs(new_rating - old_rating) >= 0.1:  # Only record if significant change
@@ -271,66 +759,110 @@ class HospitalRatingSystem:
     
     def get_hospital_rating(self, hospital_name: str) -> Optional[Dict]:
         """Get current rating and performance metrics for a hospital"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, current_rating, total_cases, successful_outcomes,
-                   total_response_time_minutes, address, phone
-            FROM hospitals WHERE name = ?
-        ''', (hospital_name,))
-        
-        result = cursor.fetchone()
-        if not result:
-            conn.close()
-            return None
-        
-        hospital_id, name, rating, cases, successful, total_time, address, phone = result
+        return self.get_ratings([hospital_name])[hospital_name]
+    
+    def get_ratings(self, hospital_names: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Current ratings and performance metrics for several hospitals
+        Served from the in-process cache; the rest are read with one query
         
-        # Get average quality score
-        cursor.execute('''
-            SELECT AVG(quality_score) FROM case_history WHERE hospital_id = ?
-        ''', (hospital_id,))
-        avg_quality = cursor.fetchone()[0] or 50.0
-        
-        avg_response_time = (total_time / cases) if cases > 0 else 0.0
-        success_rate = (successful / cases * 100) if cases > 0 else 0.0
-        
-        conn.close()
-        
-        return {
-            "hospital_name": name,
-            "address": address,
-            "phone": phone,
-            "current_rating": rating,
-            "total_cases": cases,
-            "successful_outcomes": successful,
-            "success_rate_percent": round(success_rate, 2),
-            "average_quality_score": round(avg_quality, 2),
-            "average_response_time_minutes": round(avg_response_time, 2)
-        }
+        Args:
+            hospital_names: Hospital names
+            
+        Returns:
+            {name: rating dict (as get_hospital_rating) or None if not registered}
+        """
+        self._ensure_windows_fresh()
+        names = list(dict.fromkeys(hospital_names))
+        generation = self.cache.generation
+        ratings, missing = self.cache.get_many(names)
+        if not missing:
+            return ratings
+        
+        fetched = {name: None for name in missing}
+        cursor = self.db.connection().cursor()
+        for i in range(0, len(missing), MAX_QUERY_PARAMS):
+            chunk = missing[i:i + MAX_QUERY_PARAMS]
+            cursor.execute(f'''
+                SELECT name, current_rating, total_cases, successful_outcomes,
+                       total_response_time_minutes, address, phone,
+                       quality_score_sum, quality_score_count,
+                       decayed_weight, decayed_successes, decayed_quality_sum,
+                       decayed_quality_weight, decayed_response_time_sum,
+                       decayed_response_time_weight, decayed_rating,
+                       {", ".join(column for column, _ in WINDOW_COLUMNS[:-2])}
+                FROM hospitals WHERE name IN ({", ".join("?" * len(chunk))})
+            ''', chunk)
+            for row in cursor.fetchall():
+                name, rating, cases, successful, total_time, address, phone, quality_sum, quality_count = row[:9]
+                d_weight, d_successes, d_quality, d_quality_weight, d_response, d_response_weight = (
+                    value or 0.0 for value in row[9:15])
+                windows = dict(zip((column for column, _ in WINDOW_COLUMNS[:-2]), row[16:]))
+                avg_quality = quality_sum / quality_count if quality_count else None
+                avg_response_time = (total_time / cases) if cases > 0 else 0.0
+                success_rate = (successful / cases * 100) if cases > 0 else 0.0
+                fetched[name] = {
+                    "hospital_name": name,
+                    "address": address,
+                    "phone": phone,
+                    "current_rating": rating,
+                    "total_cases": cases,
+                    "successful_outcomes": successful,
+                    "success_rate_percent": round(success_rate, 2),
+                    "average_quality_score": round(avg_quality or 50.0, 2),
+                    "average_response_time_minutes": round(avg_response_time, 2),
+                    # Exponentially-decayed variants (recent cases weigh more)
+                    "decayed_success_rate_percent": round(d_successes / d_weight * 100, 2) if d_weight else 0.0,
+                    "decayed_quality_score": round(d_quality / d_quality_weight, 2) if d_quality_weight else 50.0,
+                    "decayed_response_time_minutes": round(d_response / d_response_weight, 2) if d_response_weight else 0.0,
+                    "decayed_rating": row[15] if row[15] is not None else 2.5,
+                    **windows,
+                    # What dispatch scores by: recent performance once there is enough of it
+                    "recent_rating": (windows[f"rating_{RECENT_RATING_DAYS}d"]
+                                      if windows[f"cases_{RECENT_RATING_DAYS}d"] >= RECENT_RATING_MIN_CASES
+                                      else rating)
+                }
+        
+        self.cache.put_many(fetched, generation)
+        ratings.update({name: dict(info) if info else None for name, info in fetched.items()})
+        return ratings
     
-    def get_top_hospitals(self, limit: int = 10) -> List[Dict]:
-        """Get top-rated hospitals sorted by rating"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_top_hospitals(self, limit: int = 10, window: Optional[str] = None) -> List[Dict]:
+        """
+        Get top-rated hospitals sorted by rating
         
-        cursor.execute('''
+        Args:
+            limit: Number of hospitals
+            window: None (all-time rating), '7d', '30d', '90d' (rolling windows,
+                    hospitals with cases in the window) or 'decayed'
+        """
+        self._ensure_windows_fresh()
+        if window in (None, "all"):
+            rating_column, cases_column = "current_rating", "total_cases"
+        elif window == "decayed":
+            rating_column, cases_column = "decayed_rating", "total_cases"
+        elif window in {f"{days}d" for days in RATING_WINDOWS_DAYS}:
+            rating_column, cases_column = f"rating_{window}", f"cases_{window}"
+        else:
+            raise ValueError(f"Unknown rating window '{window}'")
+        cursor = self.db.connection().cursor()
+        
+        cursor.execute(f'''
             SELECT name, current_rating, total_cases, successful_outcomes,
-                   total_response_time_minutes, address, phone
+                   total_response_time_minutes, address, phone, {rating_column}
             FROM hospitals
-            WHERE total_cases > 0
-            ORDER BY current_rating DESC, total_cases DESC
+            WHERE {cases_column} > 0
+            ORDER BY {rating_column} DESC, {cases_column} DESC
             LIMIT ?
         ''', (limit,))
         
         results = []
         for row in cursor.fetchall():
-            name, rating, cases, successful, total_time, address, phone = row
+            name, rating, cases, successful, total_time, address, phone, window_rating = row
             avg_response_time = (total_time / cases) if cases > 0 else 0.0
             success_rate = (successful / cases * 100) if cases > 0 else 0.0
             
-            results.append({
+            entry = {
                 "hospital_name": name,
                 "address": address,
                 "phone": phone,
@@ -338,9 +870,11 @@ class HospitalRatingSystem:
                 "total_cases": cases,
                 "success_rate_percent": round(success_rate, 2),
                 "average_response_time_minutes": round(avg_response_time, 2)
-            })
+            }
+            if rating_column != "current_rating":
+                entry["window_rating"] = window_rating
+            results.append(entry)
         
-        conn.close()
         return results
     
     def update_rating_manually(self, hospital_name: str, new_rating: float, 
@@ -348,37 +882,43 @@ class HospitalRatingSystem:
         """
         Manually update hospital rating (for admin use)
         Rating changes are still tracked in history
+        In write-behind mode the update is queued (unknown hospitals are skipped
+        when it is applied)
         """
-        hospital_id = self.get_hospital_id(hospital_name)
-        if not hospital_id:
-            return False
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        if self.writer:
+            self.writer.submit("rating", (hospital_name, new_rating, reason))
+            return True
         
+        conn = self.db.connection()
         try:
-            # Get old rating
-            cursor.execute('SELECT current_rating FROM hospitals WHERE id = ?', (hospital_id,))
-            old_rating = cursor.fetchone()[0]
-            
-            # Update rating
-            cursor.execute('''
-                UPDATE hospitals SET current_rating = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (new_rating, hospital_id))
-            
-            # Record in history
-            cursor.execute('''
-                INSERT INTO rating_history (hospital_id, old_rating, new_rating, reason)
-                VALUES (?, ?, ?, ?)
-            ''', (hospital_id, old_rating, new_rating, reason or "Manual update"))
-            
+            updated = self._set_rating(conn.cursor(), hospital_name, new_rating, reason)
             conn.commit()
-            return True
+            self.cache.invalidate(hospital_name)
+            return updated
         except Exception as e:
             print(f"Error updating rating: {e}")
             conn.rollback()
             return False
-        finally:
-            conn.close()
+    
+    def _set_rating(self, cursor: sqlite3.Cursor, hospital_name: str, new_rating: float,
+                    reason: str = "") -> bool:
+        """Set a rating and record it in history (inside the caller's transaction)"""
+        cursor.execute('SELECT id, current_rating FROM hospitals WHERE name = ?', (hospital_name,))
+        row = cursor.fetchone()
+        if not row:
+            return False
+        hospital_id, old_rating = row
+        
+        # Update rating
+        cursor.execute('''
+            UPDATE hospitals SET current_rating = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (new_rating, hospital_id))
+        
+        # Record in history
+        cursor.execute('''
+            INSERT INTO rating_history (hospital_id, old_rating, new_rating, reason)
+            VALUES (?, ?, ?, ?)
+        ''', (hospital_id, old_rating, new_rating, reason or "Manual update"))
+        return True
 
@@ -0,0 +1,350 @@
+"""
+Incident Event Store
+Every confirmed detection and dispatch goes into the `accidents` table of
+accident_logs.db, so incidents can be queried without globbing
+api_data/emergency_response_*.json:
+- Writes are queued and committed in batched transactions by a background
+  writer (db_connections.BackgroundWriter); flush() is the durability barrier
+- One row per incident, keyed by accident_id: the detection inserts it, the
+  dispatch and later status changes update it
+- Indexed by timestamp, status and a spatial grid cell (GRID_CELL_DEG degrees),
+  so time-range, bounding-box and status queries stay in the milliseconds over
+  years of incidents
+
+Usage:
+    store = get_incident_store()
+    store.record_detection("accident_20260104_074914", 13.074, 80.24, confidence=0.8,
+                           image_path="accident_photos/accident_20260104_074914.jpg")
+    store.record_dispatch(response, report_path="api_data/emergency_response_....json")
+    store.update_status("accident_20260104_074914", "notified", emergency_services_notified=True)
+    incidents = store.query(start=datetime(2026, 1, 1), bbox=(13.0, 80.2, 13.1, 80.3),
+                            status="dispatched")
+"""
+
+import math
+import os
+import sqlite3
+import threading
+from itertools import groupby
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+from db_connections import DEFAULT_FLUSH_INTERVAL_S, BackgroundWriter, get_connection_manager
+
+DEFAULT_DB_PATH = "accident_logs.db"
+
+# Spatial grid: cells of GRID_CELL_DEG x GRID_CELL_DEG degrees (~1.1 km at the
+# equator), numbered row by row so one latitude row is a contiguous id range
+GRID_CELL_DEG = 0.01
+GRID_COLS = int(round(360 / GRID_CELL_DEG))
+# Bounding boxes covering up to this many cells are searched cell by cell on the
+# (grid_cell, timestamp) index; larger ones are filtered by lat/lon only
+MAX_GRID_CELLS = 4096
+
+# Columns added to the original accidents table
+INCIDENT_COLUMNS = (
+    ("accident_id", "TEXT"),
+    ("grid_cell", "INTEGER"),
+    ("hospital_name", "TEXT"),
+    ("eta_minutes", "REAL"),
+    ("distance_km", "REAL"),
+    ("map_path", "TEXT"),
+    ("dispatched_at", "TEXT"),
+)
+
+TimeBound = Union[datetime, str, None]
+
+
+def grid_row(latitude: float) -> int:
+    """Grid row of a latitude"""
+    return int(math.floor((latitude + 90.0) / GRID_CELL_DEG))
+
+
+def grid_col(longitude: float) -> int:
+    """Grid column of a longitude"""
+    return int(math.floor((longitude + 180.0) / GRID_CELL_DEG)) % GRID_COLS
+
+
+def grid_cell(latitude: Optional[float], longitude: Optional[float]) -> Optional[int]:
+    """Spatial grid cell id of a location (None without coordinates)"""
+    if latitude is None or longitude is None:
+        return None
+    return grid_row(latitude) * GRID_COLS + grid_col(longitude)
+
+
+def _time_bound(value: TimeBound) -> Optional[str]:
+    """Timestamps are stored as ISO strings (local time, as datetime.now().isoformat())"""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class IncidentWriter(BackgroundWriter):
+    """
+    Background writer for the accidents table
+    Writes: 'detection' and 'dispatch' (row dicts, upserted by accident_id),
+    'status' ((accident_id, status, emergency_services_notified))
+    """
+
+    def _apply(self, cursor: sqlite3.Cursor, writes: List[Tuple[str, object]]):
+        # Runs of the same kind share one executemany (order between runs is kept)
+        for kind, run in groupby(writes, key=lambda write: write[0]):
+            payloads = [payload for _, payload in run]
+            if kind == "detection":
+                cursor.executemany('''
+                    INSERT INTO accidents
+                    (accident_id, timestamp, location_name, latitude, longitude, grid_cell,
+                     confidence, image_path, status)
+                    VALUES (:accident_id, :timestamp, :location_name, :latitude, :longitude,
+                            :grid_cell, :confidence, :image_path, 'detected')
+                    ON CONFLICT (accident_id) DO UPDATE SET
+                        location_name = COALESCE(excluded.location_name, location_name),
+                        confidence = COALESCE(excluded.confidence, confidence),
+                        image_path = COALESCE(excluded.image_path, image_path)
+                ''', payloads)
+            elif kind == "dispatch":
+                cursor.executemany('''
+                    INSERT INTO accidents
+                    (accident_id, timestamp, latitude, longitude, grid_cell, status,
+                     hospital_name, eta_minutes, distance_km, map_path, report_path, dispatched_at)
+                    VALUES (:accident_id, :timestamp, :latitude, :longitude, :grid_cell, :status,
+                            :hospital_name, :eta_minutes, :distance_km, :map_path, :report_path,
+                            :dispatched_at)
+                    ON CONFLICT (accident_id) DO UPDATE SET
+                        status = excluded.status,
+                        hospital_name = excluded.hospital_name,
+                        eta_minutes = excluded.eta_minutes,
+                        distance_km = excluded.distance_km,
+                        map_path = COALESCE(excluded.map_path, map_path),
+                        report_path = COALESCE(excluded.report_path, report_path),
+                        dispatched_at = excluded.dispatched_at
+                ''', payloads)
+            elif kind == "status":
+                cursor.executemany('''
+                    UPDATE accidents
+                    SET status = COALESCE(?, status),
+                        emergency_services_notified = COALESCE(?, emergency_services_notified)
+                    WHERE accident_id = ?
+                ''', [(status, None if notified is None else int(notified), accident_id)
+                      for accident_id, status, notified in payloads])
+            else:
+                raise ValueError(f"Unknown incident write: {kind}")
+
+
+class IncidentStore:
+    """
+    Append and query incidents in accident_logs.db
+    Writes are queued (call flush() before reading your own writes)
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH,
+                 flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S):
+        """
+        Args:
+            db_path: SQLite database file (created if missing)
+            flush_interval_s: Longest a queued write waits to share a commit
+        """
+        self.db_path = db_path
+        self.db = get_connection_manager(db_path)
+        self.init_database()
+        self.writer = IncidentWriter(self.db, flush_interval_s, name="incident-writer")
+
+    def init_database(self):
+        """Create the accidents table if missing and add incident columns and indexes"""
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS accidents (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    location_name TEXT,
+                    latitude REAL,
+                    longitude REAL,
+                    confidence REAL,
+                    image_path TEXT,
+                    report_path TEXT,
+                    status TEXT DEFAULT 'pending',
+                    emergency_services_notified INTEGER DEFAULT 0,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('PRAGMA table_info(accidents)')
+            existing = {row[1] for row in cursor.fetchall()}
+            for column, decl in INCIDENT_COLUMNS:
+                if column not in existing:
+                    cursor.execute(f'ALTER TABLE accidents ADD COLUMN {column} {decl}')
+
+            # Grid cells of rows logged before the column existed
+            cursor.execute('''
+                SELECT id, latitude, longitude FROM accidents
+                WHERE grid_cell IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL
+            ''')
+            cursor.executemany('UPDATE accidents SET grid_cell = ? WHERE id = ?',
+                               [(grid_cell(lat, lon), row_id) for row_id, lat, lon in cursor.fetchall()])
+
+            cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_accidents_accident_id ON accidents(accident_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_accidents_timestamp ON accidents(timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_accidents_grid ON accidents(grid_cell, timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_accidents_status ON accidents(status, timestamp)')
+
+    # ------------------------------------------------------------------ writes
+
+    def record_detection(self, accident_id: str, latitude: float, longitude: float,
+                         confidence: Optional[float] = None, image_path: Optional[str] = None,
+                         location_name: Optional[str] = None,
+                         timestamp: Optional[datetime] = None):
+        """
+        Queue a confirmed detection (status 'detected')
+
+        Args:
+            accident_id: Incident identifier (as passed to handle_accident)
+            latitude, longitude: Accident location
+            confidence: Detection confidence
+            image_path: Saved frame
+            location_name: Camera / road name
+            timestamp: Detection time (default: now)
+        """
+        self.writer.submit("detection", {
+            "accident_id": accident_id,
+            "timestamp": (timestamp or datetime.now()).isoformat(),
+            "location_name": location_name,
+            "latitude": latitude,
+            "longitude": longitude,
+            "grid_cell": grid_cell(latitude, longitude),
+            "confidence": confidence,
+            "image_path": image_path,
+        })
+
+    def record_dispatch(self, response: dict, report_path: Optional[str] = None):
+        """
+        Queue a dispatch (status 'dispatched'), inserting the incident if it was not detected here
+
+        Args:
+            response: handle_accident response (successful)
+            report_path: Where the response report is written
+        """
+        location = response["accident_location"]
+        hospital = response["selected_hospital"]
+        route = response["route"]
+        self.writer.submit("dispatch", {
+            "accident_id": response["accident_id"],
+            "timestamp": response.get("timestamp") or datetime.now().isoformat(),
+            "latitude": location["latitude"],
+            "longitude": location["longitude"],
+            "grid_cell": grid_cell(location["latitude"], location["longitude"]),
+            "status": "dispatched",
+            "hospital_name": hospital["name"],
+            "eta_minutes": route.get("eta_minutes"),
+            "distance_km": route.get("distance_km"),
+            "map_path": response.get("map_file"),
+            "report_path": report_path,
+            "dispatched_at": route.get("dispatch_time"),
+        })
+
+    def update_status(self, accident_id: str, status: Optional[str] = None,
+                      emergency_services_notified: Optional[bool] = None):
+        """Queue a status change (e.g. 'notified', 'resolved') of a logged incident"""
+        self.writer.submit("status", (accident_id, status, emergency_services_notified))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued incident writes are committed"""
+        return self.writer.flush(timeout)
+
+    # ----------------------------------------------------------------- queries
+
+    def get(self, accident_id: str) -> Optional[Dict]:
+        """Incident by accident_id (committed writes only)"""
+        rows = self._select('accidents', 'WHERE accident_id = ?', [accident_id], "", 1)
+        return rows[0] if rows else None
+
+    def query(self, start: TimeBound = None, end: TimeBound = None,
+              bbox: Optional[Tuple[float, float, float, float]] = None,
+              status: Optional[str] = None, limit: Optional[int] = 1000,
+              newest_first: bool = True) -> List[Dict]:
+        """
+        Incidents matching all given filters
+
+        Args:
+            start, end: Time range [start, end) of the incident timestamp
+            bbox: (min_lat, min_lon, max_lat, max_lon); min_lon > max_lon is a box
+                  crossing the antimeridian
+            status: Incident status ('detected', 'dispatched', 'notified', ...)
+            limit: Maximum incidents returned (None: all)
+            newest_first: Order by timestamp descending
+
+        Returns:
+            List of incident dicts (accidents table columns)
+        """
+        source, where, params = self._filters(start, end, bbox, status)
+        order = f"ORDER BY timestamp {'DESC' if newest_first else 'ASC'}"
+        return self._select(source, where, params, order, limit)
+
+    def count_by_status(self, start: TimeBound = None, end: TimeBound = None,
+                        bbox: Optional[Tuple[float, float, float, float]] = None) -> Dict[str, int]:
+        """Number of incidents per status matching the filters"""
+        source, where, params = self._filters(start, end, bbox, None)
+        rows = self.db.connection().execute(
+            f'SELECT status, COUNT(*) FROM {source} {where} GROUP BY status', params).fetchall()
+        return dict(rows)
+
+    def _filters(self, start: TimeBound, end: TimeBound,
+                 bbox: Optional[Tuple[float, float, float, float]],
+                 status: Optional[str]) -> Tuple[str, str, list]:
+        """FROM source (with index hint), WHERE clause and parameters of a query"""
+        source, clauses, params = 'accidents', [], []
+        if start is not None:
+            clauses.append('timestamp >= ?')
+            params.append(_time_bound(start))
+        if end is not None:
+            clauses.append('timestamp < ?')
+            params.append(_time_bound(end))
+        if status is not None:
+            clauses.append('status = ?')
+            params.append(status)
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            if min_lat > max_lat:
+                raise ValueError(f"Bounding box min_lat {min_lat} is above max_lat {max_lat}")
+            row_lo, row_hi = grid_row(min_lat), grid_row(max_lat)
+            col_lo, col_hi = grid_col(min_lon), grid_col(max_lon)
+            # Column ranges wrap at the antimeridian (the box crosses it, or ends at 180)
+            cols = (list(range(col_lo, GRID_COLS)) + list(range(col_hi + 1)) if col_lo > col_hi
+                    else list(range(col_lo, col_hi + 1)))
+            if (row_hi - row_lo + 1) * len(cols) <= MAX_GRID_CELLS:
+                # One (grid_cell = c AND timestamp range) index seek per covered cell;
+                # the planner cannot estimate this, so the index is forced.
+                # Cell ids are computed integers, inlined to stay clear of parameter limits
+                cells = ", ".join(str(row * GRID_COLS + col)
+                                  for row in range(row_lo, row_hi + 1)
+                                  for col in cols)
+                source = 'accidents INDEXED BY idx_accidents_grid'
+                clauses.append(f'grid_cell IN ({cells})')
+            # Exact filter (cells overlap the box edges)
+            clauses.append('latitude BETWEEN ? AND ?')
+            if min_lon > max_lon:
+                clauses.append('(longitude >= ? OR longitude <= ?)')
+            else:
+                clauses.append('longitude BETWEEN ? AND ?')
+            params.extend((min_lat, max_lat, min_lon, max_lon))
+        return source, (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _select(self, source: str, where: str, params: list, order: str,
+                limit: Optional[int]) -> List[Dict]:
+        sql = f'SELECT * FROM {source} {where} {order}'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params = params + [limit]
+        cursor = self.db.connection().execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+_stores: Dict[str, IncidentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_incident_store(db_path: str = DEFAULT_DB_PATH) -> IncidentStore:
+    """Shared incident store (and writer thread) for a database file"""
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = IncidentStore(db_path)
+        return _stores[key]
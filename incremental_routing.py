@@ -0,0 +1,193 @@
+"""
+Incremental Route Repair (Lifelong Planning A*)
+Keeps the routes from a set of hospitals to one accident current while edge
+weights change (traffic updates, blocked road segments):
+- One LPA* search rooted at the accident on the reverse graph, so every
+  hospital route shares the same search state
+- update_edge() only re-examines nodes whose distance the change can affect;
+  an unrelated update costs a few heap operations instead of a new search
+- Routes are re-extracted only for hospitals whose cost or path changed
+
+The heuristic is zero (DynamicSWSF-FP form of LPA*), so repaired routes stay
+exactly shortest for arbitrary weight increases and decreases.
+
+Usage:
+    router = IncrementalRouter(csr, target=accident_idx, sources=hospital_idxs)
+    changed = router.update_edge(u, v, factor=3.0)      # congestion on u -> v
+    changed |= router.update_edge(x, y, blocked=True)    # road closed
+    path, cost = router.route(hospital_idx)
+"""
+
+from heapq import heappush, heappop
+from typing import Dict, List, Optional, Set, Tuple
+
+INF = float('inf')
+
+
+class IncrementalRouter:
+    """
+    LPA* over a CSRGraph for many sources -> one target
+
+    g[x]   = current distance estimate x -> target
+    rhs[x] = one-step lookahead: min over arcs x -> y of w + g[y]
+    A node is consistent when g == rhs; routes are read from consistent nodes
+    """
+
+    def __init__(self, csr, target: int, sources: List[int],
+                 weights: Optional[List[float]] = None):
+        """
+        Args:
+            csr: Compiled road network (csr_graph.CSRGraph)
+            target: Dense index of the accident node
+            sources: Dense indices of the hospital nodes
+            weights: Optional forward-arc costs (e.g. TravelTimeWeights.fwd(hour));
+                     default: edge lengths
+        """
+        self.csr = csr
+        self.target = target
+        self.sources = list(dict.fromkeys(sources))
+        self.base_weights = list(weights if weights is not None else csr._fwd[2])
+        self.weights = list(self.base_weights)
+        self.g: Dict[int, float] = {}
+        self.rhs: Dict[int, float] = {target: 0.0}
+        self._queued: Dict[int, float] = {}
+        self._heap: List[Tuple[float, int]] = []
+        self.expanded_nodes = 0  # Nodes expanded by the last compute()
+        self._push(target, 0.0)
+        self.compute()
+        self._routes = {source: self._extract(source) for source in self.sources}
+
+    # --------------------------------------------------------------- LPA* core
+
+    def _push(self, node: int, key: float):
+        self._queued[node] = key
+        heappush(self._heap, (key, node))
+
+    def _top_key(self) -> float:
+        while self._heap:
+            key, node = self._heap[0]
+            if self._queued.get(node) == key:
+                return key
+            heappop(self._heap)  # Stale entry
+        return INF
+
+    def _lookahead(self, node: int) -> float:
+        indptr, indices, _ = self.csr._fwd
+        g, weights = self.g, self.weights
+        best = INF
+        for k in range(indptr[node], indptr[node + 1]):
+            d = weights[k] + g.get(indices[k], INF)
+            if d < best:
+                best = d
+        return best
+
+    def _update_vertex(self, node: int):
+        if node != self.target:
+            self.rhs[node] = self._lookahead(node)
+        self._queued.pop(node, None)
+        g, rhs = self.g.get(node, INF), self.rhs.get(node, INF)
+        if g != rhs:
+            self._push(node, min(g, rhs))
+
+    def _goals_settled(self, top: float) -> bool:
+        for source in self.sources:
+            g, rhs = self.g.get(source, INF), self.rhs.get(source, INF)
+            if g != rhs or min(g, rhs) > top:
+                return False
+        return True
+
+    def compute(self):
+        """Process inconsistent nodes until every source is consistent and final"""
+        rev_indptr, rev_indices, _ = self.csr._rev
+        expanded = 0
+        while True:
+            top = self._top_key()
+            if top == INF or self._goals_settled(top):
+                break
+            _, node = heappop(self._heap)
+            del self._queued[node]
+            expanded += 1
+            g, rhs = self.g.get(node, INF), self.rhs.get(node, INF)
+            if g > rhs:
+                self.g[node] = rhs  # Overconsistent: distance decreased
+            else:
+                self.g[node] = INF  # Underconsistent: distance increased, re-derive
+                self._update_vertex(node)
+            # Nodes with an arc into `node` depend on g[node]
+            for k in range(rev_indptr[node], rev_indptr[node + 1]):
+                self._update_vertex(rev_indices[k])
+        self.expanded_nodes = expanded
+
+    # ------------------------------------------------------------------ routes
+
+    def _extract(self, source: int) -> Tuple[Optional[List[int]], float]:
+        cost = self.g.get(source, INF)
+        if cost == INF:
+            return (None, INF)
+        indptr, indices, _ = self.csr._fwd
+        path = [source]
+        node = source
+        while node != self.target:
+            best_k, best = -1, INF
+            for k in range(indptr[node], indptr[node + 1]):
+                d = self.weights[k] + self.g.get(indices[k], INF)
+                if d < best:
+                    best_k, best = k, d
+            node = indices[best_k]
+            path.append(node)
+        return (path, cost)
+
+    def route(self, source: int) -> Tuple[Optional[List[int]], float]:
+        """
+        Current route from a source to the target
+
+        Returns:
+            Tuple of (path as dense node indices, cost)
+            Returns (None, float('inf')) if the target is unreachable
+        """
+        if source not in self._routes:
+            raise KeyError(f"Node {source} is not an active source")
+        return self._routes[source]
+
+    def update_edge(self, u: int, v: int, weight: Optional[float] = None,
+                    factor: Optional[float] = None, blocked: bool = False) -> Set[int]:
+        """
+        Change the cost of every arc u -> v and repair the affected routes
+
+        Args:
+            u, v: Dense node indices of the road segment
+            weight: New absolute cost
+            factor: New cost as a multiple of the original cost (1.0 restores it)
+            blocked: Close the segment (infinite cost)
+
+        Returns:
+            Set of sources whose path changed
+        """
+        return self.update_edges([(u, v, weight, factor, blocked)])
+
+    def update_edges(self, updates: List[Tuple[int, int, Optional[float], Optional[float], bool]]) -> Set[int]:
+        """Apply several (u, v, weight, factor, blocked) updates with a single repair"""
+        indptr, indices, _ = self.csr._fwd
+        touched = set()
+        for u, v, weight, factor, blocked in updates:
+            for k in range(indptr[u], indptr[u + 1]):
+                if indices[k] != v:
+                    continue
+                if blocked:
+                    self.weights[k] = INF
+                elif weight is not None:
+                    self.weights[k] = float(weight)
+                else:
+                    self.weights[k] = self.base_weights[k] * (1.0 if factor is None else factor)
+                touched.add(u)
+        for u in touched:
+            self._update_vertex(u)
+        self.compute()
+
+        changed = set()
+        for source in self.sources:
+            route = self._extract(source)
+            if route[0] != self._routes[source][0]:
+                changed.add(source)
+            self._routes[source] = route
+        return changed
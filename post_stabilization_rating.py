@@ -4,10 +4,18 @@ After the patient is stabilized and life is saved, generate rating based on:
 - Response speed (response_time_minutes)
 - Treatment outcome (successful / partial / unsuccessful)
 - Patient feedback (quality_score 0-100, treatment_notes)
+
+Daily outcome exports from hospitals (CSV, JSONL or a JSON array, with the same
+field names) are ingested in one transaction:
+    python post_stabilization_rating.py --ingest outcomes_2026-01-30.csv
 """
 
+import csv
+import json
 import sys
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
 
 ROOT = Path(__file__).resolve().parent
 if str(ROOT) not in sys.path:
@@ -34,18 +42,19 @@ def record_outcome_and_update_rating(
         response_time_minutes: Time from alert to treatment (response speed)
         treatment_notes: Optional patient feedback text
     """
-    from emergency_response_system import EmergencyResponseSystem
-    system = EmergencyResponseSystem(use_t_nagar_24x7=True)
-    ok = system.record_treatment_outcome(
-        accident_id=accident_id,
+    # Only the rating store is needed (no route finder / map generator setup)
+    from hospital_rating_system import HospitalRatingSystem
+    rating_system = HospitalRatingSystem()
+    ok = rating_system.record_case_outcome(
         hospital_name=hospital_name,
+        accident_id=accident_id,
         patient_outcome=patient_outcome,
         quality_score=quality_score,
         response_time_minutes=response_time_minutes,
         treatment_notes=treatment_notes,
     )
     if ok:
-        report = system.get_hospital_performance_report(hospital_name)
+        report = rating_system.get_hospital_rating(hospital_name)
         print("Updated hospital rating:")
         print("  Star rating:", report.get("current_rating"))
         print("  Success rate:", report.get("success_rate_percent"), "%")
@@ -53,10 +62,92 @@ def record_outcome_and_update_rating(
     return ok
 
 
+OUTCOME_FIELDS = ("accident_id", "hospital_name", "patient_outcome", "quality_score",
+                  "response_time_minutes", "treatment_notes", "created_at")
+
+
+def _parse_outcome(record: Union[Dict, str]) -> Dict:
+    """Normalize one exported outcome record or JSONL line (raises ValueError/KeyError if invalid)"""
+    if isinstance(record, str):
+        record = json.loads(record)  # JSONDecodeError is a ValueError
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    outcome = {key: record.get(key) for key in OUTCOME_FIELDS}
+    if not outcome["hospital_name"] or not outcome["accident_id"]:
+        raise ValueError("hospital_name and accident_id are required")
+    outcome["patient_outcome"] = str(outcome["patient_outcome"] or "").strip().lower()
+    if outcome["patient_outcome"] not in ("successful", "partial", "unsuccessful"):
+        raise ValueError(f"invalid patient_outcome '{outcome['patient_outcome']}'")
+    for key in ("quality_score", "response_time_minutes"):
+        value = outcome[key]
+        outcome[key] = float(value) if value not in (None, "") else None
+    outcome["treatment_notes"] = outcome["treatment_notes"] or ""
+    outcome["created_at"] = outcome["created_at"] or None
+    if outcome["created_at"]:
+        datetime.fromisoformat(str(outcome["created_at"]))  # Rejected here rather than failing the batch
+    return outcome
+
+
+def read_outcomes(path: str) -> Iterator[Tuple[int, Union[Dict, str]]]:
+    """
+    Yield (line number, raw record) from a CSV (row dict), JSONL (line text) or
+    JSON (array element; numbered from 1 instead of a line) outcome export
+    """
+    suffix = Path(path).suffix.lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if suffix == ".json":
+            records = json.load(f)
+            if not isinstance(records, list):
+                raise ValueError(f"{path}: expected a JSON array of outcome records")
+            yield from enumerate(records, 1)
+        elif suffix in (".jsonl", ".ndjson"):
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_no, line
+        else:
+            for line_no, record in enumerate(csv.DictReader(f), 2):
+                yield line_no, record
+
+
+def ingest_outcomes(path: str, db_path: str = "hospital_ratings.db") -> Dict:
+    """
+    Ingest an outcome export in one transaction; each hospital's rating is
+    recomputed once at the end
+
+    Args:
+        path: CSV, JSONL or JSON array file with the OUTCOME_FIELDS columns
+        db_path: Rating database
+
+    Returns:
+        {"recorded": n, "skipped": [(line number, error), ...], "hospitals": n}
+    """
+    from hospital_rating_system import HospitalRatingSystem
+    outcomes: List[Dict] = []
+    skipped = []
+    for line_no, record in read_outcomes(path):
+        try:
+            outcomes.append(_parse_outcome(record))
+        except (ValueError, KeyError, TypeError) as e:
+            skipped.append((line_no, str(e)))
+    recorded = HospitalRatingSystem(db_path).record_case_outcomes(outcomes)
+    return {
+        "recorded": recorded,
+        "skipped": skipped,
+        "hospitals": len({o["hospital_name"] for o in outcomes}) if recorded else 0,
+    }
+
+
 if __name__ == "__main__":
     # Example: after patient stabilized
     # python post_stabilization_rating.py accident_20260130_115150 "SIMS Hospitals" successful 85 12 "Quick and effective."
-    if len(sys.argv) >= 6:
+    if len(sys.argv) >= 3 and sys.argv[1] == "--ingest":
+        for path in sys.argv[2:]:
+            result = ingest_outcomes(path)
+            print(f"{path}: {result['recorded']} outcomes recorded for {result['hospitals']} hospitals, "
+                  f"{len(result['skipped'])} skipped")
+            for line_no, error in result["skipped"][:10]:
+                print(f"  line {line_no}: {error}")
+    elif len(sys.argv) >= 6:
         accident_id = sys.argv[1]
         hospital_name = sys.argv[2]
         patient_outcome = sys.argv[3]  # successful | partial | unsuccessful
@@ -69,3 +160,4 @@ if __name__ == "__main__":
         )
     else:
         print("Usage: python post_stabilization_rating.py <accident_id> <hospital_name> <successful|partial|unsuccessful> <quality_score 0-100> <response_time_minutes> [treatment_notes]")
+        print("       python post_stabilization_rating.py --ingest <outcomes.csv|outcomes.jsonl|outcomes.json> [...]")
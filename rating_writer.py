@@ -0,0 +1,88 @@
+"""
+Write-Behind Rating Writer
+Moves rating-store writes (hospital registrations, case outcomes, manual
+rating changes) off the detection/dispatch threads. One writer thread per
+database file (db_connections.BackgroundWriter) commits them in coalesced
+transactions; flush() is the durability barrier.
+
+Consecutive outcomes in a batch are recorded like record_case_outcomes():
+ratings are recalculated (and rating changes logged) once per hospital per commit.
+
+Usage:
+    rating_system = HospitalRatingSystem(write_behind=True)
+    rating_system.register_hospital("Apollo Hospital")   # queued, returns None
+    rating_system.record_case_outcome(...)               # queued, returns True
+    rating_system.flush()                                # committed
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+from db_connections import DEFAULT_FLUSH_INTERVAL_S, MAX_BATCH_WRITES, BackgroundWriter
+
+
+class RatingWriter(BackgroundWriter):
+    """
+    Background writer thread for one rating database
+    Writes are (kind, payload) tuples applied by the owning HospitalRatingSystem:
+    'register' -> _register(), 'outcomes' -> _write_outcome_rows(), 'rating' -> _set_rating(),
+    'windows' -> refresh_windowed_ratings() (daily slide of every hospital's windows)
+    """
+
+    def __init__(self, rating_system, flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+                 max_batch: int = MAX_BATCH_WRITES):
+        """
+        Args:
+            rating_system: HospitalRatingSystem whose connection manager and cache are used
+            flush_interval_s: Longest a write waits for more writes to share its commit
+            max_batch: Maximum writes per transaction
+        """
+        self.rating_system = rating_system
+        super().__init__(rating_system.db, flush_interval_s, max_batch, name="rating-writer")
+
+    def _apply(self, cursor: sqlite3.Cursor, writes: List[Tuple[str, object]]) -> set:
+        """Apply writes in order, returning the hospitals touched (None: all)"""
+        system = self.rating_system
+        names = set()
+        outcome_rows = []
+        for kind, payload in writes + [("end", None)]:
+            # Consecutive outcome writes share one bulk insert
+            if kind == "outcomes":
+                outcome_rows.extend(payload)
+                continue
+            if outcome_rows:
+                names.update(system._write_outcome_rows(cursor, outcome_rows))
+                outcome_rows = []
+            if kind == "register":
+                system._register(cursor, *payload)
+                names.add(payload[0])
+            elif kind == "rating":
+                if system._set_rating(cursor, *payload):
+                    names.add(payload[0])
+            elif kind == "windows":
+                system.refresh_windowed_ratings(None, cursor)
+                names.add(None)  # Every hospital: cache.invalidate(None) clears all
+            elif kind != "end":
+                raise ValueError(f"Unknown rating write: {kind}")
+        return names
+
+    def _committed(self, names: set):
+        cache = self.rating_system.cache
+        for name in names:
+            cache.invalidate(name)
+
+
+_writers: Dict[str, RatingWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_rating_writer(rating_system, flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S) -> RatingWriter:
+    """Shared writer thread for the rating system's database file (one per process)"""
+    key = os.path.abspath(rating_system.db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer.closed:
+            writer = _writers[key] = RatingWriter(rating_system, flush_interval_s)
+        return writer
@@ -0,0 +1,408 @@
+"""
+Emergency Response Sinks
+Where handle_accident responses are persisted, off the alert latency budget:
+- JsonlSink (default): one compact JSON line per response appended to
+  api_data/emergency_responses.jsonl. The line reaches the OS before write()
+  returns, and a background thread fsyncs every fsync_interval_s (or after
+  fsync_every lines), so no alert waits on an fsync
+- Periodic compaction: the log is rotated and the rotated segment converted
+  into a Parquet file (one row per response, flat analytics columns plus the
+  full response JSON), then deleted. Needs pyarrow; without it the JSONL log
+  simply keeps growing
+- Several processes may share one log: appends and rotation are serialized by
+  an OS file lock (<log>.lock), and writers reopen the log after another
+  process rotated it (POSIX only; without fcntl use one log per process)
+- JsonFileSink: the previous one pretty-printed emergency_response_<id>.json per
+  alert, now optional
+- MultiSink: fan-out to several sinks
+
+Usage:
+    sink = get_jsonl_sink()                  # shared per log file
+    sink.write(response, response["accident_id"])
+    sink.flush()                             # durability barrier (fsync)
+    sink.compact()                           # rotate + Parquet now
+    response = find_response("accident_20260104_074914")
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+DEFAULT_LOG_PATH = os.path.join("api_data", "emergency_responses.jsonl")
+FSYNC_INTERVAL_S = 1.0
+FSYNC_EVERY = 64
+COMPACT_INTERVAL_S = 3600.0
+
+
+class ResponseSink:
+    """Interface of response sinks"""
+
+    def write(self, response: dict, name: str) -> Optional[str]:
+        """
+        Persist one response (or batch) record
+
+        Args:
+            response: handle_accident / handle_accidents_batch result
+            name: Record name (accident_id or batch_id)
+
+        Returns:
+            Path the record was written to
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """Make every written record durable"""
+
+    def close(self):
+        """Flush and release resources"""
+        self.flush()
+
+
+class JsonFileSink(ResponseSink):
+    """One pretty-printed api_data/emergency_response_<name>.json per record"""
+
+    def __init__(self, directory: str = "api_data"):
+        self.directory = directory
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"emergency_response_{name}.json")
+
+    def write(self, response: dict, name: str) -> Optional[str]:
+        path = self.path(name)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(response, f, indent=2, ensure_ascii=False)
+        return path
+
+
+class MultiSink(ResponseSink):
+    """Writes every record to several sinks (returns the first sink's path)"""
+
+    def __init__(self, sinks: List[ResponseSink]):
+        self.sinks = list(sinks)
+
+    def write(self, response: dict, name: str) -> Optional[str]:
+        paths = [sink.write(response, name) for sink in self.sinks]
+        return paths[0] if paths else None
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class JsonlSink(ResponseSink):
+    """
+    Append-only JSONL response log with batched fsync and periodic Parquet compaction
+    Thread-safe; one instance per log file (see get_jsonl_sink)
+    """
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH, fsync_interval_s: float = FSYNC_INTERVAL_S,
+                 fsync_every: int = FSYNC_EVERY, compact_interval_s: Optional[float] = COMPACT_INTERVAL_S):
+        """
+        Args:
+            path: JSONL log file
+            fsync_interval_s: Longest a written line waits for its fsync
+            fsync_every: Pending lines that trigger an early fsync
+            compact_interval_s: Seconds between compactions into Parquet (None: only compact() calls)
+        """
+        self.path = path
+        self.fsync_interval_s = fsync_interval_s
+        self.fsync_every = fsync_every
+        self.compact_interval_s = compact_interval_s
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._file = None
+        self._lock_files = {}
+        self._unsynced = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self.fsyncs = 0
+        self._thread = threading.Thread(target=self._run, name="response-log-sync", daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        if self._file is not None and self._rotated():
+            # Another process rotated the log: our lines so far are in its segment
+            self._sync()
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+    
+    def _rotated(self) -> bool:
+        try:
+            return not os.path.samestat(os.fstat(self._file.fileno()), os.stat(self.path))
+        except FileNotFoundError:
+            return True
+    
+    @contextmanager
+    def _file_lock(self, suffix: str, exclusive: bool = False):
+        """Inter-process lock on <log><suffix> (no-op without fcntl)"""
+        if fcntl is None:
+            yield
+            return
+        lock_file = self._lock_files.get(suffix)
+        if lock_file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            lock_file = self._lock_files[suffix] = open(self.path + suffix, 'a')
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def write(self, response: dict, name: str) -> Optional[str]:
+        line = json.dumps(response, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Response log is closed")
+            with self._file_lock(".lock"):
+                f = self._open()
+                f.write(line)
+                f.flush()  # In the OS page cache: survives a process crash
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                self._wake.set()
+        return self.path
+
+    def flush(self):
+        """fsync the log now"""
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self.fsyncs += 1
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._sync()
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for lock_file in self._lock_files.values():
+                lock_file.close()
+            self._lock_files.clear()
+        self._wake.set()
+
+    def _run(self):
+        last_compact = time.monotonic()
+        while not self._closed:
+            self._wake.wait(self.fsync_interval_s)
+            self._wake.clear()
+            with self._lock:
+                if self._closed:
+                    return
+                self._sync()
+            if (self.compact_interval_s is not None and pq is not None
+                    and time.monotonic() - last_compact >= self.compact_interval_s):
+                last_compact = time.monotonic()
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"⚠️ Response log compaction failed: {e}")
+
+    # -------------------------------------------------------------- compaction
+
+    def compact(self) -> Optional[str]:
+        """
+        Rotate the log and convert every rotated segment into Parquet
+
+        Returns:
+            Path of the last Parquet file written (None if nothing to compact or
+            pyarrow is not installed)
+        """
+        if pq is None:
+            return None
+        with self._compact_lock, self._file_lock(".compact.lock", exclusive=True):
+            return self._compact()
+
+    def _compact(self) -> Optional[str]:
+        # No process appends while the log is renamed; they reopen it afterwards
+        with self._lock, self._file_lock(".lock", exclusive=True):
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                if self._file is not None:
+                    self._sync()
+                    self._file.close()
+                    self._file = None
+                os.replace(self.path, self._segment_path())
+
+        written = None
+        base, _ = os.path.splitext(self.path)
+        for segment in sorted(glob.glob(f"{glob.escape(base)}-*.jsonl")):
+            rows = [row for record in _read_jsonl(segment) for row in flatten_response(record)]
+            parquet_path = os.path.splitext(segment)[0] + ".parquet"
+            if rows:
+                pq.write_table(pa.Table.from_pylist(rows, schema=PARQUET_SCHEMA),
+                               parquet_path + ".tmp", compression="zstd")
+                os.replace(parquet_path + ".tmp", parquet_path)
+                written = parquet_path
+            os.remove(segment)
+        return written
+
+    def _segment_path(self) -> str:
+        base, _ = os.path.splitext(self.path)
+        return f"{base}-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}.jsonl"
+
+
+# ------------------------------------------------------------------ analytics
+
+# Flat columns of compacted responses (batches contribute one row per response)
+PARQUET_SCHEMA = pa.schema([
+    ("accident_id", pa.string()),
+    ("batch_id", pa.string()),
+    ("success", pa.bool_()),
+    ("timestamp", pa.string()),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    ("hospital_name", pa.string()),
+    ("hospital_latitude", pa.float64()),
+    ("hospital_longitude", pa.float64()),
+    ("star_rating", pa.float64()),
+    ("distance_km", pa.float64()),
+    ("eta_minutes", pa.float64()),
+    ("dispatch_time", pa.string()),
+    ("map_file", pa.string()),
+    ("over_capacity", pa.bool_()),
+    ("error", pa.string()),
+    ("response_json", pa.string()),
+]) if pa is not None else None
+
+
+def flatten_response(record: dict) -> List[Dict]:
+    """Analytics rows of a logged record (a response, or a batch of responses)"""
+    if "responses" in record:
+        rows = []
+        for response in record["responses"]:
+            rows.extend(flatten_response({**response, "batch_id": record.get("batch_id")}))
+        return rows
+    location = record.get("accident_location") or {}
+    hospital = record.get("selected_hospital") or {}
+    route = record.get("route") or {}
+    return [{
+        "accident_id": record.get("accident_id"),
+        "batch_id": record.get("batch_id"),
+        "success": record.get("success"),
+        "timestamp": record.get("timestamp"),
+        "latitude": location.get("latitude"),
+        "longitude": location.get("longitude"),
+        "hospital_name": hospital.get("name"),
+        "hospital_latitude": hospital.get("latitude"),
+        "hospital_longitude": hospital.get("longitude"),
+        "star_rating": hospital.get("star_rating"),
+        "distance_km": route.get("distance_km"),
+        "eta_minutes": route.get("eta_minutes"),
+        "dispatch_time": route.get("dispatch_time"),
+        "map_file": record.get("map_file"),
+        "over_capacity": record.get("over_capacity"),
+        "error": record.get("error"),
+        "response_json": json.dumps(record, ensure_ascii=False, separators=(",", ":")),
+    }]
+
+
+def _read_jsonl(path: str) -> Iterator[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line after a crash
+
+
+def read_responses(log_path: str = DEFAULT_LOG_PATH) -> Iterator[dict]:
+    """
+    Every logged response, oldest first: compacted Parquet files, rotated
+    segments, then the live log (batches are expanded into their responses)
+    """
+    base, _ = os.path.splitext(log_path)
+    if pq is not None:
+        for parquet_path in sorted(glob.glob(f"{glob.escape(base)}-*.parquet")):
+            for value in pq.read_table(parquet_path, columns=["response_json"]).column(0).to_pylist():
+                yield json.loads(value)
+    paths = sorted(glob.glob(f"{glob.escape(base)}-*.jsonl"))
+    if os.path.exists(log_path):
+        paths.append(log_path)
+    for path in paths:
+        for record in _read_jsonl(path):
+            if "responses" in record:
+                for response in record["responses"]:
+                    yield {**response, "batch_id": record.get("batch_id")}
+            else:
+                yield record
+
+
+def find_response(accident_id: str, log_path: str = DEFAULT_LOG_PATH) -> Optional[dict]:
+    """Latest logged response of an accident (None if not logged)"""
+    base, _ = os.path.splitext(log_path)
+    # JSONL (newest records) first, then Parquet files newest first (accident_id filter)
+    paths = sorted(glob.glob(f"{glob.escape(base)}-*.jsonl"))
+    if os.path.exists(log_path):
+        paths.append(log_path)
+    found = None
+    for path in paths:
+        for record in _read_jsonl(path):
+            for response in record.get("responses", [record]):
+                if response.get("accident_id") == accident_id:
+                    found = {**response, "batch_id": record["batch_id"]} if "responses" in record else response
+    if found is not None or pq is None:
+        return found
+    for parquet_path in sorted(glob.glob(f"{glob.escape(base)}-*.parquet"), reverse=True):
+        values = pq.read_table(parquet_path, columns=["response_json"],
+                               filters=[("accident_id", "=", accident_id)]).column(0).to_pylist()
+        if values:
+            return json.loads(values[-1])
+    return None
+
+
+_sinks: Dict[str, JsonlSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_jsonl_sink(path: str = DEFAULT_LOG_PATH) -> JsonlSink:
+    """Shared JSONL sink for a log file (one writer per process; processes share it via file locks)"""
+    key = os.path.abspath(path)
+    with _sinks_lock:
+        if key not in _sinks or _sinks[key]._closed:
+            _sinks[key] = JsonlSink(path)
+        return _sinks[key]
+
+
+@atexit.register
+def close_sinks():
+    """fsync and close every shared sink"""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+    for sink in sinks:
+        sink.close()
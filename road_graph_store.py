@@ -0,0 +1,299 @@
+"""
+Offline Road Graph Store
+Serializes OSM drive networks into flat NumPy arrays on disk so the route
+finder can memory-map them at startup instead of downloading from OSM.
+
+Layout (one directory per stored graph):
+    road_graphs/<name>/meta.json        center, radius, bbox, counts
+    road_graphs/<name>/node_ids.npy     OSM node IDs (int64)
+    road_graphs/<name>/node_y.npy       latitudes (float64)
+    road_graphs/<name>/node_x.npy       longitudes (float64)
+    road_graphs/<name>/edge_u.npy       source node index (int32), sorted
+    road_graphs/<name>/edge_v.npy       target node index (int32)
+    road_graphs/<name>/edge_length.npy  edge length in meters (float32)
+    road_graphs/<name>/edge_class.npy   road class code (uint8, speed_profiles; optional)
+
+Build once (needs internet), then routing works offline:
+    python road_graph_store.py --build
+    python road_graph_store.py --build --name chennai --lat 13.08 --lon 80.23 --radius 15000
+    python road_graph_store.py --list
+"""
+
+import argparse
+import json
+import math
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from speed_profiles import road_class_code
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_STORE_DIR = ROOT / "road_graphs"
+FORMAT_VERSION = 1
+
+# Chennai / T. Nagar drive network: covers the T. Nagar 24x7 dataset and the default accident location
+DEFAULT_GRAPH_NAME = "chennai_t_nagar"
+DEFAULT_CENTER_LAT = 13.0550
+DEFAULT_CENTER_LON = 80.2350
+DEFAULT_RADIUS_M = 10000
+
+
+def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great circle distance between two points in meters"""
+    R = 6371000.0
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (math.sin(d_lat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(d_lon / 2) ** 2)
+    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class StoredRoadGraph:
+    """
+    Road network loaded from the store
+    Arrays are memory-mapped, so opening a graph costs milliseconds; the
+    networkx view is only materialized on first use and then reused
+    """
+
+    def __init__(self, path: Path, mmap: bool = True):
+        self.path = Path(path)
+        with open(self.path / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        mode = "r" if mmap else None
+        self.node_ids = np.load(self.path / "node_ids.npy", mmap_mode=mode)
+        self.node_y = np.load(self.path / "node_y.npy", mmap_mode=mode)
+        self.node_x = np.load(self.path / "node_x.npy", mmap_mode=mode)
+        self.edge_u = np.load(self.path / "edge_u.npy", mmap_mode=mode)
+        self.edge_v = np.load(self.path / "edge_v.npy", mmap_mode=mode)
+        self.edge_length = np.load(self.path / "edge_length.npy", mmap_mode=mode)
+        # Graphs stored before road classes were recorded have no class array
+        class_path = self.path / "edge_class.npy"
+        self.edge_class = np.load(class_path, mmap_mode=mode) if class_path.exists() else None
+        self._nx_graph = None
+
+    @property
+    def name(self) -> str:
+        return self.meta["name"]
+
+    @property
+    def num_nodes(self) -> int:
+        return int(self.meta["num_nodes"])
+
+    @property
+    def num_edges(self) -> int:
+        return int(self.meta["num_edges"])
+
+    def covers(self, center_lat: float, center_lon: float, radius_m: float) -> bool:
+        """True if the circle (center, radius_m) lies inside the stored area"""
+        offset = _haversine_m(center_lat, center_lon,
+                              self.meta["center_lat"], self.meta["center_lon"])
+        return offset + radius_m <= self.meta["radius_m"]
+
+    def to_networkx(self) -> nx.MultiDiGraph:
+        """Materialize an OSMnx-compatible MultiDiGraph (cached after first call)"""
+        if self._nx_graph is not None:
+            return self._nx_graph
+
+        G = nx.MultiDiGraph(crs=self.meta.get("crs", "epsg:4326"), name=self.name)
+        node_ids = self.node_ids.tolist()
+        G.add_nodes_from(
+            (nid, {"y": y, "x": x})
+            for nid, y, x in zip(node_ids, self.node_y.tolist(), self.node_x.tolist())
+        )
+        G.add_edges_from(
+            (node_ids[u], node_ids[v], {"length": length})
+            for u, v, length in zip(self.edge_u.tolist(), self.edge_v.tolist(),
+                                    self.edge_length.tolist())
+        )
+        self._nx_graph = G
+        return G
+
+
+class RoadGraphStore:
+    """
+    Directory of serialized road graphs
+    Graphs are written once by the build command and opened read-only afterwards
+    """
+
+    def __init__(self, store_dir: Optional[str] = None):
+        self.store_dir = Path(store_dir) if store_dir else DEFAULT_STORE_DIR
+        self._loaded: Dict[str, StoredRoadGraph] = {}
+        # (store directory mtime, metadata): save() swaps whole graph directories,
+        # which changes the store directory's mtime
+        self._listing: Optional[Tuple[int, List[Dict]]] = None
+
+    def list_graphs(self) -> List[Dict]:
+        """Metadata of every graph in the store (re-read only when the store changed)"""
+        try:
+            mtime = self.store_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if self._listing is not None and self._listing[0] == mtime:
+            return list(self._listing[1])
+        graphs = []
+        for meta_path in sorted(self.store_dir.glob("*/meta.json")):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    graphs.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        # Graphs rebuilt (or removed) since they were opened are reopened on next load()
+        created = {meta.get("name"): meta.get("created_at") for meta in graphs}
+        for name in [name for name, graph in self._loaded.items()
+                     if created.get(name) != graph.meta.get("created_at")]:
+            del self._loaded[name]
+        self._listing = (mtime, graphs)
+        return list(graphs)
+
+    def load(self, name: str) -> Optional[StoredRoadGraph]:
+        """Open a stored graph by name (memory-mapped), or None if missing"""
+        if name in self._loaded:
+            return self._loaded[name]
+        path = self.store_dir / name
+        if not (path / "meta.json").exists():
+            return None
+        graph = StoredRoadGraph(path)
+        self._loaded[name] = graph
+        return graph
+
+    def find_covering(self, center_lat: float, center_lon: float,
+                      radius_m: float) -> Optional[StoredRoadGraph]:
+        """Smallest stored graph that fully covers the requested area"""
+        candidates = [
+            meta for meta in self.list_graphs()
+            if _haversine_m(center_lat, center_lon, meta["center_lat"], meta["center_lon"])
+            + radius_m <= meta["radius_m"]
+        ]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda meta: meta["num_edges"])
+        return self.load(best["name"])
+
+    def save(self, G: nx.MultiDiGraph, name: str, center_lat: float,
+             center_lon: float, radius_m: float) -> Path:
+        """
+        Serialize a road network graph to the store
+
+        Args:
+            G: OSMnx MultiDiGraph (unprojected, 'x'/'y' node attributes)
+            name: Store entry name (directory name)
+            center_lat, center_lon, radius_m: Area the graph was downloaded for
+
+        Returns:
+            Path to the stored graph directory
+        """
+        node_ids = np.fromiter(G.nodes, dtype=np.int64, count=len(G))
+        index = {nid: i for i, nid in enumerate(node_ids.tolist())}
+        node_y = np.array([G.nodes[n]["y"] for n in node_ids.tolist()], dtype=np.float64)
+        node_x = np.array([G.nodes[n]["x"] for n in node_ids.tolist()], dtype=np.float64)
+
+        edges = [(index[u], index[v], data.get("length", 1.0), road_class_code(data.get("highway")))
+                 for u, v, data in G.edges(data=True)]
+        edge_u = np.array([e[0] for e in edges], dtype=np.int32)
+        edge_v = np.array([e[1] for e in edges], dtype=np.int32)
+        edge_length = np.array([e[2] for e in edges], dtype=np.float32)
+        edge_class = np.array([e[3] for e in edges], dtype=np.uint8)
+
+        # Sort by source node so consumers can build adjacency offsets directly
+        order = np.argsort(edge_u, kind="stable")
+        edge_u, edge_v = edge_u[order], edge_v[order]
+        edge_length, edge_class = edge_length[order], edge_class[order]
+
+        path = self.store_dir / name
+        tmp_path = self.store_dir / f".{name}.tmp"
+        if tmp_path.exists():
+            shutil.rmtree(tmp_path)
+        tmp_path.mkdir(parents=True)
+
+        np.save(tmp_path / "node_ids.npy", node_ids)
+        np.save(tmp_path / "node_y.npy", node_y)
+        np.save(tmp_path / "node_x.npy", node_x)
+        np.save(tmp_path / "edge_u.npy", edge_u)
+        np.save(tmp_path / "edge_v.npy", edge_v)
+        np.save(tmp_path / "edge_length.npy", edge_length)
+        np.save(tmp_path / "edge_class.npy", edge_class)
+
+        meta = {
+            "name": name,
+            "format_version": FORMAT_VERSION,
+            "crs": str(G.graph.get("crs", "epsg:4326")),
+            "center_lat": center_lat,
+            "center_lon": center_lon,
+            "radius_m": radius_m,
+            "bbox": {
+                "min_lat": float(node_y.min()) if len(node_y) else center_lat,
+                "max_lat": float(node_y.max()) if len(node_y) else center_lat,
+                "min_lon": float(node_x.min()) if len(node_x) else center_lon,
+                "max_lon": float(node_x.max()) if len(node_x) else center_lon,
+            },
+            "num_nodes": int(len(node_ids)),
+            "num_edges": int(len(edge_u)),
+            "created_at": datetime.now().isoformat(),
+        }
+        with open(tmp_path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+        # Swap in atomically-ish so readers never see a half-written graph
+        if path.exists():
+            shutil.rmtree(path)
+        tmp_path.rename(path)
+        self._loaded.pop(name, None)
+        return path
+
+
+def build_graph(name: str = DEFAULT_GRAPH_NAME,
+                center_lat: float = DEFAULT_CENTER_LAT,
+                center_lon: float = DEFAULT_CENTER_LON,
+                radius_m: int = DEFAULT_RADIUS_M,
+                store_dir: Optional[str] = None) -> Path:
+    """Download the drive network from OSM once and write it to the store"""
+    import osmnx as ox
+
+    print(f"⏳ Downloading road network '{name}' "
+          f"({center_lat:.4f}, {center_lon:.4f}, radius {radius_m / 1000:.1f}km)...")
+    ox.settings.timeout = 180
+    G = ox.graph_from_point(
+        (center_lat, center_lon),
+        dist=radius_m,
+        network_type="drive",
+        simplify=True
+    )
+    print(f"✓ Downloaded ({len(G.nodes)} nodes, {len(G.edges)} edges)")
+
+    store = RoadGraphStore(store_dir)
+    path = store.save(G, name, center_lat, center_lon, radius_m)
+    print(f"✓ Saved to {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline road graph store")
+    parser.add_argument("--build", action="store_true", help="download and store a road network")
+    parser.add_argument("--list", action="store_true", help="list stored road networks")
+    parser.add_argument("--name", default=DEFAULT_GRAPH_NAME)
+    parser.add_argument("--lat", type=float, default=DEFAULT_CENTER_LAT)
+    parser.add_argument("--lon", type=float, default=DEFAULT_CENTER_LON)
+    parser.add_argument("--radius", type=int, default=DEFAULT_RADIUS_M, help="radius in meters")
+    parser.add_argument("--store-dir", default=None)
+    opt = parser.parse_args()
+
+    if opt.build:
+        build_graph(opt.name, opt.lat, opt.lon, opt.radius, opt.store_dir)
+    if opt.list or not opt.build:
+        graphs = RoadGraphStore(opt.store_dir).list_graphs()
+        if not graphs:
+            print("No stored road networks. Build one with: python road_graph_store.py --build")
+        for meta in graphs:
+            print(f"{meta['name']}: center ({meta['center_lat']:.4f}, {meta['center_lon']:.4f}), "
+                  f"radius {meta['radius_m'] / 1000:.1f}km, "
+                  f"{meta['num_nodes']} nodes, {meta['num_edges']} edges")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Tiled Road Network Cache
+Splits the drive network into fixed lat/lon grid tiles (geohash-style: a tile
+key depends only on the position, never on the query) so overlapping alerts
+reuse the same tiles instead of downloading a new graph per accident/hospital
+midpoint.
+
+- Each tile holds the nodes inside it and the edges leaving them, stored on
+  disk independently as road_graphs/tiles/<tile size>/<key>.npz
+- Missing tiles are cut from a covering offline graph (road_graph_store) or
+  downloaded from OSM once
+- Tiles needed for a query bounding box are stitched into one graph on demand
+- Tiles without roads (sea, parks) are cached as empty tiles, so a coastal
+  query neither fails nor downloads them again
+- Loaded tiles and stitched graphs share one memory budget (LRU eviction);
+  stitched graphs are also capped by count, so a long-running service keeps
+  bounded RAM. The route finder's compiled copy of each stitched graph
+  (CSRGraph, about 3x the stitched arrays) is bounded by max_graphs only
+
+Usage:
+    from road_tile_cache import RoadTileCache
+    cache = RoadTileCache(memory_budget_mb=256)
+    graph = cache.graph_for(13.04, 80.23, radius_m=5000)
+    G = graph.to_networkx()
+"""
+
+import math
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from road_graph_store import RoadGraphStore
+from speed_profiles import road_class_code
+
+DEFAULT_TILE_DEG = 0.05            # ~5.5 km tiles: a 5 km query needs about 3x3 tiles
+DEFAULT_MEMORY_BUDGET_MB = 256     # Loaded tile arrays + stitched graph arrays
+DEFAULT_MAX_GRAPHS = 4             # Stitched graphs kept (each also compiled by the route finder)
+METERS_PER_DEG_LAT = 111320.0
+
+
+class RoadTile:
+    """
+    One grid tile of the road network
+
+    node_*: nodes inside the tile
+    edge_*: edges whose source node is inside the tile (targets as OSM IDs)
+    ext_*:  edge targets outside the tile, with coordinates, so a tile can be
+            stitched even when its neighbour is not loaded
+    """
+
+    FIELDS = ("node_ids", "node_y", "node_x", "edge_u", "edge_v", "edge_length",
+              "edge_class", "ext_ids", "ext_y", "ext_x")
+
+    def __init__(self, key: str, **arrays):
+        self.key = key
+        for name in self.FIELDS:
+            setattr(self, name, arrays[name])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.FIELDS)
+
+    @classmethod
+    def empty(cls, key: str) -> "RoadTile":
+        """Tile without roads (sea, parks): stitches as no nodes and no edges"""
+        return cls(key, **{
+            name: np.zeros(0, dtype=np.uint8 if name == "edge_class" else
+                           np.float32 if name == "edge_length" else
+                           np.float64 if name.endswith(("_y", "_x")) else np.int64)
+            for name in cls.FIELDS
+        })
+
+    @classmethod
+    def from_arrays(cls, key: str, bounds: Tuple[float, float, float, float],
+                    node_ids: np.ndarray, node_y: np.ndarray, node_x: np.ndarray,
+                    edge_u: np.ndarray, edge_v: np.ndarray, edge_length: np.ndarray,
+                    edge_class: Optional[np.ndarray] = None) -> "RoadTile":
+        """
+        Cut a tile out of a larger graph
+
+        Args:
+            bounds: (south, west, north, east) of the tile; south/west inclusive
+            node_*: Graph nodes; edge_u/edge_v are indices into them
+            edge_class: Optional road class codes (speed_profiles)
+        """
+        if edge_class is None:
+            edge_class = np.zeros(len(edge_u), dtype=np.uint8)
+        south, west, north, east = bounds
+        inside = (node_y >= south) & (node_y < north) & (node_x >= west) & (node_x < east)
+        keep = inside[edge_u]
+        u, v = edge_u[keep], edge_v[keep]
+        ext = np.unique(v[~inside[v]])
+        return cls(
+            key,
+            node_ids=np.asarray(node_ids[inside], dtype=np.int64),
+            node_y=np.asarray(node_y[inside], dtype=np.float64),
+            node_x=np.asarray(node_x[inside], dtype=np.float64),
+            edge_u=np.asarray(node_ids[u], dtype=np.int64),
+            edge_v=np.asarray(node_ids[v], dtype=np.int64),
+            edge_length=np.asarray(edge_length[keep], dtype=np.float32),
+            edge_class=np.asarray(edge_class[keep], dtype=np.uint8),
+            ext_ids=np.asarray(node_ids[ext], dtype=np.int64),
+            ext_y=np.asarray(node_y[ext], dtype=np.float64),
+            ext_x=np.asarray(node_x[ext], dtype=np.float64),
+        )
+
+    @classmethod
+    def from_networkx(cls, key: str, bounds: Tuple[float, float, float, float],
+                      G: nx.MultiDiGraph) -> "RoadTile":
+        """Cut a tile out of an OSMnx graph (e.g. a fresh download around the tile)"""
+        node_ids = np.fromiter(G.nodes, dtype=np.int64, count=len(G))
+        index = {nid: i for i, nid in enumerate(node_ids.tolist())}
+        node_y = np.array([G.nodes[n]["y"] for n in G.nodes], dtype=np.float64)
+        node_x = np.array([G.nodes[n]["x"] for n in G.nodes], dtype=np.float64)
+        edges = [(index[u], index[v], data.get("length", 1.0), road_class_code(data.get("highway")))
+                 for u, v, data in G.edges(data=True)]
+        edge_u = np.array([e[0] for e in edges], dtype=np.int64)
+        edge_v = np.array([e[1] for e in edges], dtype=np.int64)
+        edge_length = np.array([e[2] for e in edges], dtype=np.float32)
+        edge_class = np.array([e[3] for e in edges], dtype=np.uint8)
+        return cls.from_arrays(key, bounds, node_ids, node_y, node_x,
+                               edge_u, edge_v, edge_length, edge_class)
+
+    def save(self, path: Path):
+        # Unique temp name: two threads/processes may save the same tile at once
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        np.savez(tmp_path, **{name: getattr(self, name) for name in self.FIELDS})
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, key: str, path: Path) -> "RoadTile":
+        data = np.load(path)
+        arrays = {name: data[name] for name in cls.FIELDS if name in data.files}
+        # Tiles written before road classes were recorded
+        arrays.setdefault("edge_class", np.zeros(len(arrays["edge_u"]), dtype=np.uint8))
+        return cls(key, **arrays)
+
+
+class StitchedRoadGraph:
+    """
+    Road network assembled from tiles
+    Exposes the same arrays as road_graph_store.StoredRoadGraph, so
+    CSRGraph.from_store() compiles it without going through networkx
+    """
+
+    def __init__(self, tiles: List[RoadTile]):
+        self.tile_keys = tuple(tile.key for tile in tiles)
+        ids = np.concatenate([t.node_ids for t in tiles] + [t.ext_ids for t in tiles])
+        ys = np.concatenate([t.node_y for t in tiles] + [t.ext_y for t in tiles])
+        xs = np.concatenate([t.node_x for t in tiles] + [t.ext_x for t in tiles])
+        # Tile nodes come first, so a node's own tile wins over ext copies
+        self.node_ids, first = np.unique(ids, return_index=True)
+        self.node_y, self.node_x = ys[first], xs[first]
+
+        edge_u = np.concatenate([t.edge_u for t in tiles])
+        edge_v = np.concatenate([t.edge_v for t in tiles])
+        self.edge_u = np.searchsorted(self.node_ids, edge_u).astype(np.int32)
+        self.edge_v = np.searchsorted(self.node_ids, edge_v).astype(np.int32)
+        self.edge_length = np.concatenate([t.edge_length for t in tiles]).astype(np.float32)
+        self.edge_class = np.concatenate([t.edge_class for t in tiles]).astype(np.uint8)
+        self._nx_graph = None
+
+    @property
+    def name(self) -> str:
+        return f"tiles[{len(self.tile_keys)}]"
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.node_ids, self.node_y, self.node_x, self.edge_u,
+                                              self.edge_v, self.edge_length, self.edge_class))
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_u)
+
+    def to_networkx(self) -> nx.MultiDiGraph:
+        """Materialize an OSMnx-compatible MultiDiGraph (cached after first call)"""
+        if self._nx_graph is None:
+            G = nx.MultiDiGraph(crs="epsg:4326", name=self.name)
+            node_ids = self.node_ids.tolist()
+            G.add_nodes_from(
+                (nid, {"y": y, "x": x})
+                for nid, y, x in zip(node_ids, self.node_y.tolist(), self.node_x.tolist())
+            )
+            G.add_edges_from(
+                (node_ids[u], node_ids[v], {"length": length})
+                for u, v, length in zip(self.edge_u.tolist(), self.edge_v.tolist(),
+                                        self.edge_length.tolist())
+            )
+            self._nx_graph = G
+        return self._nx_graph
+
+
+class RoadTileCache:
+    """
+    Grid-tiled road network cache: memory LRU -> tile files -> offline store / OSM
+    """
+
+    def __init__(self, store: Optional[RoadGraphStore] = None,
+                 tile_dir: Optional[str] = None,
+                 tile_deg: float = DEFAULT_TILE_DEG,
+                 memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+                 max_graphs: int = DEFAULT_MAX_GRAPHS,
+                 on_evict_graph: Optional[Callable[[StitchedRoadGraph], None]] = None):
+        """
+        Args:
+            store: Offline graph store tiles may be cut from (default: road_graphs/)
+            tile_dir: Tile file directory (default: <store>/tiles/<tile_deg>)
+            tile_deg: Tile edge length in degrees
+            memory_budget_mb: Budget for loaded tiles and stitched graphs (LRU eviction
+                              beyond it); compiled copies held by callers are not counted
+            max_graphs: Stitched graphs kept in memory
+            on_evict_graph: Called with each stitched graph dropped from the cache
+        """
+        self.store = store or RoadGraphStore()
+        base = Path(tile_dir) if tile_dir else self.store.store_dir / "tiles"
+        self.tile_dir = base / f"{tile_deg:g}"
+        self.tile_deg = tile_deg
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.max_graphs = max_graphs
+        self.on_evict_graph = on_evict_graph
+        self._tiles: "OrderedDict[str, RoadTile]" = OrderedDict()
+        self._graphs: "OrderedDict[Tuple[str, ...], StitchedRoadGraph]" = OrderedDict()
+        self._tile_bytes = 0
+        self._graph_bytes = 0
+        self._lock = threading.RLock()
+        self.stats: Dict[str, int] = {"memory_hits": 0, "disk_loads": 0, "store_cuts": 0,
+                                      "downloads": 0, "evictions": 0}
+
+    # ------------------------------------------------------------------ tiles
+
+    def tile_key(self, lat: float, lon: float) -> str:
+        """Key of the tile containing a point"""
+        return f"{math.floor(lat / self.tile_deg)}_{math.floor(lon / self.tile_deg)}"
+
+    def tile_bounds(self, key: str) -> Tuple[float, float, float, float]:
+        """(south, west, north, east) of a tile"""
+        i, j = (int(part) for part in key.split("_"))
+        return (i * self.tile_deg, j * self.tile_deg, (i + 1) * self.tile_deg, (j + 1) * self.tile_deg)
+
+    def tiles_for(self, center_lat: float, center_lon: float, radius_m: float) -> List[str]:
+        """Keys of all tiles intersecting the bounding box of a circle"""
+        dlat = radius_m / METERS_PER_DEG_LAT
+        dlon = radius_m / (METERS_PER_DEG_LAT * max(math.cos(math.radians(center_lat)), 1e-6))
+        i0, i1 = math.floor((center_lat - dlat) / self.tile_deg), math.floor((center_lat + dlat) / self.tile_deg)
+        j0, j1 = math.floor((center_lon - dlon) / self.tile_deg), math.floor((center_lon + dlon) / self.tile_deg)
+        return [f"{i}_{j}" for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+    def get_tile(self, key: str, show_progress: bool = False) -> RoadTile:
+        """Tile from memory, disk, the offline store or OSM (in that order)"""
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return tile
+
+        path = self.tile_dir / f"{key}.npz"
+        if path.exists():
+            tile = RoadTile.load(key, path)
+            self.stats["disk_loads"] += 1
+        else:
+            tile = self._cut_from_store(key)
+            if tile is None:
+                tile = self._download(key, show_progress)
+            self.tile_dir.mkdir(parents=True, exist_ok=True)
+            tile.save(path)
+
+        with self._lock:
+            if key not in self._tiles:
+                self._tiles[key] = tile
+                self._tile_bytes += tile.nbytes
+            self._evict_tiles()
+        return tile
+
+    def _cut_from_store(self, key: str) -> Optional[RoadTile]:
+        south, west, north, east = self.tile_bounds(key)
+        center_lat, center_lon = (south + north) / 2, (west + east) / 2
+        half_diag_m = math.hypot((north - south) * METERS_PER_DEG_LAT,
+                                 (east - west) * METERS_PER_DEG_LAT * math.cos(math.radians(center_lat))) / 2
+        stored = self.store.find_covering(center_lat, center_lon, half_diag_m)
+        if stored is None:
+            return None
+        self.stats["store_cuts"] += 1
+        return RoadTile.from_arrays(key, (south, west, north, east),
+                                    np.asarray(stored.node_ids), np.asarray(stored.node_y),
+                                    np.asarray(stored.node_x), np.asarray(stored.edge_u),
+                                    np.asarray(stored.edge_v), np.asarray(stored.edge_length),
+                                    None if stored.edge_class is None else np.asarray(stored.edge_class))
+
+    def _download(self, key: str, show_progress: bool = False) -> RoadTile:
+        import osmnx as ox
+
+        south, west, north, east = self.tile_bounds(key)
+        if show_progress:
+            print(f"   ⏳ Downloading road tile {key}...")
+        ox.settings.timeout = 60
+        # truncate_by_edge keeps roads crossing the tile border (their far ends become ext nodes).
+        # Not simplified: per-tile simplification can merge away a node its neighbour
+        # tile keeps, breaking the shared node IDs the tiles are stitched on
+        try:
+            G = ox.graph_from_bbox(bbox=(west, south, east, north), network_type="drive",
+                                   simplify=False, truncate_by_edge=True)
+        except ValueError as e:  # InsufficientResponseError is a ValueError
+            if not _is_empty_area_error(e):
+                raise
+            # No roads in the tile (e.g. sea off the coast): saved and cached like any other tile
+            self.stats["downloads"] += 1
+            return RoadTile.empty(key)
+        self.stats["downloads"] += 1
+        return RoadTile.from_networkx(key, (south, west, north, east), G)
+
+    def _evict_tiles(self):
+        # Keep at least the most recent tile even if it alone exceeds the budget
+        while self.memory_bytes > self.memory_budget and len(self._tiles) > 1:
+            _, tile = self._tiles.popitem(last=False)
+            self._tile_bytes -= tile.nbytes
+            self.stats["evictions"] += 1
+
+    # ----------------------------------------------------------------- graphs
+
+    def graph_for(self, center_lat: float, center_lon: float, radius_m: float,
+                  show_progress: bool = False) -> StitchedRoadGraph:
+        """
+        Road network covering a circle, stitched from grid tiles
+
+        Args:
+            center_lat, center_lon: Center point
+            radius_m: Radius in meters (the bounding box is covered)
+            show_progress: Print download progress
+
+        Returns:
+            StitchedRoadGraph (reused while the same tile set stays cached)
+        """
+        keys = tuple(self.tiles_for(center_lat, center_lon, radius_m))
+        with self._lock:
+            graph = self._graphs.get(keys)
+            if graph is not None:
+                self._graphs.move_to_end(keys)
+                return graph
+
+        graph = StitchedRoadGraph([self.get_tile(key, show_progress) for key in keys])
+        evicted = []
+        with self._lock:
+            existing = self._graphs.get(keys)
+            if existing is not None:
+                # Stitched concurrently: keep the graph callers may already hold
+                self._graphs.move_to_end(keys)
+                return existing
+            self._graphs[keys] = graph
+            self._graph_bytes += graph.nbytes
+            # Count cap, then the shared budget (the newest graph is always kept)
+            while len(self._graphs) > self.max_graphs or (
+                    self.memory_bytes > self.memory_budget and len(self._graphs) > 1):
+                old = self._graphs.popitem(last=False)[1]
+                self._graph_bytes -= old.nbytes
+                evicted.append(old)
+        if self.on_evict_graph:
+            for old in evicted:
+                self.on_evict_graph(old)
+        return graph
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held by loaded tile arrays and stitched graph arrays"""
+        return self._tile_bytes + self._graph_bytes
+
+    def clear(self):
+        """Drop all in-memory tiles and graphs (tile files are kept)"""
+        with self._lock:
+            graphs = list(self._graphs.values())
+            self._tiles.clear()
+            self._graphs.clear()
+            self._tile_bytes = 0
+            self._graph_bytes = 0
+        if self.on_evict_graph:
+            for graph in graphs:
+                self.on_evict_graph(graph)
+
+
+def _is_empty_area_error(error: Exception) -> bool:
+    """OSMnx errors meaning the area has no drivable roads (not a failed request)"""
+    message = str(error)
+    return "No data elements" in message or "Found no graph nodes" in message
@@ -0,0 +1,196 @@
+"""
+Route Benchmarks
+Validates and times the road routing engines on random node pairs of a
+stored road graph, against networkx Dijkstra as the reference:
+- path length must match the nx.shortest_path route (provably shortest routes)
+- query time per engine (mean / median / p95 in ms)
+- settled nodes per query (vs. plain unidirectional Dijkstra)
+
+Requires a stored graph (python road_graph_store.py --build).
+
+Usage:
+    $ python route_benchmarks.py
+    $ python route_benchmarks.py --graph chennai_t_nagar --pairs 500 --seed 1
+    $ python route_benchmarks.py --ch --alt    # include contraction hierarchies and landmark A*
+"""
+
+import argparse
+import random
+import time
+from heapq import heappush, heappop
+from typing import Callable, Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from alt_landmarks import ALT_FILENAME, ALTLandmarks
+from contraction_hierarchies import CH_FILENAME, ContractionHierarchy
+from csr_graph import CSRGraph, CSRBidirectionalDijkstra
+from emergency_route_finder import BidirectionalDijkstra
+from road_graph_store import RoadGraphStore
+
+REL_TOLERANCE = 1e-5  # float32 CSR weights vs float64 networkx lengths
+
+
+def dijkstra_settled(csr: CSRGraph, s: int, t: int) -> Tuple[float, int]:
+    """Plain unidirectional Dijkstra on the CSR arrays; returns (distance, settled nodes)"""
+    indptr, indices, weights = csr._fwd
+    dist = {s: 0.0}
+    heap = [(0.0, s)]
+    settled = 0
+    while heap:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        settled += 1
+        if u == t:
+            return d, settled
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            nd = d + weights[k]
+            if nd < dist.get(v, float('inf')):
+                dist[v] = nd
+                heappush(heap, (nd, v))
+    return float('inf'), settled
+
+
+def sample_pairs(G: nx.MultiDiGraph, pairs: int, seed: int = 0) -> List[Tuple[int, int]]:
+    """Random (source, target) OSM node pairs"""
+    rng = random.Random(seed)
+    nodes = list(G.nodes)
+    return [tuple(rng.sample(nodes, 2)) for _ in range(pairs)]
+
+
+def _summary(times_s: List[float]) -> Dict[str, float]:
+    ms = np.asarray(times_s) * 1000.0
+    return {
+        "mean_ms": float(ms.mean()) if len(ms) else 0.0,
+        "median_ms": float(np.median(ms)) if len(ms) else 0.0,
+        "p95_ms": float(np.percentile(ms, 95)) if len(ms) else 0.0,
+    }
+
+
+def run(G: Optional[nx.MultiDiGraph] = None,
+        graph: Optional[str] = None,
+        pairs: int = 200,
+        seed: int = 0,
+        store_dir: Optional[str] = None,
+        ch: bool = False,
+        alt: bool = False,
+        engines: Optional[Dict[str, Callable]] = None) -> Dict[str, Dict]:
+    """
+    Benchmark routing engines against networkx Dijkstra
+
+    Args:
+        G: Road network to use (default: load `graph` from the offline store)
+        graph: Stored graph name (default: the first stored graph)
+        pairs: Number of random node pairs
+        seed: Random seed for pair sampling
+        store_dir: Offline road graph store directory
+        ch: Also benchmark contraction hierarchies (loaded from / persisted to the store)
+        alt: Also benchmark landmark A* (loaded from / persisted to the store)
+        engines: Optional {name: factory(G, csr)} of extra engines exposing
+                 find_shortest_path() and settled_nodes
+
+    Returns:
+        Dictionary of per-engine results (timing, settled nodes, mismatches)
+    """
+    ch_path = alt_path = None
+    if G is None:
+        store = RoadGraphStore(store_dir)
+        stored = store.load(graph) if graph else None
+        if stored is None:
+            graphs = store.list_graphs()
+            if graph or not graphs:
+                raise SystemExit("No stored road graph found. Build one with: "
+                                 "python road_graph_store.py --build")
+            stored = store.load(graphs[0]["name"])
+        G = stored.to_networkx()
+        csr = CSRGraph.from_store(stored)
+        ch_path = str(stored.path / CH_FILENAME)
+        alt_path = str(stored.path / ALT_FILENAME)
+    else:
+        csr = CSRGraph.from_networkx(G)
+
+    factories = {
+        "bidirectional (networkx)": lambda g, c: BidirectionalDijkstra(g),
+        "bidirectional (csr)": lambda g, c: CSRBidirectionalDijkstra(c),
+    }
+    if alt:
+        factories["alt (landmark a*)"] = lambda g, c: ALTLandmarks.load_or_build(c, alt_path)
+    if ch:
+        factories["contraction hierarchies"] = lambda g, c: ContractionHierarchy.load_or_build(c, ch_path)
+    factories.update(engines or {})
+    instances = {name: factory(G, csr) for name, factory in factories.items()}
+
+    node_pairs = sample_pairs(G, pairs, seed)
+    results = {name: {"times": [], "settled": [], "mismatches": 0} for name in
+               ["nx.shortest_path", "dijkstra (csr)", *instances]}
+
+    for source, target in node_pairs:
+        t0 = time.perf_counter()
+        try:
+            path = nx.shortest_path(G, source, target, weight="length")
+            reference = nx.path_weight(G, path, weight="length")
+        except nx.NetworkXNoPath:
+            reference = float('inf')
+        results["nx.shortest_path"]["times"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        _, settled = dijkstra_settled(csr, csr.index_of(source), csr.index_of(target))
+        results["dijkstra (csr)"]["times"].append(time.perf_counter() - t0)
+        results["dijkstra (csr)"]["settled"].append(settled)
+
+        for name, engine in instances.items():
+            t0 = time.perf_counter()
+            _, distance = engine.find_shortest_path(source, target)
+            results[name]["times"].append(time.perf_counter() - t0)
+            results[name]["settled"].append(getattr(engine, "settled_nodes", 0))
+            if not _same_length(distance, reference):
+                results[name]["mismatches"] += 1
+
+    report = {}
+    for name, r in results.items():
+        report[name] = {
+            **_summary(r["times"]),
+            "mean_settled": float(np.mean(r["settled"])) if r["settled"] else None,
+            "mismatches": r["mismatches"],
+            "pairs": len(node_pairs),
+        }
+    return report
+
+
+def _same_length(a: float, b: float) -> bool:
+    if a == float('inf') or b == float('inf'):
+        return a == b
+    return abs(a - b) <= REL_TOLERANCE * max(1.0, b)
+
+
+def print_report(report: Dict[str, Dict]):
+    print(f"{'Engine':<28}{'mean ms':>10}{'median ms':>11}{'p95 ms':>10}"
+          f"{'settled':>10}{'wrong':>8}")
+    for name, r in report.items():
+        settled = f"{r['mean_settled']:.0f}" if r["mean_settled"] is not None else "-"
+        print(f"{name:<28}{r['mean_ms']:>10.3f}{r['median_ms']:>11.3f}{r['p95_ms']:>10.3f}"
+              f"{settled:>10}{r['mismatches']:>8}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser(description="Benchmark and validate road routing engines")
+    parser.add_argument("--graph", default=None, help="stored graph name (default: first stored graph)")
+    parser.add_argument("--pairs", type=int, default=200, help="number of random node pairs")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--store-dir", default=None, help="offline road graph store directory")
+    parser.add_argument("--ch", action="store_true", help="include contraction hierarchies")
+    parser.add_argument("--alt", action="store_true", help="include landmark A* (ALT)")
+    return parser.parse_args()
+
+
+def main(opt):
+    report = run(graph=opt.graph, pairs=opt.pairs, seed=opt.seed, store_dir=opt.store_dir,
+                 ch=opt.ch, alt=opt.alt)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main(parse_opt())
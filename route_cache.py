@@ -0,0 +1,104 @@
+"""
+Route Result Cache
+Cameras are fixed, so repeated or duplicate alerts from the same camera snap to
+the same road nodes and ask for the same routes. Routing results are cached
+in an LRU with a time-to-live, keyed by:
+
+    (graph, snapped accident node, snapped hospital node, weight profile)
+
+The weight profile names the edge weights a route was optimized for (engine,
+and for time-dependent routing the dispatch hour). Entries are dropped when
+those weights change (speed profiles replaced, road network evicted).
+
+Usage:
+    cache = RouteCache(max_entries=4096, ttl_s=600)
+    cached = cache.get(key)
+    if cached is None:
+        cache.put(key, (path, distance_m))
+    print(cache.stats())
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_TTL_S = 600.0
+
+
+class RouteCache:
+    """
+    Thread-safe LRU + TTL cache of routing results
+    Keys are tuples whose first element identifies the road network graph
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_s: float = DEFAULT_TTL_S):
+        """
+        Args:
+            max_entries: Maximum cached routes (least recently used dropped first)
+            ttl_s: Seconds a cached route stays valid (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """Cached value for a key, or None (missing or expired)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl_s:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: object):
+        """Cache a value, evicting the least recently used entries over the limit"""
+        if self.ttl_s <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, graph_id: Optional[Hashable] = None) -> int:
+        """
+        Drop cached routes after edge weights changed
+
+        Args:
+            graph_id: Only drop routes on this graph (default: all)
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            if graph_id is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            keys = [key for key in self._entries if key[0] == graph_id]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -163,6 +163,16 @@ def run_detection_loop(app):
             # Coordinates (use default; in production use GPS)
             lat, lon = DEFAULT_ACCIDENT_LAT, DEFAULT_ACCIDENT_LON
 
+            # Log the confirmed detection (queued, written in the background)
+            try:
+                from incident_store import get_incident_store
+                get_incident_store().record_detection(
+                    f"accident_{ts}", lat, lon, confidence=best_conf,
+                    image_path=os.path.relpath(img_path, ROOT).replace("\\", "/")
+                )
+            except Exception as e:
+                app.after(0, lambda err=e: log_message(app.log_text, f"[WARN] Incident log error: {err}"))
+
             # 1) Emergency response: 24x7 T.Nagar hospitals + police; best hospital by ICU, proximity, rating
             try:
                 from emergency_response_system import EmergencyResponseSystem
@@ -199,6 +209,9 @@ def run_detection_loop(app):
                 contacts = emergency_system.get_emergency_call_contacts(lat, lon) if response else []
                 app.after(0, lambda: log_message(app.log_text, "[OK] Initiating automated call to 24x7 / police..."))
                 call_emergency_contacts(contacts)
+                if contacts:
+                    emergency_system.incident_store.update_status(
+                        f"accident_{ts}", "notified", emergency_services_notified=True)
             except Exception as e:
                 app.after(0, lambda: log_message(app.log_text, f"[WARN] Call error: {e}"))
 
@@ -364,7 +377,7 @@ def run_detection_loop(app):
                         with open(report_path, "w", encoding="utf-8") as f:
                             f.write("\n".join(lines))
                             f.write("\n\nJSON report (auto): ")
-                            f.write(os.path.abspath(os.path.join(ROOT, "api_data", f"emergency_response_accident_{ts}.json")))
+                            f.write(f"{os.path.abspath(os.path.join(ROOT, 'api_data', 'emergency_responses.jsonl'))} (accident_{ts})")
                         messagebox.showinfo("Saved", f"Report saved:\n{report_path}")
 
                     tk.Button(btns, text="Copy Details", bg="#4CAF50", fg="white", padx=12, pady=8, command=copy_details).pack(side=tk.LEFT, padx=6)
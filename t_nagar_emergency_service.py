@@ -11,6 +11,8 @@ import pandas as pd
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
+from facility_index import get_facility_index, haversine_km  # noqa: F401 (re-exported)
+
 ROOT = Path(__file__).resolve().parent
 T_NAGAR_HOSPITALS = ROOT / "t_nagar_24x7_general_hospitals.csv"
 T_NAGAR_POLICE = ROOT / "t_nagar_police.csv"
@@ -47,14 +49,10 @@ def load_t_nagar_combined() -> pd.DataFrame:
     return combined
 
 
-def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    import math
-    R = 6371
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+def get_t_nagar_index():
+    """T. Nagar facilities from the shared registry (reloaded only when the CSVs change)."""
+    return get_facility_index(str(T_NAGAR_COMBINED), loader=load_t_nagar_combined,
+                              sources=[str(T_NAGAR_COMBINED), str(T_NAGAR_HOSPITALS), str(T_NAGAR_POLICE)])
 
 
 def get_24x7_hospitals_and_police(
@@ -66,28 +64,17 @@ def get_24x7_hospitals_and_police(
     Get 24x7 hospitals and police stations near accident location.
     Returns (list of hospital dicts, list of police dicts) sorted by distance.
     """
-    df = load_t_nagar_combined()
-    df = df[df.get("Emergency_24x7", "Y").astype(str).str.upper() == "Y"]
-    df["Distance_km"] = df.apply(
-        lambda r: haversine_km(accident_lat, accident_lon, float(r["Latitude"]), float(r["Longitude"])),
-        axis=1
-    )
-    df = df[df["Distance_km"] <= max_radius_km].sort_values("Distance_km")
-    hospitals = df[df["Category"].str.contains("Hospital", case=False, na=False)]
-    police = df[df["Category"].str.contains("Police", case=False, na=False)]
-    def to_dict(r):
-        return {
-            "name": r.get("Name", ""),
-            "category": r.get("Category", ""),
-            "lat": float(r["Latitude"]),
-            "lon": float(r["Longitude"]),
-            "phone": str(r.get("Phone", "")).strip() if pd.notna(r.get("Phone")) else "",
-            "distance_km": round(r["Distance_km"], 2),
-            "emergency_24x7": str(r.get("Emergency_24x7", "Y")).upper() == "Y",
-            "icu_availability": str(r.get("ICU_availability", "")).upper() == "Y",
-            "response_readiness": r.get("Response_readiness", "medium"),
-        }
-    return [to_dict(r) for _, r in hospitals.iterrows()], [to_dict(r) for _, r in police.iterrows()]
+    index = get_t_nagar_index()
+    def to_dicts(rows, dist_km):
+        out = []
+        for row, d in zip(rows, dist_km):
+            rec = index.record(row)
+            rec["distance_km"] = round(float(d), 2)
+            out.append(rec)
+        return out
+    hospitals = index.query_radius(accident_lat, accident_lon, max_radius_km, category="Hospital", emergency_24x7_only=True)
+    police = index.query_radius(accident_lat, accident_lon, max_radius_km, category="Police", emergency_24x7_only=True)
+    return to_dicts(*hospitals), to_dicts(*police)
 
 
 def assign_best_hospital(
@@ -95,16 +82,27 @@ def assign_best_hospital(
     accident_lon: float,
     rating_system=None,
     max_radius_km: float = 15.0,
+    hospitals: Optional[List[Dict]] = None,
 ) -> Optional[Dict]:
     """
     Assign best-performing hospital based on:
     emergency capability (24x7), proximity, response time (est. from distance),
     ICU availability, and past performance ratings.
+    Pass `hospitals` (from get_24x7_hospitals_and_police) to reuse an existing lookup.
     """
-    hospitals, _ = get_24x7_hospitals_and_police(accident_lat, accident_lon, max_radius_km)
+    if hospitals is None:
+        hospitals, _ = get_24x7_hospitals_and_police(accident_lat, accident_lon, max_radius_km)
     if not hospitals:
         return None
 
+    # One bulk rating read for every candidate (cached by the rating system)
+    ratings = {}
+    if rating_system:
+        try:
+            ratings = rating_system.get_ratings([h["name"] for h in hospitals])
+        except Exception:
+            ratings = {}
+
     def score(h):
         # Proximity (closer = better): max 40 points
         dist = h["distance_km"]
@@ -116,13 +114,9 @@ def assign_best_hospital(
         readiness_score = {"high": 15, "medium": 10, "low": 5}.get(readiness, 10)
         # Past performance rating (0-5 -> 0-25)
         rating = 2.5
-        if rating_system:
-            try:
-                info = rating_system.get_hospital_rating(h["name"])
-                if info:
-                    rating = info.get("current_rating", 2.5)
-            except Exception:
-                pass
+        info = ratings.get(h["name"])
+        if info:
+            rating = info.get("recent_rating", info.get("current_rating", 2.5))
         rating_score = (rating / 5.0) * 25
         total = proximity_score + icu_score + readiness_score + rating_score
         return total
@@ -147,7 +141,7 @@ def get_emergency_call_list(
     hospitals, police = get_24x7_hospitals_and_police(accident_lat, accident_lon)
     out = []
     if include_best_hospital and hospitals:
-        best = assign_best_hospital(accident_lat, accident_lon, rating_system=rating_system)
+        best = assign_best_hospital(accident_lat, accident_lon, rating_system=rating_system, hospitals=hospitals)
         if best and best.get("phone"):
             out.append({"name": best["name"], "phone": best["phone"], "category": "Hospital"})
     for p in police[:max_police]:
@@ -0,0 +1,93 @@
+"""
+Shared fixtures: a small synthetic road grid (no OSM download) and helpers
+to store it like road_graph_store.py --build would
+"""
+
+import sys
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))  # Flat top-level modules
+
+GRID_SIZE = 12
+GRID_LAT, GRID_LON, GRID_STEP_DEG = 13.04, 80.23, 0.001
+HIGHWAYS = ("primary", "secondary", "residential", "service")
+
+
+def make_grid_graph(size: int = GRID_SIZE, seed: int = 0) -> nx.MultiDiGraph:
+    """
+    OSMnx-like MultiDiGraph on a size x size grid around T. Nagar
+    Integer edge lengths (exact in float32), mixed road classes, some one-way
+    streets and some parallel edges, so engines cannot get away with
+    assuming a symmetric simple graph
+    """
+    rng = np.random.default_rng(seed)
+    G = nx.MultiDiGraph(crs="epsg:4326")
+    # OSM-like IDs in reverse grid order: dense indices never equal node IDs
+    node_id = {(r, c): 9_000_000 - (r * size + c) for r in range(size) for c in range(size)}
+    for (r, c), nid in node_id.items():
+        G.add_node(nid, y=GRID_LAT + r * GRID_STEP_DEG, x=GRID_LON + c * GRID_STEP_DEG)
+    for (r, c), u in node_id.items():
+        for dr, dc in ((0, 1), (1, 0)):
+            if (r + dr, c + dc) not in node_id:
+                continue
+            v = node_id[(r + dr, c + dc)]
+            length = float(rng.integers(80, 160))
+            highway = HIGHWAYS[int(rng.integers(len(HIGHWAYS)))]
+            G.add_edge(u, v, length=length, highway=highway)
+            if rng.random() > 0.15:  # ~15% one-way
+                G.add_edge(v, u, length=length, highway=highway)
+            if rng.random() < 0.05:  # Slower parallel carriageway
+                G.add_edge(u, v, length=length + 40.0, highway="service")
+    return G
+
+
+def node_pairs(G: nx.MultiDiGraph, count: int = 25, seed: int = 1):
+    """Deterministic (source, target) OSM node pairs, including unreachable ones"""
+    rng = np.random.default_rng(seed)
+    nodes = list(G.nodes)
+    return [(nodes[i], nodes[j]) for i, j in rng.integers(len(nodes), size=(count, 2))]
+
+
+def nx_length(G: nx.MultiDiGraph, source: int, target: int) -> float:
+    """Reference shortest path length (inf if unreachable)"""
+    try:
+        return nx.shortest_path_length(G, source, target, weight="length")
+    except nx.NetworkXNoPath:
+        return float("inf")
+
+
+@pytest.fixture(autouse=True)
+def no_osm_downloads(monkeypatch):
+    """Tests never reach OSM: a tile download means the stored grid did not cover the query"""
+    import road_tile_cache
+
+    def download(self, key, show_progress=False):
+        raise RuntimeError(f"Test tried to download road tile {key}")
+    monkeypatch.setattr(road_tile_cache.RoadTileCache, "_download", download)
+
+
+@pytest.fixture(scope="session")
+def grid_graph() -> nx.MultiDiGraph:
+    return make_grid_graph()
+
+
+@pytest.fixture(scope="session")
+def grid_csr(grid_graph):
+    from csr_graph import CSRGraph
+    return CSRGraph.from_networkx(grid_graph)
+
+
+@pytest.fixture
+def graph_store(tmp_path, grid_graph):
+    """RoadGraphStore in a temp directory holding the grid as 'grid' (declared to cover 20 km)"""
+    from road_graph_store import RoadGraphStore
+    store = RoadGraphStore(str(tmp_path / "road_graphs"))
+    store.save(grid_graph, "grid", GRID_LAT + GRID_SIZE * GRID_STEP_DEG / 2,
+               GRID_LON + GRID_SIZE * GRID_STEP_DEG / 2, 20000)
+    return store
@@ -0,0 +1,43 @@
+"""ALT (landmark A*): exact queries, admissible heuristic and persistence"""
+
+import math
+
+import networkx as nx
+import pytest
+
+from alt_landmarks import ALTLandmarks
+from conftest import make_grid_graph, nx_length, node_pairs
+from csr_graph import CSRGraph
+
+
+@pytest.fixture(scope="module")
+def landmarks(grid_csr):
+    return ALTLandmarks.build(grid_csr, num_landmarks=4, show_progress=False)
+
+
+def test_matches_networkx(grid_graph, landmarks):
+    for source, target in node_pairs(grid_graph):
+        expected = nx_length(grid_graph, source, target)
+        path, length = landmarks.find_shortest_path(source, target)
+        if math.isinf(expected):
+            assert path is None
+            continue
+        assert length == pytest.approx(expected)
+        assert path[0] == source and path[-1] == target
+
+
+def test_heuristic_is_admissible(grid_graph, grid_csr, landmarks):
+    for _, target in node_pairs(grid_graph, 5):
+        bounds = landmarks.heuristic(grid_csr.index_of(target))
+        # Exact distance of every node to the target
+        exact = nx.single_source_dijkstra_path_length(grid_graph.reverse(), target, weight="length")
+        for node, distance in exact.items():
+            assert bounds[grid_csr.index_of(node)] <= distance + 1e-3
+
+
+def test_load_rejects_another_graph(tmp_path, landmarks):
+    path = str(tmp_path / "alt.npz")
+    landmarks.save(path)
+    assert ALTLandmarks.load(landmarks.csr, path) is not None
+    other = CSRGraph.from_networkx(make_grid_graph(size=6, seed=3))
+    assert ALTLandmarks.load(other, path) is None
@@ -0,0 +1,70 @@
+"""Capacity-aware batch dispatch (handle_accidents_batch) on the stored grid"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from emergency_response_system import EmergencyResponseSystem
+from emergency_route_finder import EmergencyRouteFinder
+from response_sink import JsonlSink, find_response
+from test_emergency_route_finder import HOSPITALS
+
+# One accident two blocks from each hospital, towards the middle of the grid
+ACCIDENTS = [{"latitude": lat + (0.002 if lat < 13.045 else -0.002),
+              "longitude": lon + (0.002 if lon < 80.235 else -0.002), "accident_id": f"acc_{i}"}
+             for i, (lat, lon) in enumerate(HOSPITALS)]
+NAMES = [f"Hospital {i}" for i in range(len(HOSPITALS))]
+
+
+@pytest.fixture
+def response_system(tmp_path, monkeypatch, graph_store):
+    monkeypatch.chdir(tmp_path)  # Rating and incident databases are created in the working directory
+    dataset = tmp_path / "hospitals.csv"
+    pd.DataFrame({
+        "Category": ["Hospital"] * len(HOSPITALS),
+        "Name": NAMES,
+        "Latitude": [lat for lat, _ in HOSPITALS],
+        "Longitude": [lon for _, lon in HOSPITALS],
+    }).to_csv(dataset, index=False)
+    sink = JsonlSink(str(tmp_path / "responses.jsonl"), compact_interval_s=None)
+    system = EmergencyResponseSystem(str(dataset), response_sink=sink)
+    system.route_finder = EmergencyRouteFinder(str(dataset), graph_store_dir=str(graph_store.store_dir))
+    yield system
+    sink.close()
+
+
+def dispatch(system, accidents, capacities, default_capacity=0):
+    return system.handle_accidents_batch(accidents, capacities=capacities, default_capacity=default_capacity,
+                                         dispatch_time=datetime(2026, 1, 5, 10, 0))
+
+
+def test_each_hospital_within_capacity(response_system):
+    batch = dispatch(response_system, ACCIDENTS, {name: 1 for name in NAMES})
+    responses = batch["responses"]
+    assert all(r["success"] and not r["over_capacity"] for r in responses)
+    assert batch["hospital_load"] == {name: 1 for name in NAMES}
+    # With one slot everywhere, the best assignment sends each accident to the hospital next to it
+    assert [r["selected_hospital"]["name"] for r in responses] == NAMES
+    assert all(r["route"]["distance_km"] > 0 and len(r["route"]["route_coordinates"]) > 2
+               for r in responses)
+
+
+def test_full_hospital_overflows(response_system):
+    accidents = [ACCIDENTS[0], {**ACCIDENTS[0], "accident_id": "acc_0b"}]
+    batch = dispatch(response_system, accidents, {NAMES[0]: 1})
+    first, second = batch["responses"]
+    assert first["selected_hospital"]["name"] == NAMES[0] or second["selected_hospital"]["name"] == NAMES[0]
+    # No slot left anywhere: the second patient still goes to its best hospital, flagged
+    assert sorted([first["over_capacity"], second["over_capacity"]]) == [False, True]
+    assert batch["hospital_load"] == {NAMES[0]: 2}
+
+
+def test_spare_capacity_elsewhere(response_system):
+    accidents = [ACCIDENTS[0], {**ACCIDENTS[0], "accident_id": "acc_0b"}]
+    batch = dispatch(response_system, accidents, {NAMES[0]: 1}, default_capacity=1)
+    assert not any(r["over_capacity"] for r in batch["responses"])
+    assert sorted(batch["hospital_load"].values()) == [1, 1]
+    response_system.response_sink.flush()
+    logged = find_response("acc_0b", response_system.response_sink.path)
+    assert logged["batch_id"] == batch["batch_id"]
@@ -0,0 +1,45 @@
+"""Contraction hierarchies: queries, persistence and stale-file detection"""
+
+import math
+
+import numpy as np
+import pytest
+
+from conftest import make_grid_graph, nx_length, node_pairs
+from contraction_hierarchies import ContractionHierarchy
+from csr_graph import CSRGraph
+
+
+@pytest.fixture(scope="module")
+def hierarchy(grid_csr):
+    return ContractionHierarchy.build(grid_csr, show_progress=False)
+
+
+def test_matches_networkx(grid_graph, hierarchy):
+    for source, target in node_pairs(grid_graph):
+        expected = nx_length(grid_graph, source, target)
+        path, length = hierarchy.find_shortest_path(source, target)
+        if math.isinf(expected):
+            assert path is None
+            continue
+        assert length == pytest.approx(expected)
+        # Shortcuts are unpacked into the original road edges
+        assert path[0] == source and path[-1] == target
+        assert all(grid_graph.has_edge(u, v) for u, v in zip(path[:-1], path[1:]))
+
+
+def test_save_load_roundtrip(tmp_path, grid_graph, grid_csr, hierarchy):
+    path = str(tmp_path / "ch.npz")
+    hierarchy.save(path)
+    loaded = ContractionHierarchy.load_or_build(grid_csr, path, show_progress=False)
+    assert np.array_equal(loaded.rank, hierarchy.rank)
+    source, target = node_pairs(grid_graph, 1)[0]
+    assert loaded.find_shortest_path(source, target) == hierarchy.find_shortest_path(source, target)
+
+
+def test_rebuilds_for_another_graph(tmp_path, hierarchy):
+    path = str(tmp_path / "ch.npz")
+    hierarchy.save(path)
+    other = CSRGraph.from_networkx(make_grid_graph(size=6, seed=3))
+    rebuilt = ContractionHierarchy.load_or_build(other, path, show_progress=False)
+    assert np.array_equal(rebuilt.node_ids, other.node_ids)
@@ -0,0 +1,69 @@
+"""CSR graph compilation and bidirectional Dijkstra against networkx"""
+
+import math
+
+import numpy as np
+import pytest
+
+from conftest import nx_length, node_pairs
+from csr_graph import CSRBidirectionalDijkstra, CSRGraph
+from emergency_route_finder import BidirectionalDijkstra
+
+
+def assert_valid_path(G, path, source, target, length):
+    """Path runs source -> target over existing edges and has the reported length"""
+    assert path[0] == source and path[-1] == target
+    total = sum(min(data["length"] for data in G[u][v].values()) for u, v in zip(path[:-1], path[1:]))
+    assert total == pytest.approx(length)
+
+
+def test_compiled_sizes(grid_graph, grid_csr):
+    assert grid_csr.num_nodes == grid_graph.number_of_nodes()
+    assert grid_csr.num_edges == grid_graph.number_of_edges()
+    for osm_id in list(grid_graph.nodes)[:10]:
+        assert grid_csr.osm_id(grid_csr.index_of(osm_id)) == osm_id
+
+
+@pytest.mark.parametrize("engine_cls", [CSRBidirectionalDijkstra, BidirectionalDijkstra])
+def test_bidirectional_matches_networkx(grid_graph, grid_csr, engine_cls):
+    engine = engine_cls(grid_csr if engine_cls is CSRBidirectionalDijkstra else grid_graph)
+    for source, target in node_pairs(grid_graph):
+        expected = nx_length(grid_graph, source, target)
+        path, length = engine.find_shortest_path(source, target)
+        if math.isinf(expected):
+            assert path is None and math.isinf(length)
+            continue
+        assert length == pytest.approx(expected)
+        assert_valid_path(grid_graph, path, source, target, length)
+
+
+def test_unknown_node(grid_csr):
+    assert CSRBidirectionalDijkstra(grid_csr).find_shortest_path(1, 2) == (None, float("inf"))
+
+
+def test_paths_to_target_matches_networkx(grid_graph, grid_csr):
+    nodes = list(grid_graph.nodes)
+    target = nodes[len(nodes) // 2]
+    sources = [grid_csr.index_of(node) for node in nodes[::7]]
+    routes = grid_csr.paths_to_target(grid_csr.index_of(target), sources)
+    for source in sources:
+        expected = nx_length(grid_graph, grid_csr.osm_id(source), target)
+        if math.isinf(expected):
+            assert source not in routes
+            continue
+        path, cost = routes[source]
+        assert cost == pytest.approx(expected)
+        assert_valid_path(grid_graph, grid_csr.to_osm_ids(path), grid_csr.osm_id(source), target, cost)
+
+
+def test_snap_matches_brute_force(grid_csr):
+    from facility_index import haversine_km
+
+    rng = np.random.default_rng(2)
+    lats = 13.04 + rng.random(20) * 0.011
+    lons = 80.23 + rng.random(20) * 0.011
+    snapped = grid_csr.snap(lats, lons)
+    for lat, lon, node in zip(lats, lons, snapped):
+        km = haversine_km(lat, lon, grid_csr.node_y, grid_csr.node_x)
+        assert km[node] == pytest.approx(km.min(), abs=1e-6)
+    assert grid_csr.nearest_nodes(lats[0], lons[0]) == [grid_csr.osm_id(snapped[0])]
@@ -0,0 +1,91 @@
+"""Per-thread SQLite connections and the write-behind queue"""
+
+import os
+import threading
+
+import pytest
+
+from db_connections import BackgroundWriter, get_connection_manager
+
+
+class CounterWriter(BackgroundWriter):
+    """Adds queued amounts to a one-row table; 'fail' writes raise"""
+
+    def _apply(self, cursor, writes):
+        for kind, amount in writes:
+            if kind == "fail":
+                raise ValueError("bad write")
+            cursor.execute("UPDATE counter SET total = total + ?", (amount,))
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = get_connection_manager(str(tmp_path / "test.db"))
+    with db.transaction() as conn:
+        conn.execute("CREATE TABLE counter (total INTEGER)")
+        conn.execute("INSERT INTO counter VALUES (0)")
+    yield db
+    db.close_all()
+
+
+def total(db):
+    return db.connection().execute("SELECT total FROM counter").fetchone()[0]
+
+
+def test_connection_per_thread(db, tmp_path):
+    assert get_connection_manager(str(tmp_path / "test.db")) is db
+    assert db.connection() is db.connection()
+    others = []
+    thread = threading.Thread(target=lambda: others.append(db.connection()))
+    thread.start()
+    thread.join()
+    assert others[0] is not db.connection()
+    assert db.connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_connections_survive_chdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = get_connection_manager("relative.db")
+    monkeypatch.chdir(os.path.dirname(os.path.abspath(__file__)))
+    db.connection().execute("CREATE TABLE t (a)")
+    assert os.path.exists(tmp_path / "relative.db")
+    db.close_all()
+
+
+def test_transaction_rolls_back(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction() as conn:
+            conn.execute("UPDATE counter SET total = 5")
+            raise RuntimeError
+    assert total(db) == 0
+
+
+def test_writer_flush_and_coalescing(db):
+    writer = CounterWriter(db, flush_interval_s=10.0)
+    for _ in range(100):
+        writer.submit("add", 1)
+    # The barrier ends the coalescing interval early
+    assert writer.flush(timeout=5)
+    assert total(db) == 100
+    assert writer.transactions == 1
+    writer.close(timeout=5)
+    with pytest.raises(RuntimeError):
+        writer.submit("add", 1)
+
+
+def test_writer_drops_only_failing_writes(db):
+    writer = CounterWriter(db, flush_interval_s=10.0)
+    writer.submit("add", 2)
+    writer.submit("fail", 0)
+    writer.submit("add", 3)
+    assert writer.flush(timeout=5)
+    assert total(db) == 5
+    assert writer.failed_writes == 1
+    writer.close(timeout=5)
+
+
+def test_close_commits_pending_writes(db):
+    writer = CounterWriter(db, flush_interval_s=10.0)
+    writer.submit("add", 7)
+    writer.close(timeout=5)
+    assert total(db) == 7
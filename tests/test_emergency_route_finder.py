@@ -0,0 +1,42 @@
+"""EmergencyRouteFinder on a stored synthetic grid (no OSM access)"""
+
+from datetime import datetime
+
+import pytest
+
+from emergency_route_finder import EmergencyRouteFinder
+
+ACCIDENT = (13.045, 80.236)
+HOSPITALS = [(13.04, 80.23), (13.051, 80.241), (13.04, 80.241), (13.051, 80.23)]
+DISPATCH = datetime(2026, 1, 5, 8, 50)
+
+
+def finder_for(graph_store, routing_engine="csr"):
+    return EmergencyRouteFinder("missing_dataset.csv", graph_store_dir=str(graph_store.store_dir),
+                                routing_engine=routing_engine, route_cache_ttl_s=0)
+
+
+@pytest.mark.parametrize("routing_engine", ["csr", "networkx", "ch", "alt", "td"])
+def test_one_to_many_matches_single_routes(graph_store, routing_engine):
+    many = finder_for(graph_store, routing_engine).find_routes_to_accident(
+        *ACCIDENT, HOSPITALS, radius_m=1000, show_progress=False, depart_time=DISPATCH)
+    single = finder_for(graph_store, routing_engine)
+    for (lat, lon), route in zip(HOSPITALS, many):
+        expected = single.find_optimal_hospital_route(*ACCIDENT, lat, lon, radius_m=1000,
+                                                      show_progress=False, depart_time=DISPATCH)
+        assert route["success"] and expected["success"]
+        assert route["distance_m"] == pytest.approx(expected["distance_m"])
+        assert route["eta_minutes"] == pytest.approx(expected["eta_minutes"])
+        if routing_engine == "td":
+            # Same time-dependent search from both entry points
+            assert route["path_nodes"] == expected["path_nodes"]
+
+
+def test_road_network_is_array_backed(graph_store):
+    finder = finder_for(graph_store)
+    G = finder.get_road_network(*ACCIDENT, 1000, show_progress=False)
+    assert G is finder.graph_store.load("grid")  # Memory-mapped arrays, no networkx build
+    route = finder.find_optimal_hospital_route(*ACCIDENT, *HOSPITALS[0], radius_m=1000,
+                                               show_progress=False, depart_time=DISPATCH)
+    first = route["path_coordinates"][0]
+    assert first == pytest.approx({"lat": HOSPITALS[0][0], "lon": HOSPITALS[0][1]})
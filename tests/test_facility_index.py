@@ -0,0 +1,100 @@
+"""Facility index: KD-tree queries against brute-force haversine"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from facility_index import FacilityIndex, haversine_km
+
+
+def scalar_haversine_km(lat1, lon1, lat2, lon2):
+    """Reference implementation (the route finder's original scalar formula)"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+@pytest.fixture(scope="module")
+def facilities() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 200
+    return pd.DataFrame({
+        "Category": rng.choice(["Hospital", "Police", "Pharmacy"], n),
+        "Name": [f"Facility {i}" for i in range(n)],
+        "Latitude": 13.0 + rng.random(n) * 0.1,
+        "Longitude": 80.2 + rng.random(n) * 0.1,
+        "Emergency_24x7": rng.choice(["Y", "N"], n),
+    })
+
+
+@pytest.fixture(scope="module")
+def index(facilities):
+    return FacilityIndex(facilities)
+
+
+def brute_force(facilities, lat, lon, category=None, emergency_24x7_only=False):
+    df = facilities
+    if category:
+        df = df[df["Category"] == category]
+    if emergency_24x7_only:
+        df = df[df["Emergency_24x7"] == "Y"]
+    km = np.array([scalar_haversine_km(lat, lon, a, b) for a, b in zip(df["Latitude"], df["Longitude"])])
+    order = np.argsort(km, kind="stable")
+    return df.index.to_numpy()[order], km[order]
+
+
+def test_haversine_vectorized_matches_scalar():
+    lats, lons = np.array([13.0, 13.05, 12.9]), np.array([80.2, 80.25, 80.3])
+    vector = haversine_km(13.04, 80.23, lats, lons)
+    assert vector.shape == (3,)
+    for lat, lon, km in zip(lats, lons, vector):
+        assert km == pytest.approx(scalar_haversine_km(13.04, 80.23, lat, lon))
+    assert isinstance(haversine_km(13.04, 80.23, 13.05, 80.24), float)
+
+
+@pytest.mark.parametrize("category,emergency_24x7_only", [(None, False), ("Hospital", False), ("Hospital", True)])
+def test_query_matches_brute_force(facilities, index, category, emergency_24x7_only):
+    for lat, lon in [(13.03, 80.22), (13.09, 80.29), (12.5, 80.0)]:
+        rows, km = index.query(lat, lon, k=5, category=category, emergency_24x7_only=emergency_24x7_only)
+        expected_rows, expected_km = brute_force(facilities, lat, lon, category, emergency_24x7_only)
+        assert rows.tolist() == expected_rows[:5].tolist()
+        assert km == pytest.approx(expected_km[:5], rel=1e-6)
+
+
+def test_query_radius_and_max_radius(facilities, index):
+    expected_rows, expected_km = brute_force(facilities, 13.05, 80.25, "Police")
+    rows, km = index.query_radius(13.05, 80.25, 3.0, category="Police")
+    assert rows.tolist() == expected_rows[expected_km <= 3.0].tolist()
+    rows, km = index.query(13.05, 80.25, k=50, category="Police", max_radius_km=3.0)
+    assert (km <= 3.0).all() and len(rows) == (expected_km <= 3.0).sum()
+
+
+def test_query_batch_matches_single_queries(index):
+    lats, lons = np.array([13.03, 13.09, 12.5]), np.array([80.22, 80.29, 80.0])
+    rows, km = index.query_batch(lats, lons, k=3, category="Hospital", max_radius_km=20.0)
+    assert rows.shape == km.shape == (3, 3)
+    for i in range(3):
+        single_rows, single_km = index.query(lats[i], lons[i], k=3, category="Hospital", max_radius_km=20.0)
+        found = rows[i] >= 0
+        assert rows[i][found].tolist() == single_rows.tolist()
+        assert km[i][found] == pytest.approx(single_km)
+        assert np.isinf(km[i][~found]).all()
+
+
+def test_registry_reloads_only_on_change(tmp_path, facilities):
+    from facility_index import FacilityRegistry
+
+    path = tmp_path / "places.csv"
+    facilities.to_csv(path, index=False)
+    registry = FacilityRegistry(check_interval_s=0.0)
+    first = registry.get(str(path))
+    assert registry.get(str(path)) is first
+
+    facilities.head(10).to_csv(path, index=False)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    reloaded = registry.get(str(path))
+    assert reloaded is not first and len(reloaded) == 10
@@ -0,0 +1,71 @@
+"""Precomputed hospital distance tables: lookups, routes and stale tables"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import nx_length
+from csr_graph import CSRGraph
+from emergency_route_finder import EmergencyRouteFinder
+from hospital_distance_tables import HospitalDistanceTables, build_tables, tables_filename
+from test_emergency_route_finder import ACCIDENT, DISPATCH, HOSPITALS
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "hospitals.csv"
+    pd.DataFrame({
+        "Category": ["Hospital"] * len(HOSPITALS),
+        "Name": [f"Hospital {i}" for i in range(len(HOSPITALS))],
+        "Latitude": [lat for lat, _ in HOSPITALS],
+        "Longitude": [lon for _, lon in HOSPITALS],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def routes(finder):
+    return finder.find_routes_to_accident(*ACCIDENT, HOSPITALS, radius_m=1000,
+                                          show_progress=False, depart_time=DISPATCH)
+
+
+def test_tables_match_networkx(grid_graph, grid_csr, dataset):
+    hospitals = pd.read_csv(dataset)
+    tables = HospitalDistanceTables.build(grid_csr, hospitals, show_progress=False)
+    for row in range(tables.num_hospitals):
+        hospital = grid_csr.osm_id(int(tables.hospital_nodes[row]))
+        for node in list(grid_graph.nodes)[::11]:
+            expected = nx_length(grid_graph, hospital, node)
+            path, distance = tables.route(row, grid_csr.index_of(node))
+            if math.isinf(expected):
+                assert path is None
+                continue
+            assert distance == pytest.approx(expected)
+            assert path[0] == hospital and path[-1] == node
+    assert tables.row_for(*HOSPITALS[2]) == 2
+    assert tables.row_for(0.0, 0.0) is None
+
+
+def test_finder_uses_tables(graph_store, dataset):
+    build_tables(dataset, "grid", str(graph_store.store_dir))
+    with_tables = EmergencyRouteFinder(dataset, graph_store_dir=str(graph_store.store_dir))
+    assert with_tables.get_hospital_tables() is not None
+    searched = EmergencyRouteFinder("missing_dataset.csv", graph_store_dir=str(graph_store.store_dir))
+    for a, b in zip(routes(with_tables), routes(searched)):
+        assert a["distance_m"] == pytest.approx(b["distance_m"])
+
+
+def test_stale_tables_are_ignored(graph_store, dataset):
+    path = build_tables(dataset, "grid", str(graph_store.store_dir))[0]
+    assert path.name == tables_filename(dataset)
+    # Tables of an earlier build of the graph: different node IDs
+    arrays = dict(np.load(path))
+    arrays["node_ids"] = arrays["node_ids"] + 1
+    np.savez(path, **arrays)
+
+    finder = EmergencyRouteFinder(dataset, graph_store_dir=str(graph_store.store_dir))
+    assert finder.get_hospital_tables() is None
+    assert all(route["success"] for route in routes(finder))
+    assert not HospitalDistanceTables.load(str(path)).matches(
+        CSRGraph.from_store(graph_store.load("grid")))
@@ -0,0 +1,180 @@
+"""Hospital rating store on a temporary SQLite database"""
+
+import random
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from hospital_rating_system import (DECAY_HALF_LIFE_DAYS, MAX_QUERY_PARAMS, HospitalRatingSystem,
+                                    get_rating_cache, utc_day)
+
+OUTCOMES = ("successful", "partial", "unsuccessful")
+
+
+def random_outcomes(names, count=60, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "hospital_name": rng.choice(names),
+        "accident_id": f"acc_{i}",
+        "patient_outcome": rng.choice(OUTCOMES),
+        "quality_score": rng.randint(20, 100),
+        "response_time_minutes": rng.randint(5, 50),
+    } for i in range(count)]
+
+
+@pytest.fixture
+def ratings(tmp_path):
+    return HospitalRatingSystem(str(tmp_path / "ratings.db"))
+
+
+def test_bulk_reads_match_single_reads(ratings):
+    names = [f"Hospital {i}" for i in range(5)]
+    assert ratings.record_case_outcomes(random_outcomes(names)) == 60
+    bulk = ratings.get_ratings(names + ["Unknown Hospital"])
+    assert bulk["Unknown Hospital"] is None
+    ratings.cache.invalidate()
+    for name in names:
+        assert ratings.get_hospital_rating(name) == bulk[name]
+    # Copies: callers cannot corrupt the cache
+    bulk[names[0]]["current_rating"] = -1
+    assert ratings.get_hospital_rating(names[0])["current_rating"] != -1
+
+
+def test_bulk_reads_beyond_parameter_limit(ratings):
+    names = [f"Hospital {i}" for i in range(MAX_QUERY_PARAMS + 20)]
+    for name in names[::50]:
+        ratings.register_hospital(name)
+    bulk = ratings.get_ratings(names)
+    assert len(bulk) == len(names)
+    assert {name for name, info in bulk.items() if info} == set(names[::50])
+
+
+def test_writes_invalidate_cache(ratings):
+    ratings.register_hospital("Hospital A")
+    assert ratings.get_hospital_rating("Hospital A")["total_cases"] == 0
+    ratings.record_case_outcome("Hospital A", "acc_1", "successful", 90, 10)
+    assert ratings.get_hospital_rating("Hospital A")["total_cases"] == 1
+    ratings.update_rating_manually("Hospital A", 4.5, "audit")
+    assert ratings.get_hospital_rating("Hospital A")["current_rating"] == 4.5
+    # A second instance on the same file shares the cache, so it sees the write too
+    other = HospitalRatingSystem(ratings.db_path)
+    other.record_case_outcome("Hospital A", "acc_2", "unsuccessful", 30, 40)
+    assert ratings.get_hospital_rating("Hospital A")["total_cases"] == 2
+
+
+
+def test_running_aggregates_match_case_history(ratings):
+    names = [f"Hospital {i}" for i in range(4)]
+    outcomes = random_outcomes(names, count=80, seed=3)
+    # Recorded in several transactions, one case at a time for some
+    ratings.record_case_outcomes(outcomes[:50])
+    for outcome in outcomes[50:]:
+        ratings.record_case_outcome(**{key: outcome[key] for key in (
+            "hospital_name", "accident_id", "patient_outcome", "quality_score", "response_time_minutes")})
+
+    rows = ratings.db.connection().execute('''
+        SELECT h.name, COUNT(*), SUM(c.patient_outcome = 'successful'),
+               AVG(c.quality_score), AVG(c.response_time_minutes)
+        FROM case_history c JOIN hospitals h ON h.id = c.hospital_id
+        GROUP BY h.name
+    ''').fetchall()
+    assert len(rows) == len(names)
+    for name, cases, successes, avg_quality, avg_response in rows:
+        info = ratings.get_hospital_rating(name)
+        assert info["total_cases"] == cases
+        assert info["successful_outcomes"] == successes
+        assert info["average_quality_score"] == pytest.approx(avg_quality, abs=0.01)
+        assert info["average_response_time_minutes"] == pytest.approx(avg_response, abs=0.01)
+        # Every case is from today, so decay has not separated the variants yet
+        assert info["decayed_quality_score"] == pytest.approx(avg_quality, abs=0.01)
+        assert info["decayed_success_rate_percent"] == pytest.approx(successes / cases * 100, abs=0.01)
+
+
+def test_decayed_aggregates_weight_recent_cases(ratings):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    ratings.record_case_outcomes([
+        {"hospital_name": "Hospital A", "accident_id": "old", "patient_outcome": "unsuccessful",
+         "quality_score": 20, "response_time_minutes": 40,
+         "created_at": (now - timedelta(days=DECAY_HALF_LIFE_DAYS)).isoformat()},
+        {"hospital_name": "Hospital A", "accident_id": "new", "patient_outcome": "successful",
+         "quality_score": 80, "response_time_minutes": 10, "created_at": now.isoformat()},
+    ])
+    info = ratings.get_hospital_rating("Hospital A")
+    # The case one half-life old weighs 1/2 against 1
+    assert info["decayed_quality_score"] == pytest.approx((20 * 0.5 + 80) / 1.5, abs=0.05)
+    assert info["decayed_success_rate_percent"] == pytest.approx(100 / 1.5, abs=0.05)
+    assert info["average_quality_score"] == 50.0
+
+
+def create_old_database(path, cases):
+    """Rating database as created before the aggregate and rollup migrations"""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE hospitals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL, address TEXT,
+            latitude REAL, longitude REAL, phone TEXT, current_rating REAL DEFAULT 2.5,
+            total_cases INTEGER DEFAULT 0, successful_outcomes INTEGER DEFAULT 0,
+            total_response_time_minutes REAL DEFAULT 0.0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE case_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, hospital_id INTEGER, accident_id TEXT,
+            patient_outcome TEXT, quality_score REAL, response_time_minutes REAL,
+            treatment_quality_notes TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE rating_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, hospital_id INTEGER, old_rating REAL,
+            new_rating REAL, reason TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    for name, days_ago, outcome in cases:
+        conn.execute('INSERT OR IGNORE INTO hospitals (name) VALUES (?)', (name,))
+        conn.execute('''
+            INSERT INTO case_history (hospital_id, accident_id, patient_outcome, quality_score,
+                                      response_time_minutes, created_at)
+            SELECT id, ?, ?, 80, 15, datetime('now', ?) FROM hospitals WHERE name = ?
+        ''', (f"acc_{name}_{days_ago}", outcome, f"-{days_ago} days", name))
+        conn.execute('''
+            UPDATE hospitals SET total_cases = total_cases + 1, total_response_time_minutes =
+                total_response_time_minutes + 15, successful_outcomes = successful_outcomes + ?
+            WHERE name = ?
+        ''', (outcome == "successful", name))
+    conn.commit()
+    conn.close()
+
+
+OLD_CASES = [("Hospital A", 0, "successful"), ("Hospital A", 2, "successful"),
+             ("Hospital A", 5, "partial"), ("Hospital A", 20, "unsuccessful"),
+             ("Hospital B", 60, "successful")]
+
+
+def test_windows_right_after_migration(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    create_old_database(db_path, OLD_CASES)
+    ratings = HospitalRatingSystem(db_path)
+    # Computed in the migration itself, not by a later background refresh
+    assert ratings.cache.windows_day == utc_day()
+    a, b = ratings.get_hospital_rating("Hospital A"), ratings.get_hospital_rating("Hospital B")
+    assert (a["cases_7d"], a["cases_30d"], a["cases_90d"]) == (3, 4, 4)
+    assert (b["cases_7d"], b["cases_30d"], b["cases_90d"]) == (0, 0, 1)
+    assert a["rating_7d"] != 2.5 and b["rating_7d"] == 2.5
+    assert [h["hospital_name"] for h in ratings.get_top_hospitals(window="7d")] == ["Hospital A"]
+    assert len(ratings.get_top_hospitals(window="90d")) == 2
+
+
+def test_unset_windows_are_refreshed(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    create_old_database(db_path, OLD_CASES)
+    HospitalRatingSystem(db_path)
+    # A database whose windows were never computed (windows_day NULL)
+    conn = sqlite3.connect(db_path)
+    conn.execute('UPDATE hospitals SET windows_day = NULL, cases_7d = 0, rating_7d = 2.5')
+    conn.commit()
+    conn.close()
+    get_rating_cache(db_path).windows_day = None
+    get_rating_cache(db_path).invalidate()
+
+    ratings = HospitalRatingSystem(db_path, write_behind=True)
+    assert ratings.flush(timeout=5)
+    assert ratings.get_hospital_rating("Hospital A")["cases_7d"] == 3
@@ -0,0 +1,125 @@
+"""Incident store on a temporary accidents database"""
+
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from incident_store import IncidentStore
+
+START = datetime(2026, 1, 5, 8, 0)
+
+
+def dispatch_response(accident_id, lat, lon, hospital="Hospital A"):
+    return {
+        "accident_id": accident_id,
+        "timestamp": (START + timedelta(minutes=1)).isoformat(),
+        "accident_location": {"latitude": lat, "longitude": lon},
+        "selected_hospital": {"name": hospital},
+        "route": {"eta_minutes": 7.5, "distance_km": 3.2, "dispatch_time": START.isoformat()},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = IncidentStore(str(tmp_path / "accidents.db"), flush_interval_s=0.01)
+    yield store
+    store.writer.close(timeout=5)
+
+
+def test_detection_dispatch_status_upsert(store):
+    store.record_detection("acc_1", 13.07, 80.24, confidence=0.8, image_path="a.jpg",
+                           location_name="Camera 1", timestamp=START)
+    store.record_dispatch(dispatch_response("acc_1", 13.07, 80.24), report_path="r.json")
+    store.update_status("acc_1", "notified", emergency_services_notified=True)
+    # Dispatch of an incident that was never detected here inserts it
+    store.record_dispatch(dispatch_response("acc_2", 13.08, 80.25, hospital="Hospital B"))
+    assert store.flush(timeout=5)
+
+    first = store.get("acc_1")
+    assert first["status"] == "notified" and first["emergency_services_notified"] == 1
+    assert (first["confidence"], first["image_path"], first["report_path"]) == (0.8, "a.jpg", "r.json")
+    assert first["timestamp"] == START.isoformat()  # The detection time is kept
+    assert first["hospital_name"] == "Hospital A" and first["eta_minutes"] == 7.5
+    assert store.get("acc_2")["status"] == "dispatched"
+    assert store.get("missing") is None
+    assert store.count_by_status() == {"notified": 1, "dispatched": 1}
+
+
+def test_time_status_and_bbox_queries(store):
+    rng = random.Random(0)
+    incidents = []
+    for i in range(300):
+        lat, lon = rng.uniform(12.9, 13.2), rng.uniform(80.1, 80.3)
+        at = START + timedelta(minutes=7 * i)
+        status = rng.choice(("detected", "dispatched"))
+        incidents.append((f"acc_{i}", lat, lon, at, status))
+        store.record_detection(f"acc_{i}", lat, lon, timestamp=at)
+        if status == "dispatched":
+            store.update_status(f"acc_{i}", "dispatched")
+    assert store.flush(timeout=5)
+
+    def expected(start=None, end=None, bbox=None, status=None):
+        return {accident_id for accident_id, lat, lon, at, s in incidents
+                if (start is None or at >= start) and (end is None or at < end)
+                and (status is None or s == status)
+                and (bbox is None or (bbox[0] <= lat <= bbox[2] and bbox[1] <= lon <= bbox[3]))}
+
+    def ids(**filters):
+        return {row["accident_id"] for row in store.query(limit=None, **filters)}
+
+    end = START + timedelta(hours=12)
+    small = (13.0, 80.15, 13.05, 80.22)
+    large = (-60.0, -170.0, 60.0, 170.0)  # More cells than MAX_GRID_CELLS: lat/lon filter only
+    assert ids(start=START + timedelta(hours=3), end=end) == expected(START + timedelta(hours=3), end)
+    assert ids(status="dispatched") == expected(status="dispatched")
+    assert ids(bbox=small) == expected(bbox=small)
+    assert ids(bbox=small, start=START, end=end, status="detected") == expected(START, end, small, "detected")
+    assert ids(bbox=large) == expected(bbox=large)
+    assert sum(store.count_by_status(bbox=small).values()) == len(expected(bbox=small))
+
+    rows = store.query(limit=5, newest_first=False)
+    assert [row["accident_id"] for row in rows] == [f"acc_{i}" for i in range(5)]
+
+
+def test_bbox_across_antimeridian(store):
+    points = {"east": (-17.8, 178.4), "west": (-17.9, -179.6), "dateline": (-17.85, 180.0),
+              "far_east": (-17.8, 170.0), "far_west": (-17.8, -170.0), "north": (-10.0, 179.0)}
+    for accident_id, (lat, lon) in points.items():
+        store.record_detection(accident_id, lat, lon, timestamp=START)
+    assert store.flush(timeout=5)
+
+    def ids(bbox):
+        return {row["accident_id"] for row in store.query(bbox=bbox)}
+
+    assert ids((-18.0, 178.0, -17.5, -179.0)) == {"east", "west", "dateline"}
+    assert ids((-18.0, 178.0, -17.5, 180.0)) == {"east", "dateline"}
+    assert ids((-18.0, -180.0, -17.5, -179.0)) == {"west"}
+    assert ids((-18.0, 160.0, -5.0, -160.0)) == set(points)
+    with pytest.raises(ValueError):
+        store.query(bbox=(-17.5, 178.0, -18.0, -179.0))
+
+
+def test_migrates_original_accidents_table(tmp_path):
+    path = str(tmp_path / "accidents.db")
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE accidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, location_name TEXT,
+            latitude REAL, longitude REAL, confidence REAL, image_path TEXT, report_path TEXT,
+            status TEXT DEFAULT 'pending', emergency_services_notified INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute("INSERT INTO accidents (timestamp, latitude, longitude) VALUES (?, 13.07, 80.24)",
+                 (START.isoformat(),))
+    conn.commit()
+    conn.close()
+
+    store = IncidentStore(path, flush_interval_s=0.01)
+    store.record_detection("acc_new", 13.071, 80.241, timestamp=START)
+    assert store.flush(timeout=5)
+    rows = store.query(bbox=(13.06, 80.23, 13.08, 80.25))
+    assert len(rows) == 2 and all(row["grid_cell"] is not None for row in rows)
+    store.writer.close(timeout=5)
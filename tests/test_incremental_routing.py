@@ -0,0 +1,75 @@
+"""LPA* route repair against a full recompute after every traffic update"""
+
+import math
+
+import numpy as np
+import pytest
+
+from incremental_routing import IncrementalRouter
+
+
+def recompute(csr, target, sources, fwd_weights):
+    """Full reverse Dijkstra over the current forward-arc weights"""
+    rev_weights = [fwd_weights[k] for k in csr.rev_to_fwd.tolist()]
+    return csr.paths_to_target(target, sources, rev_weights)
+
+
+def assert_matches_recompute(router, csr):
+    expected = recompute(csr, router.target, router.sources, router.weights)
+    for source in router.sources:
+        path, cost = router.route(source)
+        if source not in expected:
+            assert path is None and math.isinf(cost)
+            continue
+        assert cost == pytest.approx(expected[source][1])
+        assert path[0] == source and path[-1] == router.target
+
+
+@pytest.fixture
+def router(grid_csr):
+    nodes = np.arange(grid_csr.num_nodes)
+    return IncrementalRouter(grid_csr, int(nodes[grid_csr.num_nodes // 2]), nodes[::13].tolist())
+
+
+def route_edges(router, source):
+    path, _ = router.route(source)
+    return list(zip(path[:-1], path[1:]))
+
+
+def test_initial_routes(router, grid_csr):
+    assert_matches_recompute(router, grid_csr)
+
+
+def test_block_and_reopen_edges_on_routes(router, grid_csr):
+    for source in router.sources[:4]:
+        edges = route_edges(router, source)
+        if not edges:
+            continue
+        u, v = edges[len(edges) // 2]
+        changed = router.update_edge(u, v, blocked=True)
+        assert source in changed
+        path, _ = router.route(source)
+        assert path is None or (u, v) not in zip(path[:-1], path[1:])
+        assert_matches_recompute(router, grid_csr)
+    # Clearing every update restores the original routes
+    for u in range(grid_csr.num_nodes):
+        for k in range(grid_csr.fwd_indptr[u], grid_csr.fwd_indptr[u + 1]):
+            if math.isinf(router.weights[k]):
+                router.update_edge(u, int(grid_csr.fwd_indices[k]), factor=1.0)
+    assert router.weights == router.base_weights
+    assert_matches_recompute(router, grid_csr)
+
+
+def test_reweight_many_edges(router, grid_csr):
+    rng = np.random.default_rng(4)
+    for _ in range(5):
+        updates = []
+        for u in rng.integers(grid_csr.num_nodes, size=15).tolist():
+            lo, hi = grid_csr.fwd_indptr[u], grid_csr.fwd_indptr[u + 1]
+            if hi > lo:
+                v = int(grid_csr.fwd_indices[rng.integers(lo, hi)])
+                updates.append((u, v, None, float(rng.choice([0.5, 3.0, 10.0])), False))
+        router.update_edges(updates)
+        assert_matches_recompute(router, grid_csr)
+    router.update_edge(*route_edges(router, router.sources[0])[0], weight=1.0)
+    assert_matches_recompute(router, grid_csr)
@@ -0,0 +1,80 @@
+"""Outcome export ingestion (CSV, JSONL and JSON arrays)"""
+
+import csv
+import json
+
+import pytest
+
+from hospital_rating_system import MAX_QUERY_PARAMS, HospitalRatingSystem
+from post_stabilization_rating import OUTCOME_FIELDS, ingest_outcomes
+
+ROWS = [
+    {"accident_id": "acc_1", "hospital_name": "Hospital A", "patient_outcome": "successful",
+     "quality_score": 90, "response_time_minutes": 12},
+    {"accident_id": "acc_2", "hospital_name": "Hospital A", "patient_outcome": "Partial",
+     "quality_score": 60, "response_time_minutes": 20, "created_at": "2026-01-03T10:00:00"},
+    {"accident_id": "acc_3", "hospital_name": "Hospital B", "patient_outcome": "unsuccessful",
+     "quality_score": "", "response_time_minutes": 35},
+]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=OUTCOME_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def totals(db_path):
+    ratings = HospitalRatingSystem(db_path)
+    return {name: ratings.get_hospital_rating(name)["total_cases"] for name in ("Hospital A", "Hospital B")}
+
+
+def test_csv(tmp_path):
+    path = tmp_path / "outcomes.csv"
+    write_csv(path, ROWS + [{"accident_id": "acc_4", "hospital_name": "Hospital B", "patient_outcome": "cured"}])
+    db_path = str(tmp_path / "ratings.db")
+    result = ingest_outcomes(str(path), db_path)
+    assert result["recorded"] == 3 and result["hospitals"] == 2
+    assert [line for line, _ in result["skipped"]] == [5]  # Header is line 1
+    assert totals(db_path) == {"Hospital A": 2, "Hospital B": 1}
+
+
+def test_jsonl_skips_bad_lines(tmp_path):
+    path = tmp_path / "outcomes.jsonl"
+    lines = [json.dumps(ROWS[0]), "{not json", "", json.dumps([ROWS[1]]),
+             json.dumps(ROWS[1]), json.dumps({**ROWS[2], "created_at": "yesterday"}), json.dumps(ROWS[2])]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    db_path = str(tmp_path / "ratings.db")
+    result = ingest_outcomes(str(path), db_path)
+    assert result["recorded"] == 3
+    assert [line for line, _ in result["skipped"]] == [2, 4, 6]
+    assert totals(db_path) == {"Hospital A": 2, "Hospital B": 1}
+
+
+def test_json_array(tmp_path):
+    path = tmp_path / "outcomes.json"
+    path.write_text(json.dumps(ROWS + ["not an object"]), encoding="utf-8")
+    db_path = str(tmp_path / "ratings.db")
+    result = ingest_outcomes(str(path), db_path)
+    assert result["recorded"] == 3
+    assert [index for index, _ in result["skipped"]] == [4]
+    assert totals(db_path) == {"Hospital A": 2, "Hospital B": 1}
+
+    path.write_text(json.dumps({"outcomes": ROWS}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        ingest_outcomes(str(path), db_path)
+
+
+def test_more_hospitals_than_query_parameters(tmp_path):
+    count = MAX_QUERY_PARAMS * 2 + 7
+    path = tmp_path / "outcomes.csv"
+    write_csv(path, [{"accident_id": f"acc_{i}", "hospital_name": f"Hospital {i}",
+                      "patient_outcome": "successful", "quality_score": 80,
+                      "response_time_minutes": 10} for i in range(count)])
+    db_path = str(tmp_path / "ratings.db")
+    result = ingest_outcomes(str(path), db_path)
+    assert result["recorded"] == count and result["hospitals"] == count
+    ratings = HospitalRatingSystem(db_path)
+    infos = ratings.get_ratings([f"Hospital {i}" for i in range(count)])
+    assert all(info["total_cases"] == 1 and info["cases_7d"] == 1 for info in infos.values())
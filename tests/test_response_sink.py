@@ -0,0 +1,135 @@
+"""JSONL response log: appends, rotation, Parquet compaction and lookups"""
+
+import multiprocessing
+import os
+
+import pytest
+
+import response_sink
+from response_sink import JsonlSink, find_response, read_responses
+
+needs_pyarrow = pytest.mark.skipif(response_sink.pq is None, reason="pyarrow not installed")
+
+
+def response(accident_id, hospital="Hospital A", eta=5.0):
+    return {
+        "success": True,
+        "accident_id": accident_id,
+        "timestamp": "2026-01-05T08:00:00",
+        "accident_location": {"latitude": 13.04, "longitude": 80.23},
+        "selected_hospital": {"name": hospital, "latitude": 13.05, "longitude": 80.24, "star_rating": 4.0},
+        "route": {"distance_km": 2.0, "eta_minutes": eta, "dispatch_time": "2026-01-05T08:00:00"},
+    }
+
+
+def batch(batch_id, accident_ids):
+    return {"batch_id": batch_id, "responses": [response(accident_id) for accident_id in accident_ids]}
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "logs" / "responses.jsonl")
+
+
+@pytest.fixture
+def sink(log_path):
+    sink = JsonlSink(log_path, compact_interval_s=None)
+    yield sink
+    sink.close()
+
+
+def test_write_find_and_read(sink, log_path):
+    sink.write(response("acc_1", eta=5.0), "acc_1")
+    sink.write(batch("batch_1", ["acc_2", "acc_3"]), "batch_1")
+    sink.write(response("acc_1", eta=9.0), "acc_1")
+    sink.flush()
+
+    assert find_response("acc_1", log_path)["route"]["eta_minutes"] == 9.0  # Latest wins
+    assert find_response("acc_3", log_path)["batch_id"] == "batch_1"
+    assert find_response("missing", log_path) is None
+    assert [r["accident_id"] for r in read_responses(log_path)] == ["acc_1", "acc_2", "acc_3", "acc_1"]
+
+
+def test_torn_last_line_is_skipped(sink, log_path):
+    sink.write(response("acc_1"), "acc_1")
+    sink.flush()
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write('{"accident_id": "acc_2", "succ')
+    assert [r["accident_id"] for r in read_responses(log_path)] == ["acc_1"]
+
+
+@needs_pyarrow
+def test_compaction_round_trip(sink, log_path):
+    sink.write(response("acc_1", eta=5.0), "acc_1")
+    sink.write(batch("batch_1", ["acc_2", "acc_3"]), "batch_1")
+    parquet_path = sink.compact()
+    assert parquet_path and os.path.exists(parquet_path)
+    assert not os.path.exists(log_path)
+    assert sink.compact() is None  # Nothing new
+
+    # Writes after the rotation start a new log
+    sink.write(response("acc_4"), "acc_4")
+    sink.flush()
+    assert find_response("acc_1", log_path)["route"]["eta_minutes"] == 5.0
+    assert find_response("acc_2", log_path)["batch_id"] == "batch_1"
+    assert find_response("acc_4", log_path) is not None
+    assert [r["accident_id"] for r in read_responses(log_path)] == ["acc_1", "acc_2", "acc_3", "acc_4"]
+
+    # A newer response in the live log overrides the compacted one
+    sink.write(response("acc_1", eta=9.0), "acc_1")
+    sink.flush()
+    assert find_response("acc_1", log_path)["route"]["eta_minutes"] == 9.0
+
+    table = response_sink.pq.read_table(parquet_path)
+    assert table.column("accident_id").to_pylist() == ["acc_1", "acc_2", "acc_3"]
+    assert table.column("batch_id").to_pylist() == [None, "batch_1", "batch_1"]
+
+
+@needs_pyarrow
+@pytest.mark.skipif(response_sink.fcntl is None, reason="log sharing needs fcntl")
+def test_rotation_by_another_sink(log_path):
+    # Two sinks on one log stand in for two processes
+    writer = JsonlSink(log_path, compact_interval_s=None)
+    compactor = JsonlSink(log_path, compact_interval_s=None)
+    writer.write(response("acc_1"), "acc_1")
+    assert compactor.compact()
+    # The writer notices the rotation and reopens the log
+    writer.write(response("acc_2"), "acc_2")
+    writer.close()
+    compactor.close()
+    assert os.path.getsize(log_path) > 0
+    assert [r["accident_id"] for r in read_responses(log_path)] == ["acc_1", "acc_2"]
+
+
+def _write_responses(log_path, worker, count):
+    sink = JsonlSink(log_path, compact_interval_s=None)
+    for i in range(count):
+        sink.write(response(f"acc_{worker}_{i}"), f"acc_{worker}_{i}")
+    sink.close()
+
+
+@needs_pyarrow
+@pytest.mark.skipif(response_sink.fcntl is None or "fork" not in multiprocessing.get_all_start_methods(),
+                    reason="needs fcntl and fork")
+def test_concurrent_processes_lose_nothing(sink, log_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write_responses, args=(log_path, worker, 300)) for worker in range(3)]
+    for process in workers:
+        process.start()
+    while any(process.is_alive() for process in workers):
+        sink.compact()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+    sink.compact()
+    ids = [r["accident_id"] for r in read_responses(log_path)]
+    assert len(ids) == 900 and len(set(ids)) == 900
+
+
+def test_without_pyarrow(sink, log_path, monkeypatch):
+    monkeypatch.setattr(response_sink, "pq", None)
+    sink.write(response("acc_1"), "acc_1")
+    assert sink.compact() is None
+    assert os.path.getsize(log_path) > 0  # The log just keeps growing
+    assert find_response("acc_1", log_path)["accident_id"] == "acc_1"
+    assert [r["accident_id"] for r in read_responses(log_path)] == ["acc_1"]